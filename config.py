@@ -26,16 +26,44 @@ class Settings(BaseSettings):
     # History
     HISTORY_SIZE: int = 10  # Fallback logic if needed, but we will move to dynamic settings
 
+    # Глобальный лимит одновременных запросов к LLM (по всем чатам и платформам)
+    MAX_CONCURRENT_GENERATIONS: int = 16
+    # Окно склейки быстрых сообщений одного чата в один запрос к LLM (0 — выключено)
+    MESSAGE_DEBOUNCE_SECONDS: float = 0.5
+    # Диспетчер исходящих сообщений (лимиты платформ и повтор после 429)
+    OUTBOUND_WORKERS: int = 8
+    OUTBOUND_MAX_RETRIES: int = 3
+
 
     # Webhook
     WEBHOOK_PATH: str = "/webhook"
     WEBHOOK_SECRET: str = ""
     BASE_WEBHOOK_URL: str = "https://yourdomain.com"
     USE_WEBHOOK: bool = False
+    # Пул воркеров, разбирающих очередь входящих обновлений webhook
+    TELEGRAM_UPDATE_WORKERS: int = 8
+    TELEGRAM_UPDATE_QUEUE_SIZE: int = 1000
+    TELEGRAM_UPDATE_ENQUEUE_TIMEOUT: float = 1.0
+    # Дедупликация обновлений по update_id: memory или database (для нескольких инстансов)
+    TELEGRAM_DEDUP_WINDOW: int = 10000
+    TELEGRAM_DEDUP_BACKEND: str = "memory"
+
+    # Общее состояние процессов (ожидание ввода, кэши): memory или database
+    # (для нескольких реплик за балансировщиком)
+    STATE_BACKEND: str = "memory"
+    # Как часто подписчики pub/sub бэкенда database проверяют новые события, секунды
+    STATE_POLL_INTERVAL: float = 1.0
+    STATE_EVENT_RETENTION: float = 300.0
+    # Срок кэша результатов поиска и метаданных треков, секунды
+    MUSIC_CACHE_TTL: int = 3600
 
     # Server
     HOST: str = "0.0.0.0"
     PORT: int = 8000
+    # Сколько секунд при остановке ждать завершения текущих HTTP-запросов (0 — без ограничения)
+    SHUTDOWN_TIMEOUT: float = 30.0
+    # Сколько секунд затем ждать начатых генераций и исходящих сообщений перед закрытием соединений
+    SHUTDOWN_DRAIN_TIMEOUT: float = 20.0
 
     # Database
     DATABASE_PATH: str = "data/bot.db"
@@ -44,6 +72,68 @@ class Settings(BaseSettings):
     POSTGRES_DB: str = "llm_bot"
     POSTGRES_HOST: str | None = None
     POSTGRES_PORT: int = 5432
+    # Пул соединений asyncpg
+    POSTGRES_POOL_MIN_SIZE: int = 2
+    POSTGRES_POOL_MAX_SIZE: int = 10
+    # Закрывать соединения, простаивающие дольше, секунды (0 — не закрывать)
+    POSTGRES_POOL_MAX_INACTIVE_LIFETIME: float = 300.0
+    # Пересоздавать соединение после стольких запросов (ограничение времени жизни)
+    POSTGRES_POOL_MAX_QUERIES: int = 50000
+    # Кэш подготовленных выражений на соединение (0 — выключен, нужно для pgbouncer в режиме transaction)
+    POSTGRES_STATEMENT_CACHE_SIZE: int = 100
+    # Таймаут запроса по умолчанию, секунды
+    POSTGRES_COMMAND_TIMEOUT: float = 60.0
+    POSTGRES_APPLICATION_NAME: str = "llm_bot"
+    # Реплика чтения для аналитики админ-панели (не задан — всё читается с основного сервера)
+    POSTGRES_REPLICA_HOST: str | None = None
+    POSTGRES_REPLICA_PORT: int | None = None
+    # При большем отставании реплики запросы идут на основной сервер
+    REPLICA_MAX_LAG_SECONDS: float = 10.0
+    REPLICA_CHECK_INTERVAL: float = 5.0
+
+    # Профиль SQLite: прагмы при открытии соединения и очередь записи
+    SQLITE_TUNING: bool = True
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
+    SQLITE_CACHE_SIZE: int = -64000  # Отрицательное значение — размер в КиБ
+    SQLITE_BUSY_TIMEOUT: int = 5000  # мс; ожидание блокировки другого процесса вместо "database is locked"
+    # Все записи сообщений идут через одну задачу, объединяющую их в транзакции
+    SQLITE_WRITE_QUEUE: bool = True
+    SQLITE_WRITE_BATCH: int = 100
+    SQLITE_WRITE_LINGER_MS: float = 2.0
+
+    # Запись сообщений и чтение контекста чата сырыми SQL-запросами вместо моделей ORM
+    HISTORY_SQL_FAST_PATH: bool = True
+
+    # Кэш статистики админ-панели (stale-while-revalidate), секунды
+    ADMIN_CACHE_TTL: float = 10.0
+    ADMIN_CACHE_STALE_TTL: float = 300.0
+    # Сколько дней хранить почасовые счётчики активности
+    STATS_HOURLY_RETENTION_DAYS: int = 90
+    # Конфигурация полнотекстового поиска Postgres (simple, russian, english, ...)
+    FULLTEXT_SEARCH_CONFIG: str = "simple"
+
+    # Хранение истории. Глобальные значения по умолчанию (0 — без ограничения);
+    # политики платформ и чатов задаются в админ-панели
+    RETENTION_MAX_AGE_DAYS: int = 0
+    RETENTION_MAX_MESSAGES: int = 0
+    RETENTION_INTERVAL_MINUTES: int = 60
+    RETENTION_BATCH_SIZE: int = 500
+    RETENTION_BATCH_PAUSE: float = 0.05
+
+    # Помесячное секционирование chat_messages (только Postgres)
+    POSTGRES_PARTITIONING: bool = False
+    POSTGRES_PARTITION_PREMAKE_MONTHS: int = 3
+    # Старые секции: True — удалять, False — только отсоединять (остаются отдельными таблицами)
+    POSTGRES_PARTITION_DROP: bool = True
+
+    # Архив старой истории: сообщения старше ARCHIVE_AFTER_DAYS (0 — архивирование выключено)
+    # переносятся в сжатые файлы сегментов по чатам
+    ARCHIVE_DIR: str = "data/archive"
+    ARCHIVE_AFTER_DAYS: int = 0
+    ARCHIVE_SEGMENT_MESSAGES: int = 5000
+    # Сколько распакованных сегментов держать в памяти для повторных чтений
+    ARCHIVE_CACHE_SEGMENTS: int = 8
 
     # Create superuser: ADMIN_USERNAME / ADMIN_PASSWORD (env, for scripts/create_superuser.py)
     ADMIN_USERNAME: str = ""
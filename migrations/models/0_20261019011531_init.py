@@ -0,0 +1,338 @@
+from tortoise import BaseDBAsyncClient
+
+RUN_IN_TRANSACTION = True
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    # Сгенерировано aerich init-db для SQLite и Postgres; IF NOT EXISTS позволяет
+    # применить миграцию к базам, созданным по моделям до поставки миграций
+    if db.capabilities.dialect == "postgres":
+        return POSTGRES
+    return SQLITE
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        """
+
+
+SQLITE = """
+CREATE TABLE IF NOT EXISTS "allowed_chats" (
+    "id" INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+    "chat_id" BIGINT NOT NULL,
+    "platform" VARCHAR(20) NOT NULL DEFAULT 'telegram',
+    "title" VARCHAR(255),
+    "is_active" INT NOT NULL DEFAULT 1,
+    "created_at" TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT "uid_allowed_cha_chat_id_3278d0" UNIQUE ("chat_id", "platform")
+) /* Модель для хранения разрешенных чатов. */;
+CREATE INDEX IF NOT EXISTS "idx_allowed_cha_chat_id_43dfdb" ON "allowed_chats" ("chat_id");
+CREATE TABLE IF NOT EXISTS "archive_segments" (
+    "id" INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+    "chat_id" BIGINT NOT NULL,
+    "platform" VARCHAR(20) NOT NULL DEFAULT 'telegram',
+    "chat_type" VARCHAR(20) NOT NULL DEFAULT 'private',
+    "path" VARCHAR(500) NOT NULL,
+    "first_id" BIGINT NOT NULL,
+    "last_id" BIGINT NOT NULL,
+    "first_at" TIMESTAMP NOT NULL,
+    "last_at" TIMESTAMP NOT NULL,
+    "message_count" INT NOT NULL,
+    "role_counts" JSON NOT NULL,
+    "size_bytes" BIGINT NOT NULL DEFAULT 0,
+    "created_at" TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+) /* Модель манифеста архивного сегмента истории. */;
+CREATE INDEX IF NOT EXISTS "idx_archive_seg_chat_id_de6123" ON "archive_segments" ("chat_id", "platform", "first_id");
+CREATE TABLE IF NOT EXISTS "chat_messages" (
+    "id" INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+    "chat_id" BIGINT NOT NULL,
+    "platform" VARCHAR(20) NOT NULL DEFAULT 'telegram',
+    "chat_type" VARCHAR(20) NOT NULL DEFAULT 'private',
+    "role" VARCHAR(50) NOT NULL,
+    "nickname" VARCHAR(255),
+    "content" TEXT NOT NULL,
+    "created_at" TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+) /* Модель для хранения сообщений чата. */;
+CREATE INDEX IF NOT EXISTS "idx_chat_messag_chat_id_952b25" ON "chat_messages" ("chat_id");
+CREATE INDEX IF NOT EXISTS "idx_chat_messag_chat_id_d7dd9c" ON "chat_messages" ("chat_id", "platform", "id");
+CREATE INDEX IF NOT EXISTS "idx_chat_messag_chat_id_732ab9" ON "chat_messages" ("chat_id", "platform", "created_at");
+CREATE TABLE IF NOT EXISTS "chat_stats" (
+    "id" INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+    "chat_id" BIGINT NOT NULL,
+    "platform" VARCHAR(20) NOT NULL DEFAULT 'telegram',
+    "chat_type" VARCHAR(20) NOT NULL DEFAULT 'private',
+    "message_count" BIGINT NOT NULL DEFAULT 0,
+    "last_message_at" TIMESTAMP NOT NULL,
+    CONSTRAINT "uid_chat_stats_chat_id_52e8ce" UNIQUE ("chat_id", "platform")
+) /* Модель для хранения счётчиков сообщений по чатам. */;
+CREATE INDEX IF NOT EXISTS "idx_chat_stats_last_me_c0beb3" ON "chat_stats" ("last_message_at", "id");
+CREATE INDEX IF NOT EXISTS "idx_chat_stats_message_18546d" ON "chat_stats" ("message_count", "id");
+CREATE TABLE IF NOT EXISTS "hourly_stats" (
+    "id" INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+    "bucket" TIMESTAMP NOT NULL,
+    "platform" VARCHAR(20) NOT NULL DEFAULT 'telegram',
+    "messages" INT NOT NULL DEFAULT 0,
+    CONSTRAINT "uid_hourly_stat_bucket_190f12" UNIQUE ("bucket", "platform")
+) /* Модель для хранения количества сообщений по часам. */;
+CREATE INDEX IF NOT EXISTS "idx_hourly_stat_bucket_24a524" ON "hourly_stats" ("bucket");
+CREATE TABLE IF NOT EXISTS "llm_connections" (
+    "id" INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+    "name" VARCHAR(255) NOT NULL,
+    "provider" VARCHAR(50) NOT NULL DEFAULT 'openrouter',
+    "api_key" TEXT NOT NULL,
+    "base_url" VARCHAR(255),
+    "model_name" VARCHAR(255) NOT NULL,
+    "is_active" INT NOT NULL DEFAULT 0
+) /* Модель для хранения параметров подключения к LLM провайдерам. */;
+CREATE TABLE IF NOT EXISTS "llm_prompts" (
+    "id" INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+    "name" VARCHAR(255) NOT NULL,
+    "content" TEXT NOT NULL,
+    "is_active" INT NOT NULL DEFAULT 0,
+    "connection_id" INT NOT NULL REFERENCES "llm_connections" ("id") ON DELETE CASCADE
+) /* Модель для хранения системных промптов для конкретных подключений. */;
+CREATE TABLE IF NOT EXISTS "processed_updates" (
+    "update_id" INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+    "created_at" TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+) /* Модель для хранения ID уже обработанных обновлений Telegram. */;
+CREATE TABLE IF NOT EXISTS "retention_policies" (
+    "id" INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+    "platform" VARCHAR(20),
+    "chat_id" BIGINT,
+    "max_age_days" INT,
+    "max_messages" INT,
+    "created_at" TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT "uid_retention_p_platfor_2bcdb1" UNIQUE ("platform", "chat_id")
+) /* Модель для хранения политик хранения истории. */;
+CREATE TABLE IF NOT EXISTS "settings" (
+    "key" VARCHAR(255) NOT NULL PRIMARY KEY,
+    "value" TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS "stat_counters" (
+    "name" VARCHAR(100) NOT NULL PRIMARY KEY,
+    "value" BIGINT NOT NULL DEFAULT 0
+) /* Модель для хранения инкрементальных счётчиков сообщений (всего, по платформам, по ролям). */;
+CREATE TABLE IF NOT EXISTS "state_entries" (
+    "key" VARCHAR(255) NOT NULL PRIMARY KEY,
+    "value" TEXT NOT NULL,
+    "expires_at" REAL
+) /* Модель ключа общего состояния процессов (бэкенд состояния database). */;
+CREATE INDEX IF NOT EXISTS "idx_state_entri_expires_de29ba" ON "state_entries" ("expires_at");
+CREATE TABLE IF NOT EXISTS "state_events" (
+    "id" INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+    "channel" VARCHAR(255) NOT NULL,
+    "payload" TEXT NOT NULL,
+    "created_at" REAL NOT NULL
+) /* Модель события pub/sub бэкенда состояния database. */;
+CREATE INDEX IF NOT EXISTS "idx_state_event_created_3832c2" ON "state_events" ("created_at");
+CREATE INDEX IF NOT EXISTS "idx_state_event_channel_7cdeb9" ON "state_events" ("channel", "id");
+CREATE TABLE IF NOT EXISTS "users" (
+    "id" INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+    "username" VARCHAR(255) NOT NULL UNIQUE,
+    "password_hash" VARCHAR(255) NOT NULL,
+    "is_superuser" INT NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS "aerich" (
+    "id" INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+    "version" VARCHAR(255) NOT NULL,
+    "app" VARCHAR(100) NOT NULL,
+    "content" JSON NOT NULL
+);
+"""
+
+POSTGRES = """
+CREATE TABLE IF NOT EXISTS "allowed_chats" (
+    "id" SERIAL NOT NULL PRIMARY KEY,
+    "chat_id" BIGINT NOT NULL,
+    "platform" VARCHAR(20) NOT NULL DEFAULT 'telegram',
+    "title" VARCHAR(255),
+    "is_active" BOOL NOT NULL DEFAULT True,
+    "created_at" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT "uid_allowed_cha_chat_id_3278d0" UNIQUE ("chat_id", "platform")
+);
+CREATE INDEX IF NOT EXISTS "idx_allowed_cha_chat_id_43dfdb" ON "allowed_chats" ("chat_id");
+COMMENT ON TABLE "allowed_chats" IS 'Модель для хранения разрешенных чатов.';
+CREATE TABLE IF NOT EXISTS "archive_segments" (
+    "id" SERIAL NOT NULL PRIMARY KEY,
+    "chat_id" BIGINT NOT NULL,
+    "platform" VARCHAR(20) NOT NULL DEFAULT 'telegram',
+    "chat_type" VARCHAR(20) NOT NULL DEFAULT 'private',
+    "path" VARCHAR(500) NOT NULL,
+    "first_id" BIGINT NOT NULL,
+    "last_id" BIGINT NOT NULL,
+    "first_at" TIMESTAMPTZ NOT NULL,
+    "last_at" TIMESTAMPTZ NOT NULL,
+    "message_count" INT NOT NULL,
+    "role_counts" JSONB NOT NULL,
+    "size_bytes" BIGINT NOT NULL DEFAULT 0,
+    "created_at" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS "idx_archive_seg_chat_id_de6123" ON "archive_segments" ("chat_id", "platform", "first_id");
+COMMENT ON TABLE "archive_segments" IS 'Модель манифеста архивного сегмента истории.';
+CREATE TABLE IF NOT EXISTS "chat_messages" (
+    "id" SERIAL NOT NULL PRIMARY KEY,
+    "chat_id" BIGINT NOT NULL,
+    "platform" VARCHAR(20) NOT NULL DEFAULT 'telegram',
+    "chat_type" VARCHAR(20) NOT NULL DEFAULT 'private',
+    "role" VARCHAR(50) NOT NULL,
+    "nickname" VARCHAR(255),
+    "content" TEXT NOT NULL,
+    "created_at" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS "idx_chat_messag_chat_id_952b25" ON "chat_messages" ("chat_id");
+CREATE INDEX IF NOT EXISTS "idx_chat_messag_chat_id_d7dd9c" ON "chat_messages" ("chat_id", "platform", "id");
+CREATE INDEX IF NOT EXISTS "idx_chat_messag_chat_id_732ab9" ON "chat_messages" ("chat_id", "platform", "created_at");
+COMMENT ON TABLE "chat_messages" IS 'Модель для хранения сообщений чата.';
+CREATE TABLE IF NOT EXISTS "chat_stats" (
+    "id" SERIAL NOT NULL PRIMARY KEY,
+    "chat_id" BIGINT NOT NULL,
+    "platform" VARCHAR(20) NOT NULL DEFAULT 'telegram',
+    "chat_type" VARCHAR(20) NOT NULL DEFAULT 'private',
+    "message_count" BIGINT NOT NULL DEFAULT 0,
+    "last_message_at" TIMESTAMPTZ NOT NULL,
+    CONSTRAINT "uid_chat_stats_chat_id_52e8ce" UNIQUE ("chat_id", "platform")
+);
+CREATE INDEX IF NOT EXISTS "idx_chat_stats_last_me_c0beb3" ON "chat_stats" ("last_message_at", "id");
+CREATE INDEX IF NOT EXISTS "idx_chat_stats_message_18546d" ON "chat_stats" ("message_count", "id");
+COMMENT ON TABLE "chat_stats" IS 'Модель для хранения счётчиков сообщений по чатам.';
+CREATE TABLE IF NOT EXISTS "hourly_stats" (
+    "id" SERIAL NOT NULL PRIMARY KEY,
+    "bucket" TIMESTAMPTZ NOT NULL,
+    "platform" VARCHAR(20) NOT NULL DEFAULT 'telegram',
+    "messages" INT NOT NULL DEFAULT 0,
+    CONSTRAINT "uid_hourly_stat_bucket_190f12" UNIQUE ("bucket", "platform")
+);
+CREATE INDEX IF NOT EXISTS "idx_hourly_stat_bucket_24a524" ON "hourly_stats" ("bucket");
+COMMENT ON TABLE "hourly_stats" IS 'Модель для хранения количества сообщений по часам.';
+CREATE TABLE IF NOT EXISTS "llm_connections" (
+    "id" SERIAL NOT NULL PRIMARY KEY,
+    "name" VARCHAR(255) NOT NULL,
+    "provider" VARCHAR(50) NOT NULL DEFAULT 'openrouter',
+    "api_key" TEXT NOT NULL,
+    "base_url" VARCHAR(255),
+    "model_name" VARCHAR(255) NOT NULL,
+    "is_active" BOOL NOT NULL DEFAULT False
+);
+COMMENT ON TABLE "llm_connections" IS 'Модель для хранения параметров подключения к LLM провайдерам.';
+CREATE TABLE IF NOT EXISTS "llm_prompts" (
+    "id" SERIAL NOT NULL PRIMARY KEY,
+    "name" VARCHAR(255) NOT NULL,
+    "content" TEXT NOT NULL,
+    "is_active" BOOL NOT NULL DEFAULT False,
+    "connection_id" INT NOT NULL REFERENCES "llm_connections" ("id") ON DELETE CASCADE
+);
+COMMENT ON TABLE "llm_prompts" IS 'Модель для хранения системных промптов для конкретных подключений.';
+CREATE TABLE IF NOT EXISTS "processed_updates" (
+    "update_id" BIGSERIAL NOT NULL PRIMARY KEY,
+    "created_at" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+COMMENT ON TABLE "processed_updates" IS 'Модель для хранения ID уже обработанных обновлений Telegram.';
+CREATE TABLE IF NOT EXISTS "retention_policies" (
+    "id" SERIAL NOT NULL PRIMARY KEY,
+    "platform" VARCHAR(20),
+    "chat_id" BIGINT,
+    "max_age_days" INT,
+    "max_messages" INT,
+    "created_at" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT "uid_retention_p_platfor_2bcdb1" UNIQUE ("platform", "chat_id")
+);
+COMMENT ON TABLE "retention_policies" IS 'Модель для хранения политик хранения истории.';
+CREATE TABLE IF NOT EXISTS "settings" (
+    "key" VARCHAR(255) NOT NULL PRIMARY KEY,
+    "value" TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS "stat_counters" (
+    "name" VARCHAR(100) NOT NULL PRIMARY KEY,
+    "value" BIGINT NOT NULL DEFAULT 0
+);
+COMMENT ON TABLE "stat_counters" IS 'Модель для хранения инкрементальных счётчиков сообщений (всего, по платформам, по ролям).';
+CREATE TABLE IF NOT EXISTS "state_entries" (
+    "key" VARCHAR(255) NOT NULL PRIMARY KEY,
+    "value" TEXT NOT NULL,
+    "expires_at" DOUBLE PRECISION
+);
+CREATE INDEX IF NOT EXISTS "idx_state_entri_expires_de29ba" ON "state_entries" ("expires_at");
+COMMENT ON TABLE "state_entries" IS 'Модель ключа общего состояния процессов (бэкенд состояния database).';
+CREATE TABLE IF NOT EXISTS "state_events" (
+    "id" BIGSERIAL NOT NULL PRIMARY KEY,
+    "channel" VARCHAR(255) NOT NULL,
+    "payload" TEXT NOT NULL,
+    "created_at" DOUBLE PRECISION NOT NULL
+);
+CREATE INDEX IF NOT EXISTS "idx_state_event_created_3832c2" ON "state_events" ("created_at");
+CREATE INDEX IF NOT EXISTS "idx_state_event_channel_7cdeb9" ON "state_events" ("channel", "id");
+COMMENT ON TABLE "state_events" IS 'Модель события pub/sub бэкенда состояния database.';
+CREATE TABLE IF NOT EXISTS "users" (
+    "id" SERIAL NOT NULL PRIMARY KEY,
+    "username" VARCHAR(255) NOT NULL UNIQUE,
+    "password_hash" VARCHAR(255) NOT NULL,
+    "is_superuser" BOOL NOT NULL DEFAULT False
+);
+CREATE TABLE IF NOT EXISTS "aerich" (
+    "id" SERIAL NOT NULL PRIMARY KEY,
+    "version" VARCHAR(255) NOT NULL,
+    "app" VARCHAR(100) NOT NULL,
+    "content" JSONB NOT NULL
+);
+"""
+
+
+MODELS_STATE = (
+    "eJztXXtv6jgW/yoRf3Uk5i4EKHS1Wom23Lnd6eOqj93R3LlCIRgaNSSZPNrLjPrd14+EHC"
+    "d2SoBA0kaVImqf48fPjs/Dx87fjYU9Rab3aWia9guanj1qfuOfyt8NS1sg/EOU3VQamuPE"
+    "mSTB1yYmpdcY4VjHlDRHm3i+q+mk1JlmeggnTZGnu4bjG7ZFWP4IWt22Tp4dRJ9d+uzR54"
+    "Q8u7oCMljSjCZ1KVW3RTPYcwq42e8BZICkfZDCChqkmOmzy+rssSL6cRFdFbRb/UQ6PLV1"
+    "3GPDmr/DvgWW8WeAxr49R/4jcnEPv31rkKEeG1OS75iaP7PdReP7d/yfYU3RD+QRKvKv8z"
+    "SeGciccvOL8dH0sb90aNqF5X+mhATNyVi3zWBhxcTO0n+0rRW1YdEpOUcWcjUfkeJ9NyDz"
+    "zApMM5yX0dRjHYhJWBMBzxTNtMAks5VwpyZrlAjGOEzSbYtMdNwaj3ZwTmr5WW13+91B57"
+    "g7wCS0JauU/ivrXtx3xkgRuL5vvNJ8zdcYBYUxxg2AzoN3asyl+MGRehPECLIsFKOEomE8"
+    "UdVOp6+2OseDXrff7w1aKzzTWVnAnl78QrDFBDZelNiSFYEdg7uaxil08QLoirGFPAlwcY"
+    "d2A268gEboNnxkormr0Wo3xXih/RibyJr7j2R+tjLg++/w9uzL8PZIbf3EY3gd5qg0i0fT"
+    "N3xMlAPKFcNGOIYzMBeMW05SHsBebx0Eez05hCSPx9DwxliGGs8CHE9t20SaJVkxIV8Czg"
+    "lmLGperpaBjQDNeoFvbi5Joxee96fJ3ujE63z9cHU6uj1qU3gxkeFL3nLdRaTXY6bS8KCe"
+    "4xzfWCDJOspxJmCdhqyfoh9FYbzlpMV9mN5Y5jIcrQzM7y+uRnf3w6uvHPDnw/sRyVFp6j"
+    "KRenScmN6rQpT/Xdx/Uci/yu831yOKoO35c5fWGNPd/94gbdIC3x5b9stYmwL5EqVGwLwS"
+    "BWP2BEQlSZho+tOL5k7HqRxbtWW06ayFukimaJY2p8NCwCXNjPRkV3/Eb9sdmi+QJdakeY"
+    "psZZrRjj1GvHN9Wk+plkydBAzdNlAFWwrQDluxjsrYOiooiNXcYb+VuKSwGR1QP9BI+XoG"
+    "qQYgoNSyOgfb6Nzvov9/WPgP/1TXKh+XrLbaXdii46TKzyyCzoky/8twlP/c3Vxf/gxwYd"
+    "WfMDjDgmB5CDxZ409kZgto5UBJjZgUybSR0moq8RCE7QfGEod9yvaJWsBwDIHtK1RbXiDP"
+    "w6+694mWr8pMssEK3VXrB4BoBn73Qa+mijFVYPe7sGdcjgbYJqDOvmSuqumpt/bA4KEHzU"
+    "bQuAQNiIavyXBjLeGMRlbJBA7aAA4amHLsjZTPMDVVuw5hSRN1IJ7NNIZcvgJGBowY7LPM"
+    "fA57MQNAh12SzZJjWCd8XVGqGYKSOmCYAIzhDJCa6Ql7XGy1UzXI9Wj699pk/yAm+841y9"
+    "pmr7zNTqcdxSIHnBzTHvF0XOMZl1liOB0NF5xnYob0+wNxlx6QXmsdADGVFEGax0O4Eky5"
+    "lk/IVa+fWeunqW0AL2Cq0c1Cl83D/J4myFdNP1NF/EpRt1OOpdQ7kn8QAVs9hocew9Cgx8"
+    "MTWIKRlC51Kb6KLXhbmjUxgK5thih4afiIs0iMX4Itgd6DhXv1bWroflMxDc//Xpiy+K9Z"
+    "YOkEQ2USGKZvWN4nUu2/t9AeM+AjeHBvRqTjHF0Nf0uqP2eXN6fJKU8KOE2MgGf8hcaTpY"
+    "8EA5AlrXm+/c3fVtWkdb0zVO8M7XpniIROXTEZ0hBsC8HsZtaeEOeVLmOA1Wa+ZpFP/9Dh"
+    "VDvuyRZeWeKPbSrSbLDq1G7bj+K2rSOt0uDWXtvaa7s7OInJkgfJiL6qXtu1nLYZPtskfp"
+    "ahP9HfOTCEPHX43+rFti0fidwV9+iHTALFLFWZj1mGxui3+2w7emVnXN5c/xKRJ43r2syr"
+    "zbzizbw7X3yIZpXXfNPA8/ySHp9pxyZODwa7gOgeLsxG3V0AksCuok+9FHZiGTHZ+LjON7"
+    "ZnEfm82ZSNjNCUJ7yOFvpAZuf72I+t7c7a7iwtnG9sUWYtAAfcpazcLo9AxOXe1efZq2kI"
+    "VETxl+7ul0Tz/2IHrrmU6f4gN1P7f6R0pdX/NzyG0CpG422XyAooOzJCW2AS6E/IzzQFas"
+    "V+x4p9jHkeaQNGai9CZsegVl3G1LZDwcquIJTpLSW3clFMWy0pJdFyLi+vzmzLQnqIQUrR"
+    "4QkydR3TXOBRjWhLqe6Ag5scGzhZy53Rgw6+SDqDxmigSSipHQiVCgXjCUrjqwENOkliwT"
+    "f30MrRu8Lx7UCeWmnasdKUext5my3kg2/FF7KH7Lj2szFFbi61BfDsUW2xHWS5duCziksa"
+    "3aA5xvgJLfPsyQOWqkzMfe/JTzQPjQPXzDNLIU8dM8LpY+O8CyfPVZVZWt/AlQJUrD7v4r"
+    "3f8gquHIYMJ7wWjujA0WnI+PnXW4Rt7NDmSOAcmyZfaTnlnMSv0dSJUsOV6bVgey7ERGzL"
+    "xYBl23FggEpmw4W+0PRlSj1ggaRvQhXYCTpI5+5GlbWV8wlP4xTuWlY1swGbmT2dk1LExH"
+    "xI0GvrsLYOq6fe1BHGRVgztdJYxL2tK5exMD5OHhyX5KtYiNxutw9EeKbB/Gy7yJhbv6Il"
+    "xfQCt0uzdNG0lLn/ywenTM/Gya72shLL6fmCf+A+IjYvz4Z3Z8PzUeP1MPswWC/Xkeeh6Y"
+    "NDNn5F2nuSJFOHdyLicUCpy6bJX5wzHnb9IbtCsQevDG2nCgMxFVxstOzbB7Ag7u5RNW66"
+    "MBTjPtxlPaDOXRl4ttCO2cTMHRPNsVVJXd5LOGRGAHp9Oqo+HbVjqXWLiMWAh+KrbRr6Ui"
+    "S1kiSZUsuNiMcOoTZKJ7ZSPgUYGaiCZVLbsOzC70h/HwBEl6S34UXgfSUKy4pu2g7Pz8BL"
+    "0sMLlycpEdiCWIHWwfug1+s5Y2vmuOi6DVseNzVHbeFd5zNAC2+c7qaQpK3oTprwwncODw"
+    "Qqia9036hx8ntUaE4bTgl4aTe8PTx9y7vAw8f5DeHwtUEze3HZTL/qAqUpnHkzgEd0cXs7"
+    "WVFYUi/EXhbne5IXr4E8wJe7JSY8HFZH+BbsjjxIgOjB97CLOVW27xOQB4DxIIefyNiRg0"
+    "tTbZkr9DbBVi2Md3YHJoFhk8DlBNsHRa+2LGvLcteW5R3yfYZ6yqKMsjItSY8RrWc/ysd6"
+    "C/eWMJZQrjDsNI6wcI2rqA1MuRL2rJmBYNtNvp25Yqg3M+PNzLK83b7mn5Ej7fSVSr/hID"
+    "v7LceE7Gw8ckvpKhqAjFTUivx7cWJXBP9l573dUnPE2AE395GrZvroal43RHQaQ1CU/DNl"
+    "Px3aC1aPbcFju4XwPWwE0X7Fb3utz/O0Mz7P044+z5Nb/GaZ7jIBXOoznXsw20skg9HI8l"
+    "3htg3IfVMCozHChAVs1shCNVvpnXC4xAm+0orAsgp3FWayxT39vcjjuIawILjcquFSynKA"
+    "UOCW3e6mbSLvJTkWs5XQq+EUw1kbebWR956MPOibQz8cw0We0Df32bQ1Ca48WwLcGeHbiW"
+    "dzf7eSnN88nF6OlK+3o7OLu4vwIz4rXxvN5ONUb0fDy7IJ62fJN+hB7jrC+rmAb89zq3f4"
+    "nWiwFEcLrxNM/uEFE2WdxR3Ipi2W+C0EZrn7tObnRywL0fDy3Je6Zqn21dscPnTwXTwQ6+"
+    "oKgKUqwm0ftx5oSyx9BNNVriMAlqoAuW8tIWsHL0NLyNy+W1dLKNXlZRVXEx48sUOdpmeq"
+    "BoG3rge9kM2yOjRps9AkMmx5fZ2Q54NbolCueN6Ljd+/R83L+Wn3BGNVZMx+7tjwAge5gS"
+    "e6puitE5Mca31osjRCZohcQ38UiZkwJ1PQaDFNLWkqJGmesX4gPFIqXxoBS70ognvGnDwg"
+    "huTVBHCHW5NrXG0g/1i5/GqDvX2ovDCTZWefJD+oeHn9P2qFMg0="
+)
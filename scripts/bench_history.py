@@ -0,0 +1,93 @@
+"""
+Накладные расходы БД на один ход диалога: ORM против сырых SQL-запросов.
+
+Запуск: python scripts/bench_history.py [--turns 500] [--use-config]
+
+Ход — то, что делает бот на каждое сообщение: запись сообщения пользователя
+(с названием чата), чтение последних сообщений для контекста и запись ответа.
+По умолчанию используется временная база SQLite; с --use-config — база из
+настроек (.env), в том числе Postgres. Во втором случае бенчмарк пишет
+в чат с отрицательным ID и удаляет его историю после прогона.
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(_root))
+
+load_dotenv(_root / ".env")
+
+from tortoise import Tortoise  # noqa: E402
+
+from config import settings  # noqa: E402
+from src.database.config import get_tortoise_config  # noqa: E402
+from src.services import HistoryService  # noqa: E402
+
+BENCH_CHAT_ID = -424242
+
+
+async def run_turns(fast: bool, turns: int) -> list[float]:
+    settings.HISTORY_SQL_FAST_PATH = fast
+    chat_id = BENCH_CHAT_ID - int(fast)
+    timings = []
+    for i in range(turns):
+        started = time.perf_counter()
+        await HistoryService.add_message(chat_id, "user", f"question {i}", chat_type="group", title="Bench chat")
+        await HistoryService.get_last_messages(chat_id, limit=10)
+        await HistoryService.add_message(chat_id, "assistant", f"answer {i}", chat_type="group", title="Bench chat")
+        timings.append(time.perf_counter() - started)
+    await HistoryService.clear_history(chat_id)
+    return timings
+
+
+def report(name: str, timings: list[float]) -> str:
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95)]
+    return (
+        f"{name:<6}{statistics.mean(timings) * 1000:>10.3f}{statistics.median(timings) * 1000:>10.3f}"
+        f"{p95 * 1000:>10.3f}{len(timings) / sum(timings):>12.0f}"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=500)
+    parser.add_argument("--use-config", action="store_true", help="Использовать базу из настроек")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.use_config:
+            config = get_tortoise_config()
+        else:
+            config = {
+                "connections": {"default": f"sqlite://{Path(tmp) / 'bench.db'}"},
+                "apps": {"models": {"models": ["src.database.models"], "default_connection": "default"}},
+            }
+        await Tortoise.init(config=config)
+        if not args.use_config:
+            await Tortoise.generate_schemas()
+        try:
+            # Прогрев: первые запросы подготавливают соединение и кэши
+            await run_turns(True, 20)
+            await run_turns(False, 20)
+            orm = await run_turns(False, args.turns)
+            fast = await run_turns(True, args.turns)
+        finally:
+            await Tortoise.close_connections()
+
+    print(f"{args.turns} turns per path (write user message + read context + write reply)")
+    print(f"{'path':<6}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'turns/s':>12}")
+    print(report("orm", orm))
+    print(report("sql", fast))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
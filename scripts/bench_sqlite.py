@@ -0,0 +1,100 @@
+"""
+Нагрузочное сравнение профилей SQLite.
+
+Запуск: python scripts/bench_sqlite.py [--chats 20] [--messages 50]
+
+Каждый чат параллельно пишет сообщения и читает последние сообщения (как при
+ответе бота). Оба режима используют текущий путь записи (HistoryService со
+счётчиками статистики), поэтому сравнение показывает только эффект прагм и
+пакетной записи, а не отличие от прежнего пути записи:
+- untuned: прагмы Tortoise по умолчанию, каждая запись фиксируется отдельно;
+- tuned: профиль SQLITE_TUNING и очередь записи SQLITE_WRITE_QUEUE.
+"""
+
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(_root))
+
+from tortoise import Tortoise  # noqa: E402
+
+from config import Settings  # noqa: E402
+from src.database.config import sqlite_pragmas  # noqa: E402
+from src.database.writer import write_queue  # noqa: E402
+from src.services import HistoryService  # noqa: E402
+
+
+def _percentile(values: list[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))] * 1000
+
+
+async def run(mode: str, path: Path, chats: int, messages: int) -> dict:
+    pragmas = sqlite_pragmas(Settings()) if mode == "tuned" else {}
+    await Tortoise.init(
+        config={
+            "connections": {
+                "default": {"engine": "tortoise.backends.sqlite", "credentials": {"file_path": str(path), **pragmas}}
+            },
+            "apps": {"models": {"models": ["src.database.models"], "default_connection": "default"}},
+        }
+    )
+    await Tortoise.generate_schemas()
+    if mode == "tuned":
+        write_queue.start()
+
+    writes: list[float] = []
+    reads: list[float] = []
+
+    async def chat(chat_id: int) -> None:
+        for i in range(messages):
+            started = time.perf_counter()
+            await HistoryService.add_message(chat_id, "user", f"message {i}", title=f"Chat {chat_id}")
+            writes.append(time.perf_counter() - started)
+            started = time.perf_counter()
+            await HistoryService.get_last_messages(chat_id, limit=10)
+            reads.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(chat(chat_id) for chat_id in range(chats)))
+    elapsed = time.perf_counter() - started
+
+    await write_queue.stop()
+    await Tortoise.close_connections()
+    return {
+        "mode": mode,
+        "messages_per_second": len(writes) / elapsed,
+        "write_p50_ms": _percentile(writes, 0.5),
+        "write_p95_ms": _percentile(writes, 0.95),
+        "read_p50_ms": _percentile(reads, 0.5),
+        "read_p95_ms": _percentile(reads, 0.95),
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chats", type=int, default=20)
+    parser.add_argument("--messages", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = [
+            await run(mode, Path(tmp) / f"{mode}.db", args.chats, args.messages) for mode in ("untuned", "tuned")
+        ]
+
+    print(f"{args.chats} chats x {args.messages} messages (current write path; pragmas and batching only)")
+    print(f"{'mode':<10}{'msg/s':>10}{'write p50':>12}{'write p95':>12}{'read p50':>12}{'read p95':>12}")
+    for r in results:
+        print(
+            f"{r['mode']:<10}{r['messages_per_second']:>10.0f}{r['write_p50_ms']:>10.2f}ms"
+            f"{r['write_p95_ms']:>10.2f}ms{r['read_p50_ms']:>10.2f}ms{r['read_p95_ms']:>10.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
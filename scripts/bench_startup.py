@@ -0,0 +1,67 @@
+"""
+Время импорта приложения и RSS процесса для разных наборов платформ.
+
+Запуск: python scripts/bench_startup.py [--runs 5]
+
+Каждый сценарий выполняется в отдельном процессе: импорт src.main (как при
+запуске приложения), затем загрузка адаптеров платформ, которые в сценарии
+считаются настроенными. «telegram» — развёртывание только с Telegram,
+«telegram+discord» — с Discord и музыкальным плеером.
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+_root = Path(__file__).resolve().parent.parent
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import src.main
+from src.bot.platforms import PLATFORMS
+from src.startup import rss_bytes
+if {discord!r}:
+    for platform in PLATFORMS:
+        platform.load()
+    from src.services import music_service
+    music_service.ytdl
+print(json.dumps({{
+    "seconds": time.perf_counter() - started,
+    "rss": rss_bytes(),
+    "modules": len(sys.modules),
+    "discord_loaded": "discord" in sys.modules,
+    "yt_dlp_loaded": "yt_dlp" in sys.modules,
+}}))
+"""
+
+
+def probe(discord: bool) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE.format(discord=discord)],
+        cwd=_root, capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'scenario':<18}{'import s':>10}{'RSS MB':>10}{'modules':>10}  discord  yt_dlp")
+    for name, discord in (("telegram", False), ("telegram+discord", True)):
+        runs = [probe(discord) for _ in range(args.runs)]
+        last = runs[-1]
+        print(
+            f"{name:<18}{statistics.median(r['seconds'] for r in runs):>10.2f}"
+            f"{statistics.median(r['rss'] for r in runs) / 1024 / 1024:>10.1f}{last['modules']:>10}"
+            f"  {str(last['discord_loaded']):<7}  {last['yt_dlp_loaded']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+import asyncio
+import sys
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(_root))
+
+load_dotenv(_root / ".env")
+
+from src.database import fulltext, sql  # noqa: E402
+from src.main import close_db, init_db  # noqa: E402
+
+
+async def main() -> None:
+    await init_db()
+    try:
+        if not sql.is_postgres():
+            print("SQLite builds its FTS5 index at startup, nothing to do.")
+            return
+        print("Building the full-text index concurrently, writes are not blocked...")
+        await fulltext.build_fulltext_index()
+        print(f"Done: {fulltext.INDEX_NAME} is ready.")
+    finally:
+        await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
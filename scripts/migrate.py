@@ -0,0 +1,53 @@
+"""
+Проверка версии схемы БД и применение поставленных миграций (быстрый старт).
+
+Запуск: python scripts/migrate.py [--check]
+
+Без флага неприменённые миграции из migrations/ применяются; если после этого
+таблиц каких-то моделей нет, скрипт завершается с ошибкой. С --check скрипт ничего не меняет и
+завершается с кодом 1, если схема не актуальна (для CI и проверок перед выкладкой).
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+import time
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(_root))
+
+load_dotenv(_root / ".env")
+
+from tortoise import Tortoise  # noqa: E402
+
+from src.database import schema  # noqa: E402
+from src.database.config import get_tortoise_config  # noqa: E402
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--check", action="store_true", help="Только проверить, не применяя миграции")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    started = time.perf_counter()
+    config = get_tortoise_config()
+    await Tortoise.init(config=config)
+    try:
+        if args.check:
+            status = await schema.get_status()
+            print(f"Schema: {status.to_dict()}")
+            return 0 if status.up_to_date else 1
+        status = await schema.ensure_schema(config)
+    finally:
+        await Tortoise.close_connections()
+    print(f"Schema check done in {time.perf_counter() - started:.2f}s: {status.to_dict()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,35 @@
+import asyncio
+import sys
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(_root))
+
+load_dotenv(_root / ".env")
+
+from src.database import partitioning, sql  # noqa: E402
+from src.main import close_db, init_db  # noqa: E402
+
+
+async def main() -> None:
+    await init_db()
+    try:
+        if not sql.is_postgres():
+            print("Partitioning is supported only on PostgreSQL.")
+            sys.exit(1)
+        partitions = await partitioning.list_partitions()
+        if partitions:
+            print(f"chat_messages is already partitioned ({len(partitions)} partitions).")
+            return
+        print("Converting chat_messages to monthly partitions, the table is locked until done...")
+        await partitioning.convert_to_partitioned()
+        partitions = await partitioning.list_partitions()
+        print(f"Done: {len(partitions)} partitions. Set POSTGRES_PARTITIONING=true to keep them maintained.")
+    finally:
+        await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -6,11 +6,12 @@ import discord
 from discord import Message
 from discord.ext import commands
 
-from config import settings
 from src.bot.discord.handlers import MessageHandler
 from src.bot.discord.music_player import MusicPlayer
 from src.bot.discord.views import MusicPlayerView, TrackSelectionView
+from src.bot.platforms import discord_token
 from src.services import music_service, SettingsService
+from src.shutdown import shutdown_drain
 
 logger = logging.getLogger("discord.bot")
 
@@ -103,11 +104,8 @@ class DiscordBot:
         else:
             logger.info("Opus already loaded.")
 
-        token = settings.DISCORD_BOT_TOKEN
-        if token:
-            token = token.strip().strip('"').strip("'")
-
-        if not token or token.lower() in ("none", "your_token_here", ""):
+        token = discord_token()
+        if token is None:
             logger.warning("Discord token не указан или имеет недопустимое значение. Discord бот не будет запущен.")
             return
 
@@ -142,6 +140,9 @@ class DiscordBot:
         Args:
             message: Входящее сообщение
         """
+        if shutdown_drain.draining:
+            # Приложение останавливается: новые сообщения не принимаются, начатые дорабатываются
+            return
         await self.bot.process_commands(message)
         await self.message_handler.handle_message(message)
 
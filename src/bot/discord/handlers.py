@@ -5,7 +5,14 @@ from discord import Message
 
 from src.database.models import AllowedChat, Setting
 from src.exceptions import ConfigurationError
-from src.services import HistoryService, LLMService
+from src.services import (
+    HistoryService,
+    LLMService,
+    Priority,
+    chat_dispatcher,
+    message_debouncer,
+    outbound_dispatcher,
+)
 
 logger = logging.getLogger("discord.handlers")
 
@@ -99,27 +106,56 @@ class MessageHandler:
 
         logger.info(f"Incoming Discord message from {message.author}: {user_text}")
 
-        async with message.channel.typing():
-            try:
-                mem_setting = await Setting.get_or_none(key="discord_memory_limit")
-                limit = int(mem_setting.value) if mem_setting else 10
-                chat_type = "private" if is_dm else "guild"
+        mem_setting = await Setting.get_or_none(key="discord_memory_limit")
+        limit = int(mem_setting.value) if mem_setting else 10
+        chat_type = "private" if is_dm else "guild"
+
+        if is_dm:
+            chat_title = f"DM: {message.author.name}"
+        else:
+            chat_title = f"{message.guild.name} / {message.channel.name}"
+
+        nickname = message.author.name
+
+        # Серия быстрых сообщений обрабатывается одной генерацией по последнему из них;
+        # сообщения серии сохраняются в историю в полосе чата перед генерацией
+        await message_debouncer.submit(
+            "discord", chat_id,
+            lambda: self._reply(message, chat_type, chat_title, limit),
+            store=lambda: HistoryService.add_message(
+                chat_id, "user", user_text,
+                platform="discord", chat_type=chat_type,
+                title=chat_title,
+                nickname=nickname
+            )
+        )
 
-                if is_dm:
-                    chat_title = f"DM: {message.author.name}"
-                else:
-                    chat_title = f"{message.guild.name} / {message.channel.name}"
+    async def _reply(self, message: Message, chat_type: str, chat_title: str, limit: int) -> None:
+        """
+        Генерация и отправка ответа LLM по текущей истории канала.
 
-                nickname = message.author.name
+        Выполняется в полосе чата (её занимает MessageDebouncer).
 
-                await HistoryService.add_message(
-                    chat_id, "user", user_text,
-                    platform="discord", chat_type=chat_type,
-                    title=chat_title,
-                    nickname=nickname
-                )
+        Args:
+            message: Последнее сообщение пользователя в серии
+            chat_type: Тип чата (private, guild)
+            chat_title: Название чата
+            limit: Размер контекста истории
+        """
+        chat_id = message.channel.id
+        is_group = chat_type != "private"
+
+        async def send(text: str, priority: Priority = Priority.NORMAL) -> None:
+            await outbound_dispatcher.send_text(
+                "discord", chat_id, text, message.channel.send,
+                priority=priority, group=is_group
+            )
+
+        async with message.channel.typing():
+            try:
                 history = await HistoryService.get_last_messages(chat_id, platform="discord", limit=limit)
-                response_text = await LLMService.generate_response(messages=history)
+                async with chat_dispatcher.generation_slot():
+                    response_text = await LLMService.generate_response(messages=history)
                 await HistoryService.add_message(
                     chat_id, "assistant", response_text,
                     platform="discord", chat_type=chat_type,
@@ -127,19 +163,15 @@ class MessageHandler:
                     nickname=None
                 )
 
-                if len(response_text) > 2000:
-                    for i in range(0, len(response_text), 2000):
-                        await message.channel.send(response_text[i:i + 2000])
-                else:
-                    await message.channel.send(response_text)
+                await send(response_text)
 
             except (ValueError, ConfigurationError) as e:
                 error_msg = str(e)
                 logger.warning(f"Configuration issue in Discord handler: {error_msg}")
                 if "Отсутствует активное соединение" in error_msg:
-                    await message.channel.send("❌ Отсутствует активное соединение с LLM API")
+                    await send("❌ Отсутствует активное соединение с LLM API", Priority.HIGH)
                 else:
-                    await message.channel.send(f"❌ Ошибка конфигурации: {error_msg}")
+                    await send(f"❌ Ошибка конфигурации: {error_msg}", Priority.HIGH)
             except Exception as e:
                 logger.error(f"Error generating response: {e}")
-                await message.channel.send("❌ Отсутствует активное соединение с LLM API или сервис недоступен")
+                await send("❌ Отсутствует активное соединение с LLM API или сервис недоступен", Priority.HIGH)
@@ -0,0 +1,106 @@
+"""
+Подключаемые платформы ботов.
+
+Адаптер платформы импортируется и запускается, только если платформа настроена:
+в развёртываниях только с Telegram discord.py (с голосовыми модулями) и yt-dlp
+не загружаются вовсе. Telegram остаётся основной платформой приложения:
+бот и диспетчер передаются в create_app и обслуживают вебхук.
+"""
+
+import asyncio
+import importlib
+import logging
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+from config import settings
+
+logger = logging.getLogger("bot.platforms")
+
+
+def discord_token() -> Optional[str]:
+    """Токен Discord без кавычек или None, если он не задан или оставлен заглушкой."""
+    token = settings.DISCORD_BOT_TOKEN
+    if token:
+        token = token.strip().strip('"').strip("'")
+    if not token or token.lower() in ("none", "your_token_here"):
+        return None
+    return token
+
+
+@dataclass(frozen=True)
+class Platform:
+    """Описание платформы: где лежит адаптер и как понять, что она настроена."""
+
+    name: str
+    module: str
+    attribute: str
+    is_configured: Callable[[], bool]
+
+    def load(self) -> Any:
+        """Импорт модуля адаптера и получение объекта с методами start() / stop()."""
+        return getattr(importlib.import_module(self.module), self.attribute)
+
+
+PLATFORMS = [
+    Platform("discord", "src.bot.discord", "discord_bot", lambda: discord_token() is not None),
+]
+
+
+class PlatformManager:
+    """Загрузка, запуск и остановка настроенных платформ."""
+
+    def __init__(self, platforms: list[Platform]):
+        self.platforms = platforms
+        self.adapters: dict[str, Any] = {}
+        self._tasks: dict[str, asyncio.Task] = {}
+
+    def start(self) -> None:
+        """Запуск настроенных платформ фоновыми задачами."""
+        for platform in self.platforms:
+            if platform.name in self.adapters:
+                continue
+            if not platform.is_configured():
+                logger.info("Платформа %s не настроена и не загружается", platform.name)
+                continue
+            try:
+                adapter = platform.load()
+            except Exception as e:
+                logger.error("Не удалось загрузить платформу %s: %s", platform.name, e, exc_info=True)
+                continue
+            self.adapters[platform.name] = adapter
+            self._tasks[platform.name] = asyncio.create_task(adapter.start(), name=f"platform-{platform.name}")
+            logger.info("Платформа %s запускается", platform.name)
+
+    async def stop(self) -> None:
+        for name, adapter in list(self.adapters.items()):
+            try:
+                await adapter.stop()
+                logger.info("Платформа %s остановлена", name)
+            except Exception as e:
+                logger.error("Ошибка при остановке платформы %s: %s", name, e)
+        for task in self._tasks.values():
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        self.adapters.clear()
+        self._tasks.clear()
+
+    def health(self) -> dict[str, str]:
+        """Состояние платформ: ok — работает, stopped — задача завершилась, disabled — не настроена."""
+        result = {}
+        for platform in self.platforms:
+            task = self._tasks.get(platform.name)
+            if task is None:
+                result[platform.name] = "disabled"
+            else:
+                result[platform.name] = "stopped" if task.done() else "ok"
+        return result
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "available": [platform.name for platform in self.platforms],
+            "loaded": list(self.adapters),
+        }
+
+
+platform_manager = PlatformManager(PLATFORMS)
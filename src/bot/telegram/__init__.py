@@ -1,4 +1,5 @@
+from src.bot.telegram.deduplication import UpdateDeduplicationMiddleware, UpdateDeduplicator
 from src.bot.telegram.handlers import router
 from src.bot.telegram.middleware import LoggingMiddleware, WhitelistMiddleware
 
-__all__ = ["router", "LoggingMiddleware", "WhitelistMiddleware",]
+__all__ = ["router", "LoggingMiddleware", "WhitelistMiddleware", "UpdateDeduplicator", "UpdateDeduplicationMiddleware",]
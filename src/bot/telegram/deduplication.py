@@ -0,0 +1,132 @@
+"""
+Дедупликация обновлений Telegram.
+
+Telegram повторно доставляет обновления при медленном или неудачном ответе
+webhook, а при перезапуске polling часть обновлений может прийти снова.
+Этот модуль отбрасывает повторы по update_id до того, как они попадут в handlers.
+Если обработка завершилась ошибкой, отметка снимается, чтобы обновление не
+считалось обработанным. Повторную доставку это само по себе не вызывает: в режиме
+webhook ответ 200 уходит до обработки (очередь обновлений), polling подтверждает
+offset независимо от результата, а ошибки отложенной генерации перехватывает
+склейка сообщений. Снятие отметки помогает, только если обновление придёт снова
+по другой причине (например, перезапуск polling до подтверждения offset) и
+ошибка произошла синхронно в handler.
+"""
+
+import logging
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import Update
+from tortoise.exceptions import IntegrityError
+
+from src.database.models import ProcessedUpdate
+
+logger = logging.getLogger("bot.telegram.deduplication")
+
+
+class UpdateDeduplicator:
+    """Идемпотентный фильтр обновлений по update_id."""
+
+    def __init__(self, window: int = 10000, use_database: bool = False):
+        """
+        Инициализация фильтра.
+
+        Args:
+            window: Сколько последних update_id помнить
+            use_database: Дополнительно фиксировать update_id в БД (для нескольких инстансов)
+        """
+        self.window = max(1, window)
+        self.use_database = use_database
+        self._seen: OrderedDict[int, None] = OrderedDict()
+        self._db_inserts = 0
+        self.duplicates = 0
+
+    def _remember(self, update_id: int) -> None:
+        """Запоминание update_id в локальном окне."""
+        self._seen[update_id] = None
+        while len(self._seen) > self.window:
+            self._seen.popitem(last=False)
+
+    async def is_duplicate(self, update_id: int) -> bool:
+        """
+        Проверка обновления с одновременной отметкой его как обработанного.
+
+        Args:
+            update_id: ID обновления Telegram
+
+        Returns:
+            True если обновление уже встречалось
+        """
+        if update_id in self._seen:
+            self.duplicates += 1
+            return True
+        self._remember(update_id)
+
+        if not self.use_database:
+            return False
+
+        try:
+            await ProcessedUpdate.create(update_id=update_id)
+        except IntegrityError:
+            self.duplicates += 1
+            return True
+
+        self._db_inserts += 1
+        if self._db_inserts % self.window == 0:
+            await ProcessedUpdate.filter(update_id__lt=update_id - self.window).delete()
+        return False
+
+    async def forget(self, update_id: int) -> None:
+        """
+        Снятие отметки с обновления, обработка которого не удалась.
+
+        Не запрашивает повторную доставку: обновление будет обработано, только если
+        Telegram пришлёт его снова (см. описание модуля).
+
+        Args:
+            update_id: ID обновления Telegram
+        """
+        self._seen.pop(update_id, None)
+        if self.use_database:
+            await ProcessedUpdate.filter(update_id=update_id).delete()
+
+
+class UpdateDeduplicationMiddleware(BaseMiddleware):
+    """Outer middleware уровня Update, отбрасывающий повторно доставленные обновления."""
+
+    def __init__(self, deduplicator: UpdateDeduplicator):
+        """
+        Инициализация middleware.
+
+        Args:
+            deduplicator: Фильтр обновлений
+        """
+        self.deduplicator = deduplicator
+
+    async def __call__(
+        self,
+        handler: Callable[[Update, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any]
+    ) -> Any:
+        """
+        Пропуск обновления дальше только при первой доставке.
+
+        Args:
+            handler: Следующий обработчик в цепочке
+            event: Входящее обновление
+            data: Дополнительные данные
+
+        Returns:
+            Результат выполнения handler или None для повторов
+        """
+        if await self.deduplicator.is_duplicate(event.update_id):
+            logger.info("Повторная доставка обновления %s, пропускаем", event.update_id)
+            return None
+        try:
+            return await handler(event, data)
+        except Exception:
+            await self.deduplicator.forget(event.update_id)
+            raise
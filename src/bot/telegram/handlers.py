@@ -8,17 +8,36 @@
 from aiogram import Router
 from aiogram.enums import ChatAction, ChatType
 from aiogram.filters import Command
-from aiogram.types import Message
+from aiogram.types import Message, MessageEntity, User
+from aiogram.utils.text_decorations import add_surrogates, remove_surrogates
 
 from config import Settings
 from src.logger import log_function
 from src.exceptions import ConfigurationError
-from src.services import HistoryService, LLMService, SettingsService
+from src.services import (
+    HistoryService,
+    LLMService,
+    Priority,
+    SettingsService,
+    chat_dispatcher,
+    message_debouncer,
+    outbound_dispatcher,
+    state_backend,
+)
 
 router = Router()
 
-_waiting_prompt: set[int] = set()
-_bot_username: str | None = None
+# Ожидание нового промпта хранится в общем состоянии: следующее сообщение
+# администратора может попасть в другую реплику
+PROMPT_WAIT_TTL = 600
+BOT_IDENTITY_KEY = "telegram:bot_identity"
+BOT_IDENTITY_TTL = 3600
+
+_bot_identity: User | None = None
+
+
+def _prompt_key(uid: int) -> str:
+    return f"telegram:waiting_prompt:{uid}"
 
 
 def _get_admin_ids() -> set[int]:
@@ -46,9 +65,19 @@ async def cmd_start(message: Message) -> None:
 
 @router.message(Command("clear"))
 async def cmd_clear(message: Message) -> None:
-    """Обработчик команды /clear для очистки истории."""
-    await HistoryService.clear_history(message.chat.id, platform="telegram")
-    await message.answer("История очищена.")
+    """
+    Обработчик команды /clear для очистки истории.
+
+    Очистка идёт фоновым заданием: она может ждать блокировку обслуживания истории,
+    а handler не должен занимать полосу чата и воркер очереди обновлений. Удаляются
+    сообщения, записанные до команды; ответ отправляется после очистки.
+    """
+    chat_id = message.chat.id
+    HistoryService.start_clear_job(
+        chat_id, "telegram",
+        up_to_id=await HistoryService.last_message_id(chat_id, "telegram"),
+        notify=lambda: message.answer("История очищена.")
+    )
 
 
 @router.message(Command("help"))
@@ -88,7 +117,7 @@ async def cmd_set_prompt(message: Message) -> None:
         await message.answer("Нет доступа.")
         return
     uid = message.from_user.id if message.from_user else 0
-    _waiting_prompt.add(uid)
+    await state_backend.set(_prompt_key(uid), True, ttl=PROMPT_WAIT_TTL)
     await message.answer(
         "Отправьте новый промпт следующим сообщением. /cancel — отмена."
     )
@@ -98,26 +127,99 @@ async def cmd_set_prompt(message: Message) -> None:
 async def cmd_cancel(message: Message) -> None:
     """Обработчик команды /cancel для отмены операции."""
     uid = message.from_user.id if message.from_user else 0
-    if uid in _waiting_prompt:
-        _waiting_prompt.discard(uid)
+    if await state_backend.pop(_prompt_key(uid)):
         await message.answer("Отменено.")
 
 
-async def _ensure_bot_username(bot) -> str:
+async def set_bot_identity(bot_user: User) -> None:
     """
-    Получение и кэширование имени пользователя бота.
-    
+    Сохранение данных бота, полученных при запуске.
+
+    Args:
+        bot_user: Результат bot.get_me()
+    """
+    global _bot_identity
+    _bot_identity = bot_user
+    await state_backend.set(BOT_IDENTITY_KEY, bot_user.model_dump(mode="json"), ttl=BOT_IDENTITY_TTL)
+
+
+async def _get_bot_identity(bot) -> User:
+    """
+    Получение закэшированных данных бота.
+
+    Обычно кэш заполняется при запуске приложения; иначе данные берутся из
+    общего состояния (их сохранила другая реплика), и только затем
+    выполняется сетевой запрос.
+
     Args:
         bot: Экземпляр бота
-        
+
     Returns:
-        Имя пользователя бота
+        Пользователь-бот
     """
-    global _bot_username
-    if _bot_username is None:
-        bot_info = await bot.get_me()
-        _bot_username = bot_info.username
-    return _bot_username
+    global _bot_identity
+    if _bot_identity is None:
+        cached = await state_backend.get(BOT_IDENTITY_KEY)
+        if cached is not None:
+            _bot_identity = User.model_validate(cached)
+        else:
+            await set_bot_identity(await bot.get_me())
+    return _bot_identity
+
+
+def _strip_entity(text: str, entity: MessageEntity) -> str:
+    """
+    Удаление фрагмента сущности из текста (смещения Telegram заданы в UTF-16).
+
+    Пробелы вокруг удалённого фрагмента схлопываются в один разделитель: перевод
+    строки сохраняется, перед знаком препинания разделитель не ставится.
+    """
+    encoded = add_surrogates(text)
+    start = entity.offset * 2
+    end = (entity.offset + entity.length) * 2
+    before = remove_surrogates(encoded[:start])
+    after = remove_surrogates(encoded[end:])
+
+    head, tail = before.rstrip(), after.lstrip()
+    gap = before[len(head):] + after[:len(after) - len(tail)]
+    if not head or not tail or not gap:
+        return head + tail
+    if "\n" in gap:
+        return head + "\n" + tail
+    if tail[0] in ",.!?;:)":
+        return head + tail
+    return head + " " + tail
+
+
+def extract_bot_mention(message: Message, bot_user: User) -> tuple[bool, str]:
+    """
+    Поиск упоминания бота по entities сообщения.
+
+    Проверяются только сущности mention (@username) и text_mention (ссылка на
+    пользователя без username), текст сообщения не сканируется и не меняет регистр.
+
+    Args:
+        message: Входящее сообщение
+        bot_user: Пользователь-бот
+
+    Returns:
+        Кортеж (упомянут ли бот, текст без упоминания)
+    """
+    text = message.text or ""
+    mention = f"@{bot_user.username}".lower() if bot_user.username else None
+
+    for entity in message.entities or ():
+        if entity.type == "mention":
+            is_bot = mention is not None and entity.extract_from(text).lower() == mention
+        elif entity.type == "text_mention":
+            is_bot = entity.user is not None and entity.user.id == bot_user.id
+        else:
+            continue
+
+        if is_bot:
+            return True, _strip_entity(text, entity).strip()
+
+    return False, text.strip()
 
 
 @router.message()
@@ -133,31 +235,23 @@ async def on_text(message: Message) -> None:
         return
 
     uid = message.from_user.id if message.from_user else 0
-    if uid in _waiting_prompt:
-        _waiting_prompt.discard(uid)
+    key = _prompt_key(uid)
+    # Сначала чтение: удаление (запись в БД) нужно только ожидающему администратору
+    if await state_backend.get(key) is not None and await state_backend.pop(key):
         await SettingsService.set_system_prompt(message.text.strip())
         await message.answer("Промпт обновлён.")
         return
 
     # === ФИЛЬТРАЦИЯ ДЛЯ ГРУПП ===
     if message.chat.type in (ChatType.GROUP, ChatType.SUPERGROUP):
-        bot_username = await _ensure_bot_username(message.bot)
-        bot_user_id = (await message.bot.get_me()).id
-
-        mentioned = False
-        replied_to_bot = False
-
-        # Проверка реплая
-        if message.reply_to_message and message.reply_to_message.from_user:
-            replied_to_bot = message.reply_to_message.from_user.id == bot_user_id
+        bot_user = await _get_bot_identity(message.bot)
 
-        # Проверка упоминания
-        mention_str = f"@{bot_username}"
-        if mention_str.lower() in message.text.lower():
-            mentioned = True
-            user_text = message.text.lower().replace(mention_str.lower(), "", 1).strip()
-        else:
-            user_text = message.text.strip()
+        replied_to_bot = bool(
+            message.reply_to_message
+            and message.reply_to_message.from_user
+            and message.reply_to_message.from_user.id == bot_user.id
+        )
+        mentioned, user_text = extract_bot_mention(message, bot_user)
 
         if not mentioned and not replied_to_bot:
             return
@@ -173,29 +267,57 @@ async def on_text(message: Message) -> None:
     chat_title = message.chat.full_name if chat_type == ChatType.PRIVATE else message.chat.title
     nickname = message.from_user.username if message.from_user and message.from_user.username else None
     
-    await HistoryService.add_message(
-        chat_id, "user", user_text, 
-        platform="telegram", chat_type=chat_type, 
-        title=chat_title,
-        nickname=nickname
+    # Серия быстрых сообщений обрабатывается одной генерацией по последнему из них;
+    # сообщения серии сохраняются в историю в полосе чата перед генерацией
+    await message_debouncer.submit(
+        "telegram", chat_id,
+        lambda: _generate_reply(message, chat_type, chat_title),
+        store=lambda: HistoryService.add_message(
+            chat_id, "user", user_text,
+            platform="telegram", chat_type=chat_type,
+            title=chat_title,
+            nickname=nickname
+        )
     )
-    
+
+
+async def _generate_reply(message: Message, chat_type: str, chat_title: str | None) -> None:
+    """
+    Генерация и отправка ответа LLM по текущей истории чата.
+
+    Выполняется в полосе чата (её занимает MessageDebouncer).
+
+    Args:
+        message: Последнее сообщение пользователя в серии
+        chat_type: Тип чата
+        chat_title: Название чата
+    """
+    chat_id = message.chat.id
+    is_group = chat_type != ChatType.PRIVATE
+
+    async def answer(text: str, priority: Priority = Priority.NORMAL) -> None:
+        await outbound_dispatcher.send_text(
+            "telegram", chat_id, text, message.answer,
+            priority=priority, group=is_group
+        )
+
     config_settings = Settings()
     last_messages = await HistoryService.get_last_messages(chat_id, limit=config_settings.HISTORY_SIZE)
 
     await message.bot.send_chat_action(chat_id=chat_id, action=ChatAction.TYPING)
 
     try:
-        reply = await LLMService.generate_response(messages=last_messages)
+        async with chat_dispatcher.generation_slot():
+            reply = await LLMService.generate_response(messages=last_messages)
     except (ValueError, ConfigurationError) as e:
         error_msg = str(e)
         if "Отсутствует активное соединение" in error_msg:
-            await message.answer("❌ Отсутствует активное соединение с LLM API")
+            await answer("❌ Отсутствует активное соединение с LLM API", Priority.HIGH)
         else:
-            await message.answer(f"❌ Ошибка конфигурации: {error_msg}")
+            await answer(f"❌ Ошибка конфигурации: {error_msg}", Priority.HIGH)
         return
     except Exception as e:
-        await message.answer("❌ Отсутствует активное соединение с LLM API или сервис недоступен")
+        await answer("❌ Отсутствует активное соединение с LLM API или сервис недоступен", Priority.HIGH)
         return
 
     await HistoryService.add_message(
@@ -204,4 +326,4 @@ async def on_text(message: Message) -> None:
         title=chat_title,
         nickname=None
     )
-    await message.answer(reply)
+    await answer(reply)
@@ -0,0 +1,187 @@
+"""
+Очередь входящих обновлений Telegram.
+
+Webhook только валидирует обновление и кладёт его в ограниченную очередь,
+а пул воркеров в фоне передаёт обновления в диспетчер aiogram. Очередь общая:
+обновление берёт любой свободный воркер, поэтому долгая обработка одного чата
+не задерживает другие. Порядок внутри чата сохраняется: пока обновление чата
+обрабатывается, следующие обновления этого чата откладываются и обрабатываются
+тем же воркером по очереди.
+"""
+
+import asyncio
+import logging
+from collections import deque
+from typing import Any
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+
+logger = logging.getLogger("bot.telegram.update_queue")
+
+
+def get_update_chat_key(update: Update) -> int:
+    """
+    Получение ключа чата для обновления.
+
+    Args:
+        update: Входящее обновление
+
+    Returns:
+        ID чата, ID пользователя или update_id, если чат определить нельзя
+    """
+    try:
+        event = update.event
+    except Exception:
+        return update.update_id
+
+    chat = getattr(event, "chat", None)
+    if chat is None:
+        message = getattr(event, "message", None)
+        chat = getattr(message, "chat", None)
+    if chat is not None:
+        return chat.id
+
+    user = getattr(event, "from_user", None) or getattr(event, "user", None)
+    if user is not None:
+        return user.id
+
+    return update.update_id
+
+
+class UpdateQueue:
+    """Ограниченная очередь обновлений Telegram с пулом фоновых воркеров."""
+
+    def __init__(
+        self,
+        bot: Bot,
+        dp: Dispatcher,
+        workers: int = 8,
+        maxsize: int = 1000,
+        enqueue_timeout: float = 1.0,
+    ):
+        """
+        Инициализация очереди.
+
+        Args:
+            bot: Экземпляр бота
+            dp: Диспетчер aiogram
+            workers: Количество воркеров
+            maxsize: Общая ёмкость очереди
+            enqueue_timeout: Сколько секунд ждать свободного места перед отказом
+        """
+        self.bot = bot
+        self.dp = dp
+        self.workers = max(1, workers)
+        self.enqueue_timeout = enqueue_timeout
+        self.maxsize = max(1, maxsize)
+        self._queue: asyncio.Queue = asyncio.Queue()
+        # Ёмкость считается от приёма до конца обработки, включая отложенные обновления
+        self._slots = asyncio.Semaphore(self.maxsize)
+        # Чаты в обработке -> отложенные обновления этих чатов
+        self._active: dict[int, deque[Update]] = {}
+        self._deferred = 0
+        self._tasks: list[asyncio.Task] = []
+        self._in_progress = 0
+        self.processed = 0
+        self.failed = 0
+        self.shed = 0
+
+    @property
+    def is_running(self) -> bool:
+        """Запущены ли воркеры."""
+        return bool(self._tasks)
+
+    @property
+    def pending(self) -> int:
+        """Количество обновлений в очереди и в обработке."""
+        return self._queue.qsize() + self._deferred + self._in_progress
+
+    def start(self) -> None:
+        """Запуск пула воркеров."""
+        if self._tasks:
+            return
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"telegram-update-worker-{i}")
+            for i in range(self.workers)
+        ]
+        logger.info("Запущено %s воркеров обработки обновлений Telegram", self.workers)
+
+    async def stop(self) -> None:
+        """Остановка воркеров. Необработанные обновления отбрасываются."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def enqueue(self, update: Update) -> bool:
+        """
+        Постановка обновления в очередь.
+
+        При заполненной очереди ждёт освобождения места не дольше enqueue_timeout.
+
+        Args:
+            update: Входящее обновление
+
+        Returns:
+            True если обновление принято, False если оно отброшено
+        """
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.enqueue_timeout)
+        except asyncio.TimeoutError:
+            self.shed += 1
+            logger.warning("Очередь обновлений переполнена, обновление %s отброшено", update.update_id)
+            return False
+        self._queue.put_nowait(update)
+        return True
+
+    async def _worker(self) -> None:
+        """Цикл воркера: обработка обновления и отложенных за время обработки обновлений того же чата."""
+        while True:
+            update = await self._queue.get()
+            key = get_update_chat_key(update)
+            backlog = self._active.get(key)
+            if backlog is not None:
+                # Чат уже обрабатывается другим воркером — он и обработает это обновление
+                backlog.append(update)
+                self._deferred += 1
+                continue
+
+            backlog = self._active[key] = deque()
+            try:
+                await self._process(update)
+                while backlog:
+                    self._deferred -= 1
+                    await self._process(backlog.popleft())
+            finally:
+                # При остановке отложенные обновления отбрасываются
+                self._deferred -= len(backlog)
+                for _ in backlog:
+                    self._slots.release()
+                del self._active[key]
+
+    async def _process(self, update: Update) -> None:
+        """Передача одного обновления в диспетчер."""
+        self._in_progress += 1
+        try:
+            await self.dp.feed_update(self.bot, update)
+            self.processed += 1
+        except Exception as e:
+            self.failed += 1
+            logger.error("Ошибка обработки обновления %s: %s", update.update_id, e, exc_info=True)
+        finally:
+            self._in_progress -= 1
+            self._slots.release()
+
+    def stats(self) -> dict[str, Any]:
+        """Метрики очереди."""
+        return {
+            "workers": self.workers,
+            "queued": self._queue.qsize() + self._deferred,
+            "in_progress": self._in_progress,
+            "capacity": self.maxsize,
+            "processed": self.processed,
+            "failed": self.failed,
+            "shed": self.shed,
+        }
+
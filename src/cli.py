@@ -0,0 +1,35 @@
+"""
+Запуск приложения по ролям.
+
+    python -m src.cli all               # все компоненты в одном процессе (как python -m src.main)
+    python -m src.cli telegram-worker   # Telegram: polling или webhook (USE_WEBHOOK)
+    python -m src.cli discord-worker    # Discord и музыкальный плеер
+    python -m src.cli admin-web         # админ-панель и её API
+    python -m src.cli maintenance       # политики хранения и архивирование по расписанию
+
+Процессы разделяют только базу данных. У каждого свой HTTP-сервер с /health
+(503, если компонент роли остановился или БД недоступна); по SIGTERM процесс
+дожидается текущих запросов (не дольше SHUTDOWN_TIMEOUT) и останавливает
+свои компоненты.
+"""
+
+import argparse
+from typing import Optional
+
+from src.main import run
+from src.web.app import ROLES
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m src.cli", description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("role", choices=list(ROLES), help="Роль процесса")
+    parser.add_argument("--host", help="Адрес HTTP-сервера (по умолчанию HOST)")
+    parser.add_argument("--port", type=int, help="Порт HTTP-сервера (по умолчанию PORT)")
+    args = parser.parse_args(argv)
+    run(args.role, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
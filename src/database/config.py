@@ -1,18 +1,65 @@
 from config import Settings
 
+
+def sqlite_pragmas(settings: Settings) -> dict:
+    """Прагмы, выполняемые при открытии соединения SQLite (профиль SQLITE_TUNING)."""
+    if not settings.SQLITE_TUNING:
+        return {}
+    return {
+        "journal_mode": "WAL",
+        "synchronous": settings.SQLITE_SYNCHRONOUS,
+        "mmap_size": settings.SQLITE_MMAP_SIZE,
+        "cache_size": settings.SQLITE_CACHE_SIZE,
+        "busy_timeout": settings.SQLITE_BUSY_TIMEOUT,
+        "temp_store": "MEMORY",
+    }
+
+
+def postgres_pool_options(settings: Settings) -> dict:
+    """Параметры пула asyncpg и его соединений."""
+    return {
+        "minsize": settings.POSTGRES_POOL_MIN_SIZE,
+        "maxsize": settings.POSTGRES_POOL_MAX_SIZE,
+        "max_inactive_connection_lifetime": settings.POSTGRES_POOL_MAX_INACTIVE_LIFETIME,
+        "max_queries": settings.POSTGRES_POOL_MAX_QUERIES,
+        "statement_cache_size": settings.POSTGRES_STATEMENT_CACHE_SIZE,
+        "command_timeout": settings.POSTGRES_COMMAND_TIMEOUT or None,
+        "application_name": settings.POSTGRES_APPLICATION_NAME,
+    }
+
+
 def get_tortoise_config() -> dict:
     settings = Settings()
     
     if settings.POSTGRES_HOST:
-        db_url = (
-            f"postgres://{settings.POSTGRES_USER}:{settings.POSTGRES_PASSWORD}"
-            f"@{settings.POSTGRES_HOST}:{settings.POSTGRES_PORT}/{settings.POSTGRES_DB}"
-        )
+        db = {
+            "engine": "src.database.pool",
+            "credentials": {
+                "host": settings.POSTGRES_HOST,
+                "port": settings.POSTGRES_PORT,
+                "user": settings.POSTGRES_USER,
+                "password": settings.POSTGRES_PASSWORD,
+                "database": settings.POSTGRES_DB,
+                **postgres_pool_options(settings),
+            },
+        }
     else:
-        db_url = f"sqlite://{settings.DATABASE_PATH}"
+        db = {
+            "engine": "tortoise.backends.sqlite",
+            "credentials": {"file_path": settings.DATABASE_PATH, **sqlite_pragmas(settings)},
+        }
     
+    connections = {"default": db}
+    if settings.POSTGRES_HOST and settings.POSTGRES_REPLICA_HOST:
+        credentials = {
+            **db["credentials"],
+            "host": settings.POSTGRES_REPLICA_HOST,
+            "port": settings.POSTGRES_REPLICA_PORT or settings.POSTGRES_PORT,
+        }
+        connections["replica"] = {"engine": db["engine"], "credentials": credentials}
+
     return {
-        "connections": {"default": db_url},
+        "connections": connections,
         "apps": {
             "models": {
                 "models": ["src.database.models", "aerich.models"],
@@ -0,0 +1,158 @@
+"""
+Полнотекстовый индекс по содержимому сообщений.
+
+Postgres: GIN-индекс по выражению to_tsvector(<config>, content). Индекс
+обновляется самой СУБД при вставке и удалении строк. Построение индекса по
+большой таблице долгое, поэтому при старте приложения только проверяется его
+наличие; строится он скриптом scripts/build_fulltext_index.py через
+CREATE INDEX CONCURRENTLY вне транзакции, не блокируя запись сообщений.
+Секционированная таблица индексируется по секциям, индексы секций подключаются
+к индексу родительской таблицы.
+
+SQLite: теневая таблица FTS5 с внешним содержимым (content='chat_messages'),
+синхронизируемая триггерами на вставку, изменение и удаление. При создании
+таблицы индекс заполняется по уже существующим сообщениям. DDL выполняется
+при старте приложения и идемпотентен.
+"""
+
+import logging
+import re
+
+from tortoise.backends.base.client import BaseDBAsyncClient
+
+from config import settings
+from src.database import sql
+
+logger = logging.getLogger("database.fulltext")
+
+FTS_TABLE = "chat_messages_fts"
+INDEX_NAME = "idx_chat_messages_content_fts"
+
+_SQLITE_DDL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        content, content='chat_messages', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON chat_messages BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, content) VALUES (new.id, new.content);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON chat_messages BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, content) VALUES ('delete', old.id, old.content);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF content ON chat_messages BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, content) VALUES ('delete', old.id, old.content);
+        INSERT INTO {FTS_TABLE}(rowid, content) VALUES (new.id, new.content);
+    END
+    """,
+]
+
+
+def get_search_config() -> str:
+    """
+    Имя конфигурации текстового поиска Postgres.
+
+    Подставляется в SQL напрямую (индекс по выражению должен совпадать с запросом),
+    поэтому допускаются только простые идентификаторы.
+    """
+    config = settings.FULLTEXT_SEARCH_CONFIG
+    if not re.fullmatch(r"[a-z_]+", config):
+        raise ValueError(f"Invalid FULLTEXT_SEARCH_CONFIG: {config}")
+    return config
+
+
+def tsvector_expression(column: str = "content") -> str:
+    """Выражение tsvector, совпадающее с выражением индекса."""
+    return f"to_tsvector('{get_search_config()}'::regconfig, {column})"
+
+
+def _index_sql(table: str, name: str, concurrently: bool = False, only: bool = False) -> str:
+    return (
+        f"CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}IF NOT EXISTS {name} "
+        f"ON {'ONLY ' if only else ''}{table} USING GIN ({tsvector_expression()})"
+    )
+
+
+async def _index_state(name: str, connection: BaseDBAsyncClient) -> bool | None:
+    """Состояние индекса Postgres: None — нет, False — не достроен (прерванный CONCURRENTLY), True — готов."""
+    rows = await sql.fetch_all(
+        "SELECT i.indisvalid AS valid FROM pg_index i "
+        "JOIN pg_class c ON c.oid = i.indexrelid JOIN pg_namespace n ON n.oid = c.relnamespace "
+        "WHERE c.relname = ? AND n.nspname = current_schema()",
+        [name],
+        connection=connection,
+    )
+    return rows[0]["valid"] if rows else None
+
+
+async def create_fulltext_index(connection: BaseDBAsyncClient) -> None:
+    """Создание индекса Postgres в текущей транзакции (таблица уже заблокирована, например при переводе на секции)."""
+    await sql.execute(_index_sql("chat_messages", INDEX_NAME), connection=connection)
+
+
+async def build_fulltext_index(connection: BaseDBAsyncClient | None = None) -> None:
+    """
+    Построение индекса Postgres без блокировки записи (CREATE INDEX CONCURRENTLY).
+
+    Выполняется вне транзакции. Недостроенные индексы прерванного запуска
+    удаляются и строятся заново.
+    """
+    connection = connection or sql.get_connection()
+
+    async def build(table: str, name: str) -> None:
+        if await _index_state(name, connection) is False:
+            await connection.execute_script(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+        await connection.execute_script(_index_sql(table, name, concurrently=True))
+
+    partitions = await sql.fetch_all(
+        "SELECT c.relname AS name FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = 'chat_messages' AND c.relkind = 'r' ORDER BY c.relname",
+        connection=connection,
+    )
+    if not partitions:
+        await build("chat_messages", INDEX_NAME)
+        return
+
+    # Секционированная таблица: CONCURRENTLY недоступен для родительской таблицы,
+    # поэтому индекс родителя создаётся пустым (ON ONLY), а индексы секций подключаются к нему
+    await sql.execute(_index_sql("chat_messages", INDEX_NAME, only=True), connection=connection)
+    for row in partitions:
+        name = f"{row['name']}_content_fts"
+        await build(row["name"], name)
+        attached = await sql.fetch_all(
+            "SELECT 1 AS one FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid WHERE c.relname = ?",
+            [name],
+            connection=connection,
+        )
+        if not attached:
+            await connection.execute_script(f"ALTER INDEX {INDEX_NAME} ATTACH PARTITION {name}")
+        logger.info("Полнотекстовый индекс секции %s построен", row["name"])
+
+
+async def ensure_fulltext_index(connection: BaseDBAsyncClient | None = None) -> None:
+    """Проверка индекса Postgres или создание индекса FTS5 SQLite, если его ещё нет."""
+    connection = connection or sql.get_connection()
+
+    if sql.is_postgres(connection):
+        if not await _index_state(INDEX_NAME, connection):
+            logger.warning(
+                "Полнотекстовый индекс %s не построен: поиск по истории читает таблицу целиком. "
+                "Постройте его без блокировки записи: python scripts/build_fulltext_index.py",
+                INDEX_NAME,
+            )
+        return
+
+    exists = await sql.fetch_all(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name = ?", [FTS_TABLE], connection=connection
+    )
+    for statement in _SQLITE_DDL:
+        await connection.execute_script(statement)
+    if not exists:
+        await connection.execute_script(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+        logger.info("Создан полнотекстовый индекс FTS5 по истории сообщений")
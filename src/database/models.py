@@ -30,6 +30,8 @@ class ChatMessage(models.Model):
 
     class Meta:
         table = "chat_messages"
+        # Индексы под постраничный просмотр переписки и переход к дате
+        indexes = (("chat_id", "platform", "id"), ("chat_id", "platform", "created_at"))
 
 class LLMConnection(models.Model):
     """Модель для хранения параметров подключения к LLM провайдерам."""
@@ -77,3 +79,118 @@ class AllowedChat(models.Model):
 
     def __str__(self) -> str:
         return f"{self.title} ({self.chat_id}) [{self.platform}]"
+
+
+class ProcessedUpdate(models.Model):
+    """Модель для хранения ID уже обработанных обновлений Telegram."""
+    update_id = fields.BigIntField(pk=True)
+    created_at = fields.DatetimeField(auto_now_add=True)
+
+    class Meta:
+        table = "processed_updates"
+
+
+class StatCounter(models.Model):
+    """Модель для хранения инкрементальных счётчиков сообщений (всего, по платформам, по ролям)."""
+    name = fields.CharField(max_length=100, pk=True)  # messages, platform:telegram, role:user
+    value = fields.BigIntField(default=0)
+
+    class Meta:
+        table = "stat_counters"
+
+
+class ChatStat(models.Model):
+    """Модель для хранения счётчиков сообщений по чатам."""
+    id = fields.IntField(pk=True)
+    chat_id = fields.BigIntField()
+    platform = fields.CharField(max_length=20, default="telegram")
+    chat_type = fields.CharField(max_length=20, default="private")
+    message_count = fields.BigIntField(default=0)
+    last_message_at = fields.DatetimeField()
+
+    class Meta:
+        table = "chat_stats"
+        unique_together = (("chat_id", "platform"),)
+        # Индексы под keyset-пагинацию списка чатов
+        indexes = (("last_message_at", "id"), ("message_count", "id"))
+
+
+class HourlyStat(models.Model):
+    """Модель для хранения количества сообщений по часам."""
+    id = fields.IntField(pk=True)
+    bucket = fields.DatetimeField(index=True)  # Начало часа (UTC)
+    platform = fields.CharField(max_length=20, default="telegram")
+    messages = fields.IntField(default=0)
+
+    class Meta:
+        table = "hourly_stats"
+        unique_together = (("bucket", "platform"),)
+
+
+class RetentionPolicy(models.Model):
+    """
+    Модель для хранения политик хранения истории.
+
+    Без platform и chat_id — глобальная политика, только с platform — политика
+    платформы, с обоими — политика чата. Незаданные поля наследуются от более
+    общей политики.
+    """
+    id = fields.IntField(pk=True)
+    platform = fields.CharField(max_length=20, null=True)
+    chat_id = fields.BigIntField(null=True)
+    max_age_days = fields.IntField(null=True)
+    max_messages = fields.IntField(null=True)
+    created_at = fields.DatetimeField(auto_now_add=True)
+
+    class Meta:
+        table = "retention_policies"
+        unique_together = (("platform", "chat_id"),)
+
+
+class ArchiveSegment(models.Model):
+    """
+    Модель манифеста архивного сегмента истории.
+
+    Сегмент — сжатый gzip JSONL-файл с сообщениями одного чата, вынесенными
+    из chat_messages. Хранит диапазон id и дат и количество сообщений по ролям,
+    чтобы читать файл только тогда, когда запрошенная страница его затрагивает.
+    """
+    id = fields.IntField(pk=True)
+    chat_id = fields.BigIntField()
+    platform = fields.CharField(max_length=20, default="telegram")
+    chat_type = fields.CharField(max_length=20, default="private")
+    path = fields.CharField(max_length=500)  # Относительно ARCHIVE_DIR
+    first_id = fields.BigIntField()
+    last_id = fields.BigIntField()
+    first_at = fields.DatetimeField()
+    last_at = fields.DatetimeField()
+    message_count = fields.IntField()
+    role_counts = fields.JSONField(default=dict)  # {"user": 10, "assistant": 9}
+    size_bytes = fields.BigIntField(default=0)
+    created_at = fields.DatetimeField(auto_now_add=True)
+
+    class Meta:
+        table = "archive_segments"
+        indexes = (("chat_id", "platform", "first_id"),)
+
+
+class StateEntry(models.Model):
+    """Модель ключа общего состояния процессов (бэкенд состояния database)."""
+    key = fields.CharField(max_length=255, pk=True)
+    value = fields.TextField()  # JSON
+    expires_at = fields.FloatField(null=True, index=True)  # Unix-время; NULL — без срока
+
+    class Meta:
+        table = "state_entries"
+
+
+class StateEvent(models.Model):
+    """Модель события pub/sub бэкенда состояния database."""
+    id = fields.BigIntField(pk=True)
+    channel = fields.CharField(max_length=255)
+    payload = fields.TextField()  # JSON
+    created_at = fields.FloatField(index=True)  # Unix-время
+
+    class Meta:
+        table = "state_events"
+        indexes = (("channel", "id"),)
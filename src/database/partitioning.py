@@ -0,0 +1,226 @@
+"""
+Помесячное секционирование chat_messages на Postgres (POSTGRES_PARTITIONING).
+
+Таблица секционируется по диапазону created_at: одна секция на календарный
+месяц (chat_messages_pYYYYMM) и секция по умолчанию для значений вне диапазонов.
+Секции на текущий и POSTGRES_PARTITION_PREMAKE_MONTHS следующих месяцев
+создаются при старте и при каждом обслуживании. Старые секции целиком
+отсоединяются или удаляются политикой хранения вместо построчных DELETE.
+
+Существующую обычную таблицу переводит скрипт scripts/partition_chat_messages.py;
+пустая таблица переводится автоматически при старте. На SQLite модуль ничего не делает.
+"""
+
+import logging
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+
+from tortoise.transactions import in_transaction
+
+from config import settings
+from src.database import sql
+from src.database.fulltext import INDEX_NAME, create_fulltext_index
+
+logger = logging.getLogger("database.partitioning")
+
+TABLE = "chat_messages"
+DEFAULT_PARTITION = f"{TABLE}_default"
+_PARTITION_NAME = re.compile(rf"^{TABLE}_p(\d{{4}})(\d{{2}})$")
+
+# Определяется при старте; используется запросами истории для отсечения секций
+_partitioned = False
+
+
+def is_partitioned() -> bool:
+    """Секционирована ли таблица сообщений (по результату последней проверки)."""
+    return _partitioned
+
+
+def month_start(dt: datetime) -> datetime:
+    """Начало месяца в UTC."""
+    dt = dt.astimezone(timezone.utc)
+    return datetime(dt.year, dt.month, 1, tzinfo=timezone.utc)
+
+
+def add_months(dt: datetime, months: int) -> datetime:
+    """Начало месяца, отстоящего от dt на months месяцев."""
+    index = dt.year * 12 + dt.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def partition_name(month: datetime) -> str:
+    return f"{TABLE}_p{month.year:04d}{month.month:02d}"
+
+
+def parse_partition_month(name: str) -> Optional[datetime]:
+    """Месяц секции по её имени (None для секции по умолчанию и посторонних таблиц)."""
+    match = _PARTITION_NAME.match(name)
+    if not match:
+        return None
+    return datetime(int(match.group(1)), int(match.group(2)), 1, tzinfo=timezone.utc)
+
+
+def create_partition_sql(month: datetime) -> str:
+    upper = add_months(month, 1)
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF {TABLE} "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')"
+    )
+
+
+async def _relkind() -> Optional[str]:
+    rows = await sql.fetch_all(
+        "SELECT c.relkind::text AS relkind FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace "
+        "WHERE c.relname = ? AND n.nspname = current_schema()",
+        [TABLE],
+    )
+    return rows[0]["relkind"] if rows else None
+
+
+async def list_partitions() -> list[dict[str, Any]]:
+    """Секции таблицы сообщений: имя и месяц (None у секции по умолчанию)."""
+    rows = await sql.fetch_all(
+        "SELECT c.relname AS name FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = ? ORDER BY c.relname",
+        [TABLE],
+    )
+    return [{"name": row["name"], "month": parse_partition_month(row["name"])} for row in rows]
+
+
+async def ensure_partitions(now: Optional[datetime] = None) -> list[str]:
+    """
+    Создание секций на текущий и следующие месяцы.
+
+    Returns:
+        Имена созданных секций
+    """
+    current = month_start(now or datetime.now(timezone.utc))
+    existing = {p["name"] for p in await list_partitions()}
+    created = []
+    for offset in range(settings.POSTGRES_PARTITION_PREMAKE_MONTHS + 1):
+        month = add_months(current, offset)
+        name = partition_name(month)
+        if name in existing:
+            continue
+        try:
+            await sql.execute(create_partition_sql(month))
+            created.append(name)
+        except Exception as e:
+            # Например, в секции по умолчанию уже есть строки этого месяца
+            logger.error("Не удалось создать секцию %s: %s", name, e)
+    if created:
+        logger.info("Созданы секции %s", ", ".join(created))
+    return created
+
+
+async def convert_to_partitioned() -> None:
+    """
+    Перевод обычной таблицы chat_messages в секционированную с переносом данных.
+
+    Выполняется в одной транзакции; на время переноса таблица заблокирована.
+    """
+    legacy = f"{TABLE}_unpartitioned"
+    async with in_transaction("default") as tx:
+        bounds = await sql.fetch_all(f"SELECT MIN(created_at) AS low FROM {TABLE}", connection=tx)
+        low = bounds[0]["low"] or datetime.now(timezone.utc)
+
+        # Имена индексов и ограничений общие для схемы — освобождаем их для новой таблицы
+        await sql.execute(f"DROP INDEX IF EXISTS {INDEX_NAME}", connection=tx)
+        await sql.execute(f"ALTER TABLE {TABLE} RENAME CONSTRAINT {TABLE}_pkey TO {legacy}_pkey", connection=tx)
+        await sql.execute(f"ALTER TABLE {TABLE} RENAME TO {legacy}", connection=tx)
+        await sql.execute(
+            f"CREATE TABLE {TABLE} (LIKE {legacy} INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)",
+            connection=tx,
+        )
+        # Ключ секционирования обязан входить в первичный ключ
+        await sql.execute(f"ALTER TABLE {TABLE} ADD PRIMARY KEY (id, created_at)", connection=tx)
+        await sql.execute(f"ALTER SEQUENCE {TABLE}_id_seq OWNED BY {TABLE}.id", connection=tx)
+        await sql.execute(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {TABLE} DEFAULT", connection=tx)
+
+        month = month_start(sql.to_datetime(low))
+        last = add_months(month_start(datetime.now(timezone.utc)), settings.POSTGRES_PARTITION_PREMAKE_MONTHS)
+        while month <= last:
+            await sql.execute(create_partition_sql(month), connection=tx)
+            month = add_months(month, 1)
+
+        for columns in ("chat_id", "chat_id, platform, id", "chat_id, platform, created_at"):
+            index = "idx_" + TABLE + "_" + columns.replace(", ", "_")
+            await sql.execute(f"CREATE INDEX IF NOT EXISTS {index}_part ON {TABLE} ({columns})", connection=tx)
+
+        await sql.execute(f"INSERT INTO {TABLE} SELECT * FROM {legacy}", connection=tx)
+        await sql.execute(f"DROP TABLE {legacy}", connection=tx)
+        await create_fulltext_index(tx)
+    logger.info("Таблица %s переведена на помесячные секции", TABLE)
+
+
+async def setup() -> None:
+    """Проверка и подготовка секционирования при старте приложения."""
+    global _partitioned
+    if not settings.POSTGRES_PARTITIONING or not sql.is_postgres():
+        _partitioned = False
+        return
+
+    kind = await _relkind()
+    if kind == "r":
+        if await sql.fetch_all(f"SELECT 1 AS one FROM {TABLE} LIMIT 1"):
+            logger.warning(
+                "POSTGRES_PARTITIONING включён, но %s — обычная таблица с данными. "
+                "Запустите scripts/partition_chat_messages.py для перевода на секции.",
+                TABLE,
+            )
+            _partitioned = False
+            return
+        await convert_to_partitioned()
+        kind = "p"
+
+    _partitioned = kind == "p"
+    if _partitioned:
+        await ensure_partitions()
+
+
+def expired_partitions(
+    partitions: list[dict[str, Any]],
+    max_age_days: Optional[int],
+    now: Optional[datetime] = None,
+) -> list[str]:
+    """
+    Секции, все сообщения которых старше max_age_days.
+
+    Args:
+        partitions: Результат list_partitions()
+        max_age_days: Максимальный возраст сообщений (None/0 — без ограничения)
+        now: Текущее время
+
+    Returns:
+        Имена секций по возрастанию месяца
+    """
+    if not max_age_days:
+        return []
+    cutoff = (now or datetime.now(timezone.utc)) - timedelta(days=max_age_days)
+    # Секция [month, month + 1) целиком старше cutoff, если её верхняя граница не позже cutoff
+    expired = [p for p in partitions if p["month"] is not None and add_months(p["month"], 1) <= cutoff]
+    return [p["name"] for p in sorted(expired, key=lambda p: p["month"])]
+
+
+async def partition_counts(name: str) -> list[dict[str, Any]]:
+    """Количество сообщений секции по чатам и ролям (для корректировки счётчиков)."""
+    return await sql.fetch_all(
+        f"SELECT chat_id, platform, role, COUNT(*) AS count FROM {name} GROUP BY chat_id, platform, role"
+    )
+
+
+async def retire_partition(name: str) -> None:
+    """
+    Отсоединение секции и, если включено POSTGRES_PARTITION_DROP, её удаление.
+
+    Выполняется в транзакции вызывающего кода, если она открыта.
+    """
+    await sql.execute(f"ALTER TABLE {TABLE} DETACH PARTITION {name}")
+    if settings.POSTGRES_PARTITION_DROP:
+        await sql.execute(f"DROP TABLE {name}")
+        logger.info("Секция %s удалена", name)
+    else:
+        logger.info("Секция %s отсоединена", name)
@@ -0,0 +1,153 @@
+"""
+Пул соединений Postgres (asyncpg) с метриками ожидания.
+
+Подключается как движок Tortoise ("engine": "src.database.pool"): клиент
+asyncpg из Tortoise, пул которого обёрнут счётчиками. Все запросы и
+транзакции Tortoise берут соединение через pool.acquire(), поэтому обёртка
+видит каждое ожидание свободного соединения.
+
+Размер пула, время жизни соединений, кэш подготовленных выражений и таймаут
+запросов задаются настройками POSTGRES_POOL_* / POSTGRES_STATEMENT_CACHE_SIZE /
+POSTGRES_COMMAND_TIMEOUT (см. get_tortoise_config).
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Optional
+
+from tortoise.backends.asyncpg.client import AsyncpgDBClient
+from tortoise.backends.base.client import BaseDBAsyncClient
+
+from src.database import sql
+
+logger = logging.getLogger("database.pool")
+
+# Ожидание дольше этого порога считается признаком нехватки соединений
+SLOW_ACQUIRE_SECONDS = 0.01
+
+
+class PoolStats:
+    """Метрики ожидания и занятости пула."""
+
+    def __init__(self, samples: int = 1000):
+        self.acquired = 0
+        self.slow_acquires = 0
+        self.waiting = 0
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self._waits: deque[float] = deque(maxlen=samples)
+
+    def record_wait(self, seconds: float) -> None:
+        self.acquired += 1
+        self.total_wait += seconds
+        self.max_wait = max(self.max_wait, seconds)
+        self._waits.append(seconds)
+        if seconds >= SLOW_ACQUIRE_SECONDS:
+            self.slow_acquires += 1
+
+    def to_dict(self, pool: Optional["InstrumentedPool"] = None) -> dict[str, Any]:
+        waits = sorted(self._waits)
+        p95 = waits[min(len(waits) - 1, int(len(waits) * 0.95))] if waits else 0.0
+        max_size = pool.get_max_size() if pool else None
+        return {
+            "size": pool.get_size() if pool else None,
+            "idle": pool.get_idle_size() if pool else None,
+            "max_size": max_size,
+            "in_use": self.in_use,
+            "peak_in_use": self.peak_in_use,
+            "waiting": self.waiting,
+            "saturation": round(self.in_use / max_size, 3) if max_size else None,
+            "acquired": self.acquired,
+            "slow_acquires": self.slow_acquires,
+            "wait_avg_ms": round(self.total_wait / self.acquired * 1000, 3) if self.acquired else None,
+            "wait_p95_ms": round(p95 * 1000, 3),
+            "wait_max_ms": round(self.max_wait * 1000, 3),
+        }
+
+
+class InstrumentedPool:
+    """Обёртка пула asyncpg, измеряющая ожидание соединения."""
+
+    def __init__(self, pool: Any, stats: PoolStats):
+        self._pool = pool
+        self.stats = stats
+
+    async def acquire(self, *, timeout: Optional[float] = None) -> Any:
+        started = time.perf_counter()
+        self.stats.waiting += 1
+        try:
+            connection = await self._pool.acquire(timeout=timeout)
+        finally:
+            self.stats.waiting -= 1
+        self.stats.record_wait(time.perf_counter() - started)
+        self.stats.in_use += 1
+        self.stats.peak_in_use = max(self.stats.peak_in_use, self.stats.in_use)
+        return connection
+
+    async def release(self, connection: Any, *, timeout: Optional[float] = None) -> None:
+        self.stats.in_use -= 1
+        await self._pool.release(connection, timeout=timeout)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._pool, name)
+
+
+pool_stats = PoolStats()
+
+
+class InstrumentedAsyncpgClient(AsyncpgDBClient):
+    """Клиент asyncpg Tortoise с инструментированным пулом."""
+
+    async def create_pool(self, **kwargs) -> InstrumentedPool:
+        pool = await super().create_pool(**kwargs)
+        logger.info("Пул Postgres создан: %s-%s соединений", kwargs.get("min_size"), kwargs.get("max_size"))
+        return InstrumentedPool(pool, pool_stats)
+
+
+client_class = InstrumentedAsyncpgClient
+
+
+def get_pool(connection: Optional[BaseDBAsyncClient] = None) -> Optional[InstrumentedPool]:
+    """Инструментированный пул соединения (None для SQLite и до создания пула)."""
+    pool = getattr(connection or sql.get_connection(), "_pool", None)
+    return pool if isinstance(pool, InstrumentedPool) else None
+
+
+async def warm_up(connection: Optional[BaseDBAsyncClient] = None) -> int:
+    """
+    Прогрев пула: создание пула и открытие минимального числа соединений.
+
+    Каждое соединение выполняет простой запрос, чтобы первые запросы
+    после старта не ждали установки соединений.
+
+    Returns:
+        Количество прогретых соединений
+    """
+    connection = connection or sql.get_connection()
+    if not sql.is_postgres(connection):
+        return 0
+    started = time.perf_counter()
+    await connection.execute_query("SELECT 1")
+    pool = get_pool(connection)
+    if pool is None:
+        return 0
+
+    count = pool.get_min_size()
+    connections = [await pool.acquire() for _ in range(count)]
+    try:
+        await asyncio.gather(*(conn.fetchval("SELECT 1") for conn in connections))
+    finally:
+        for conn in connections:
+            await pool.release(conn)
+    logger.info("Пул Postgres прогрет: %s соединений за %.0f мс", count, (time.perf_counter() - started) * 1000)
+    return count
+
+
+def stats() -> Optional[dict[str, Any]]:
+    """Метрики пула для админ-панели (None, если пул не используется)."""
+    pool = get_pool()
+    return pool_stats.to_dict(pool) if pool else None
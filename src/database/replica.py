@@ -0,0 +1,139 @@
+"""
+Маршрутизация аналитических запросов админ-панели на реплику чтения.
+
+Если настроено соединение "replica" (POSTGRES_REPLICA_HOST), тяжёлые запросы
+админ-панели (статистика, список чатов, переписка, поиск, экспорт) выполняются
+на нём, а запись сообщений ботами остаётся на основном сервере.
+
+Внутри `async with read_replica():` соединение "default" подменяется репликой
+в контексте текущей задачи — так же, как Tortoise подменяет его соединением
+транзакции, — поэтому сервисы не передают соединение явно. Отставание реплики
+проверяется не чаще раза в REPLICA_CHECK_INTERVAL секунд; при отставании больше
+REPLICA_MAX_LAG_SECONDS или ошибке проверки запросы идут на основной сервер.
+"""
+
+import functools
+import inspect
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Optional
+
+from tortoise import connections
+from tortoise.backends.base.client import BaseDBAsyncClient
+
+from config import settings
+from src.database import sql
+
+logger = logging.getLogger("database.replica")
+
+REPLICA = "replica"
+
+_LAG_SQL = (
+    "SELECT CASE WHEN NOT pg_is_in_recovery() "
+    "OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END AS lag"
+)
+
+
+class ReplicaRouter:
+    """Выбор соединения для чтения с учётом отставания реплики."""
+
+    def __init__(self):
+        self.lag: Optional[float] = None
+        self.healthy = False
+        self.checked_at = 0.0
+        self.routed = 0
+        self.fallbacks = 0
+        self.last_error: Optional[str] = None
+
+    @staticmethod
+    def is_configured() -> bool:
+        try:
+            return REPLICA in connections.db_config
+        except Exception:
+            return False
+
+    @staticmethod
+    async def measure_lag(client: BaseDBAsyncClient) -> float:
+        """Отставание реплики в секундах (0 для не-Postgres и не реплики)."""
+        if not sql.is_postgres(client):
+            return 0.0
+        rows = await sql.fetch_all(_LAG_SQL, connection=client)
+        return float(rows[0]["lag"] or 0)
+
+    async def _refresh(self, client: BaseDBAsyncClient) -> None:
+        self.checked_at = time.monotonic()
+        try:
+            self.lag = await self.measure_lag(client)
+        except Exception as e:
+            if self.healthy or self.last_error is None:
+                logger.warning("Реплика недоступна, чтение с основного сервера: %s", e)
+            self.healthy = False
+            self.lag = None
+            self.last_error = str(e)
+            return
+        healthy = self.lag <= settings.REPLICA_MAX_LAG_SECONDS
+        if healthy != self.healthy:
+            logger.info("Реплика %s (отставание %.1f с)", "используется" if healthy else "отстаёт", self.lag)
+        self.healthy = healthy
+        self.last_error = None
+
+    async def choose(self) -> Optional[BaseDBAsyncClient]:
+        """Соединение реплики или None, если читать нужно с основного сервера."""
+        if not self.is_configured():
+            return None
+        client = connections.get(REPLICA)
+        if time.monotonic() - self.checked_at >= settings.REPLICA_CHECK_INTERVAL:
+            await self._refresh(client)
+        if not self.healthy:
+            self.fallbacks += 1
+            return None
+        self.routed += 1
+        return client
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "configured": self.is_configured(),
+            "healthy": self.healthy,
+            "lag_seconds": self.lag,
+            "routed": self.routed,
+            "fallbacks": self.fallbacks,
+            "last_error": self.last_error,
+        }
+
+
+replica_router = ReplicaRouter()
+
+
+@asynccontextmanager
+async def read_replica() -> AsyncIterator[None]:
+    """Выполнение запросов блока на реплике, если она настроена и не отстаёт."""
+    client = await replica_router.choose()
+    if client is None:
+        yield
+        return
+    token = connections.set("default", client)
+    try:
+        yield
+    finally:
+        connections.reset(token)
+
+
+def on_read_replica(func: Callable) -> Callable:
+    """Декоратор: корутина или асинхронный генератор выполняется внутри read_replica()."""
+    if inspect.isasyncgenfunction(func):
+        @functools.wraps(func)
+        async def generator_wrapper(*args, **kwargs):
+            async with read_replica():
+                async for item in func(*args, **kwargs):
+                    yield item
+
+        return generator_wrapper
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        async with read_replica():
+            return await func(*args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,149 @@
+"""
+Проверка версии схемы БД при запуске.
+
+Миграции aerich создаются при разработке (`aerich migrate`) и поставляются вместе
+с кодом в каталоге migrations/. При старте список поставленных миграций одним
+запросом сравнивается с таблицей aerich; aerich загружается и применяет миграции,
+только если есть неприменённые.
+
+Модели с базой при запуске не сравниваются. Первая миграция создаёт таблицы с
+IF NOT EXISTS, поэтому применяется и к базам, созданным по моделям до поставки
+миграций. Если после проверки таблиц каких-то моделей в базе нет (модель
+изменили, а миграцию не поставили), запуск прерывается.
+"""
+
+import logging
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from tortoise import Tortoise
+from tortoise.backends.base.client import BaseDBAsyncClient
+
+from src.database import sql
+
+logger = logging.getLogger("database.schema")
+
+APP = "models"
+MIGRATIONS_LOCATION = Path(__file__).resolve().parent.parent.parent / "migrations"
+
+
+@dataclass
+class SchemaStatus:
+    """Состояние схемы относительно поставленных миграций."""
+
+    shipped: list[str]
+    applied: Optional[set[str]]  # None — таблицы aerich нет (пустая база)
+    pending: list[str] = field(default_factory=list)
+
+    @property
+    def initialized(self) -> bool:
+        return self.applied is not None
+
+    @property
+    def up_to_date(self) -> bool:
+        return self.initialized and not self.pending
+
+    def to_dict(self) -> dict:
+        return {
+            "shipped": len(self.shipped),
+            "applied": len(self.applied or ()),
+            "pending": self.pending,
+            "initialized": self.initialized,
+        }
+
+
+def shipped_migrations(location: Path = MIGRATIONS_LOCATION) -> list[str]:
+    """Файлы миграций приложения в порядке версий (как их упорядочивает aerich)."""
+    directory = location / APP
+    if not directory.is_dir():
+        return []
+    files = [
+        path.name for path in directory.glob("*.py")
+        if "_" in path.stem and path.stem.split("_")[0].isdigit()
+    ]
+    return sorted(files, key=lambda name: int(name.split("_")[0]))
+
+
+async def applied_migrations(connection: Optional[BaseDBAsyncClient] = None) -> Optional[set[str]]:
+    """Применённые миграции из таблицы aerich или None, если таблицы нет."""
+    connection = connection or sql.get_connection()
+    if sql.is_postgres(connection):
+        exists = await sql.fetch_all("SELECT to_regclass('aerich') IS NOT NULL AS found", connection=connection)
+        found = exists[0]["found"]
+    else:
+        found = bool(await sql.fetch_all(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'aerich'", connection=connection
+        ))
+    if not found:
+        return None
+    rows = await sql.fetch_all("SELECT version FROM aerich WHERE app = ?", [APP], connection=connection)
+    return {row["version"] for row in rows}
+
+
+async def get_status(
+    location: Path = MIGRATIONS_LOCATION,
+    connection: Optional[BaseDBAsyncClient] = None,
+) -> SchemaStatus:
+    """Сравнение поставленных миграций с применёнными."""
+    shipped = shipped_migrations(location)
+    applied = await applied_migrations(connection)
+    pending = [name for name in shipped if name not in (applied or set())]
+    return SchemaStatus(shipped=shipped, applied=applied, pending=pending)
+
+
+async def missing_tables(connection: Optional[BaseDBAsyncClient] = None) -> list[str]:
+    """Таблицы моделей, которых нет в базе."""
+    connection = connection or sql.get_connection()
+    if sql.is_postgres(connection):
+        rows = await sql.fetch_all(
+            "SELECT table_name AS name FROM information_schema.tables WHERE table_schema = current_schema()",
+            connection=connection,
+        )
+    else:
+        rows = await sql.fetch_all("SELECT name FROM sqlite_master WHERE type = 'table'", connection=connection)
+    existing = {row["name"] for row in rows}
+    expected = {model._meta.db_table for model in Tortoise.apps.get(APP, {}).values()}
+    return sorted(expected - existing)
+
+
+async def upgrade(config: dict, location: Path = MIGRATIONS_LOCATION) -> list[str]:
+    """
+    Применение неприменённых поставленных миграций через aerich.
+
+    Returns:
+        Применённые миграции
+    """
+    from aerich import Command
+
+    command = Command(tortoise_config=config, app=APP, location=str(location))
+    await command.init()
+    return await command.upgrade(run_in_transaction=True)
+
+
+async def ensure_schema(config: dict, location: Path = MIGRATIONS_LOCATION) -> SchemaStatus:
+    """
+    Проверка версии схемы и применение миграций, только если это нужно.
+
+    Ожидает инициализированный Tortoise. Возвращает состояние после проверки.
+    """
+    started = time.perf_counter()
+    status = await get_status(location)
+    if status.pending:
+        applied = await upgrade(config, location)
+        logger.info("Применены миграции %s за %.1f с", applied, time.perf_counter() - started)
+        status = await get_status(location)
+    else:
+        logger.info(
+            "Схема БД актуальна (%s миграций), проверка %.0f мс",
+            len(status.shipped), (time.perf_counter() - started) * 1000,
+        )
+
+    missing = await missing_tables()
+    if missing:
+        raise RuntimeError(
+            f"Database schema is behind the models, missing tables: {', '.join(missing)}; "
+            "create a migration with `aerich migrate` (MIGRATIONS_MODE=dev) and ship it in migrations/"
+        )
+    return status
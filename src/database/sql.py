@@ -0,0 +1,102 @@
+"""
+Помощники для сырых SQL-запросов поверх соединений Tortoise ORM.
+
+Запросы пишутся с плейсхолдерами `?` (как в SQLite); для Postgres они
+переписываются в `$1, $2, ...`. Символ `?` внутри строковых литералов
+не поддерживается — значения всегда передаются параметрами.
+"""
+
+import re
+from datetime import datetime, timezone
+from typing import Any, Optional, Sequence
+
+from tortoise import connections
+from tortoise.backends.base.client import BaseDBAsyncClient
+
+_PLACEHOLDER = re.compile(r"\?")
+
+
+def get_connection(name: str = "default") -> BaseDBAsyncClient:
+    """Соединение Tortoise по имени."""
+    return connections.get(name)
+
+
+def is_postgres(connection: Optional[BaseDBAsyncClient] = None) -> bool:
+    """Используется ли Postgres."""
+    connection = connection or get_connection()
+    return connection.capabilities.dialect == "postgres"
+
+
+def render(sql: str, connection: Optional[BaseDBAsyncClient] = None) -> str:
+    """Приведение плейсхолдеров к диалекту соединения."""
+    if not is_postgres(connection):
+        return sql
+    counter = iter(range(1, sql.count("?") + 1))
+    return _PLACEHOLDER.sub(lambda _: f"${next(counter)}", sql)
+
+
+async def fetch_all(
+    sql: str,
+    params: Sequence[Any] = (),
+    connection: Optional[BaseDBAsyncClient] = None,
+) -> list[dict[str, Any]]:
+    """
+    Выполнение запроса и получение строк в виде словарей.
+
+    Args:
+        sql: Запрос с плейсхолдерами `?`
+        params: Значения параметров
+        connection: Соединение (по умолчанию — default)
+
+    Returns:
+        Список строк
+    """
+    connection = connection or get_connection()
+    return await connection.execute_query_dict(render(sql, connection), list(params))
+
+
+async def fetch_tuples(
+    sql: str,
+    params: Sequence[Any] = (),
+    connection: Optional[BaseDBAsyncClient] = None,
+) -> list[tuple]:
+    """Выполнение запроса и получение строк кортежами (без построения словарей)."""
+    connection = connection or get_connection()
+    _, rows = await connection.execute_query(render(sql, connection), list(params))
+    return [tuple(row) for row in rows]
+
+
+async def execute(
+    sql: str,
+    params: Sequence[Any] = (),
+    connection: Optional[BaseDBAsyncClient] = None,
+) -> int:
+    """
+    Выполнение запроса без результата.
+
+    Returns:
+        Количество затронутых строк
+    """
+    connection = connection or get_connection()
+    rows_affected, _ = await connection.execute_query(render(sql, connection), list(params))
+    return rows_affected
+
+
+def datetime_param(value: datetime, connection: Optional[BaseDBAsyncClient] = None) -> Any:
+    """Значение даты для параметра запроса: в SQLite даты хранятся строками в UTC."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    if is_postgres(connection):
+        return value
+    return value.astimezone(timezone.utc).isoformat(" ")
+
+
+def to_datetime(value: Any) -> Optional[datetime]:
+    """Приведение значения даты из сырого запроса к datetime (SQLite возвращает строку)."""
+    if value is None or isinstance(value, datetime):
+        dt = value
+    else:
+        dt = datetime.fromisoformat(str(value))
+    if dt is not None and dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt
@@ -0,0 +1,155 @@
+"""
+Очередь записи для SQLite.
+
+SQLite допускает одного писателя на файл, а каждая операция вне транзакции
+фиксируется отдельно (со своим fsync). Очередь записи выполняет все переданные
+ей операции в одной задаче и объединяет операции, накопившиеся за
+SQLITE_WRITE_LINGER_MS, в одну транзакцию (не больше SQLITE_WRITE_BATCH).
+Вызывающий код ждёт результата своей операции как обычно.
+
+Если операция пачки падает, транзакция откатывается, и операции пачки
+повторяются по одной, чтобы ошибка досталась только её автору.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+from tortoise.transactions import in_transaction
+
+from config import settings
+
+logger = logging.getLogger("database.writer")
+
+_STOP = object()
+
+
+class WriteQueue:
+    """Единственный писатель, объединяющий операции в транзакции."""
+
+    def __init__(self, max_batch: int = 100, linger_ms: float = 2.0):
+        """
+        Инициализация.
+
+        Args:
+            max_batch: Максимум операций в одной транзакции
+            linger_ms: Сколько ждать следующих операций перед фиксацией пачки
+        """
+        self.max_batch = max_batch
+        self.linger = linger_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self.writes = 0
+        self.batches = 0
+        self.retried_batches = 0
+        self.busy_seconds = 0.0
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._loop(), name="sqlite-writer")
+
+    async def stop(self) -> None:
+        """
+        Остановка после выполнения всех уже поставленных операций.
+
+        Операции, переданные после начала остановки, выполняются сразу, без очереди.
+        """
+        if self._task is None or self._stopping:
+            return
+        self._stopping = True
+        self._queue.put_nowait(_STOP)
+        await asyncio.gather(self._task, return_exceptions=True)
+        # Писатель мог завершиться с ошибкой, не дойдя до оставшихся операций
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not _STOP:
+                await self._run([item])
+        self._task = None
+        self._queue = None
+        self._stopping = False
+
+    async def submit(self, func: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """
+        Выполнение операции записи через очередь.
+
+        Если очередь не запущена или останавливается, операция выполняется сразу.
+        """
+        if self._task is None or self._stopping:
+            return await func(*args, **kwargs)
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((func, args, kwargs, future))
+        return await future
+
+    async def _loop(self) -> None:
+        while True:
+            item = await self._queue.get()
+            if item is _STOP:
+                return
+            batch = [item]
+            if self.linger:
+                # Даём параллельным писателям поставить свои операции в ту же транзакцию
+                await asyncio.sleep(self.linger)
+            stopping = False
+            while len(batch) < self.max_batch and not self._queue.empty():
+                item = self._queue.get_nowait()
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            started = time.perf_counter()
+            await self._run(batch)
+            self.busy_seconds += time.perf_counter() - started
+            if stopping:
+                return
+
+    async def _run(self, batch: list[tuple]) -> None:
+        results = []
+        try:
+            async with in_transaction("default"):
+                for func, args, kwargs, _ in batch:
+                    results.append(await func(*args, **kwargs))
+        except Exception as e:
+            self.retried_batches += 1
+            logger.warning("Пачка записи из %s операций откатилась (%s), повтор по одной", len(batch), e)
+            for func, args, kwargs, future in batch:
+                try:
+                    async with in_transaction("default"):
+                        result = await func(*args, **kwargs)
+                except Exception as error:
+                    if not future.done():
+                        future.set_exception(error)
+                else:
+                    if not future.done():
+                        future.set_result(result)
+                self.writes += 1
+            self.batches += 1
+            return
+
+        for (_, _, _, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+        self.writes += len(batch)
+        self.batches += 1
+
+    def stats(self) -> dict[str, Any]:
+        """Метрики очереди записи."""
+        return {
+            "running": self.is_running,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "writes": self.writes,
+            "batches": self.batches,
+            "avg_batch": round(self.writes / self.batches, 2) if self.batches else None,
+            "retried_batches": self.retried_batches,
+            "busy_seconds": round(self.busy_seconds, 3),
+        }
+
+
+write_queue = WriteQueue(settings.SQLITE_WRITE_BATCH, settings.SQLITE_WRITE_LINGER_MS)
@@ -1,4 +1,8 @@
 import logging
+from typing import Optional
+
+# Импортируется первым: отсчёт времени запуска начинается здесь
+from src.startup import startup_report  # isort: skip
 
 import uvicorn
 from aiogram import Bot, Dispatcher
@@ -6,10 +10,16 @@ from aiogram.client.session.aiohttp import AiohttpSession
 from tortoise import Tortoise
 
 from config import Settings
-from src.bot.telegram import handlers, LoggingMiddleware, WhitelistMiddleware
+from src.bot.telegram import (
+    handlers,
+    LoggingMiddleware,
+    UpdateDeduplicationMiddleware,
+    UpdateDeduplicator,
+    WhitelistMiddleware,
+)
 from src.database.config import get_tortoise_config
 from src.logger import BaseLogger
-from src.web.app import create_app
+from src.web.app import ROLES, TELEGRAM, create_app
 
 
 async def init_db() -> None:
@@ -23,13 +33,8 @@ async def close_db() -> None:
     await Tortoise.close_connections()
 
 
-def main() -> None:
-    """Основная функция запуска бота."""
-    settings = Settings()
-    use_webhook = settings.USE_WEBHOOK
-    BaseLogger.setup()
-    logger = logging.getLogger("bot.startup")
-
+def create_telegram(settings: Settings) -> tuple[Bot, Dispatcher]:
+    """Создание Telegram бота и диспетчера с middleware."""
     session = None
     if settings.TELEGRAM_PROXY_URL:
         session = AiohttpSession(proxy=settings.TELEGRAM_PROXY_URL)
@@ -37,11 +42,44 @@ def main() -> None:
     bot = Bot(token=settings.BOT_TOKEN, session=session)
     dp = Dispatcher()
     dp.include_router(handlers.router)
+    deduplicator = UpdateDeduplicator(
+        window=settings.TELEGRAM_DEDUP_WINDOW,
+        use_database=settings.TELEGRAM_DEDUP_BACKEND == "database",
+    )
+    dp.update.outer_middleware(UpdateDeduplicationMiddleware(deduplicator))
     dp.message.middleware(LoggingMiddleware())
     dp.message.outer_middleware(WhitelistMiddleware())
+    return bot, dp
+
+
+def run(role: str = "all", host: Optional[str] = None, port: Optional[int] = None) -> None:
+    """
+    Запуск процесса с указанной ролью.
 
-    app = create_app(bot, dp, use_webhook=use_webhook)
-    uvicorn.run(app, host=settings.HOST, port=settings.PORT)
+    Args:
+        role: Роль из ROLES (all — все компоненты в одном процессе)
+        host: Адрес HTTP-сервера (по умолчанию HOST)
+        port: Порт HTTP-сервера (по умолчанию PORT)
+    """
+    startup_report.mark("imports")
+    settings = Settings()
+    BaseLogger.setup()
+    logging.getLogger("bot.startup").info("Запуск роли %s", role)
+
+    components = ROLES[role]
+    bot, dp = create_telegram(settings) if TELEGRAM in components else (None, None)
+    app = create_app(bot, dp, use_webhook=settings.USE_WEBHOOK, components=components, role=role)
+    uvicorn.run(
+        app,
+        host=host or settings.HOST,
+        port=port or settings.PORT,
+        timeout_graceful_shutdown=settings.SHUTDOWN_TIMEOUT or None,
+    )
+
+
+def main() -> None:
+    """Основная функция запуска бота (все компоненты в одном процессе)."""
+    run("all")
 
 
 if __name__ == "__main__":
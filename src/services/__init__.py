@@ -1,8 +1,24 @@
+from .archive_service import ArchiveService
+from .cache import StaleWhileRevalidateCache, admin_cache
+from .chat_dispatcher import ChatDispatcher, chat_dispatcher
+from .debouncer import MessageDebouncer, message_debouncer
 from .history_service import HistoryService
+from .jobs import Job, JobManager, job_manager
 from .llm_service import LLMService
+from .outbound import OutboundDispatcher, Priority, outbound_dispatcher
+from .retention_service import RetentionService, retention_scheduler
+from .search_service import SearchService
 from .settings_service import SettingsService
+from .state import INSTANCE_ID, StateBackend, state_backend
+from .stats_service import StatsService
+from .transfer_service import TransferService
 from .user_service import UserService
 from .music_service import music_service, MusicService
 
-__all__ = ["UserService", "HistoryService", "SettingsService", "LLMService", "MusicService", "music_service"]
+__all__ = ["UserService", "HistoryService", "SettingsService", "LLMService", "MusicService", "music_service",
+           "ChatDispatcher", "chat_dispatcher", "MessageDebouncer", "message_debouncer",
+           "OutboundDispatcher", "Priority", "outbound_dispatcher",
+           "StaleWhileRevalidateCache", "admin_cache", "StatsService", "SearchService",
+           "TransferService", "Job", "JobManager", "job_manager", "RetentionService", "retention_scheduler",
+           "ArchiveService", "StateBackend", "state_backend", "INSTANCE_ID"]
 
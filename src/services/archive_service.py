@@ -0,0 +1,365 @@
+"""
+Архивирование старой истории в сжатые файлы сегментов.
+
+Сообщения старше ARCHIVE_AFTER_DAYS переносятся из chat_messages в файлы
+gzip JSONL — по сегменту на каждые ARCHIVE_SEGMENT_MESSAGES сообщений чата.
+Каждый сегмент описан строкой манифеста archive_segments (диапазон id и дат,
+количество сообщений по ролям), поэтому просмотр переписки и экспорт читают
+файл только тогда, когда запрошенный диапазон его затрагивает. Распакованные
+сегменты кэшируются в памяти (ARCHIVE_CACHE_SEGMENTS).
+
+Архивные сообщения остаются частью истории: счётчики статистики их учитывают,
+а очистка истории и политики хранения удаляют и сегменты.
+"""
+
+import asyncio
+import gzip
+import json
+import logging
+import os
+from collections import Counter, OrderedDict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, AsyncIterator, Optional
+
+from tortoise.transactions import in_transaction
+
+from config import settings
+from src.database import ChatMessage, sql
+from src.database.models import ArchiveSegment, ChatStat
+from src.services.jobs import Job, job_manager
+from src.services.stats_service import StatsService
+
+logger = logging.getLogger("services.archive")
+
+JOB_KIND = "archive"
+# Общая блокировка заданий, удаляющих или переносящих сообщения
+MAINTENANCE_LOCK = "history-maintenance"
+SEGMENT_FIELDS = ["id", "chat_id", "platform", "chat_type", "role", "nickname", "content", "created_at"]
+
+
+def _archive_root() -> Path:
+    return Path(settings.ARCHIVE_DIR)
+
+
+def _write_segment(path: Path, rows: list[dict[str, Any]]) -> int:
+    """Запись сегмента во временный файл и атомарная замена. Возвращает размер файла."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with gzip.open(tmp, "wt", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps({**row, "created_at": row["created_at"].isoformat()}, ensure_ascii=False))
+            f.write("\n")
+    os.replace(tmp, path)
+    return path.stat().st_size
+
+
+def _read_segment(path: Path) -> list[dict[str, Any]]:
+    rows = []
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                row = json.loads(line)
+                row["created_at"] = sql.to_datetime(row["created_at"])
+                rows.append(row)
+    return rows
+
+
+def _remove_file(path: Path) -> None:
+    try:
+        path.unlink()
+    except FileNotFoundError:
+        pass
+
+
+class SegmentCache:
+    """LRU-кэш распакованных сегментов."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self._segments: OrderedDict[int, list[dict[str, Any]]] = OrderedDict()
+        self.hits = 0
+        self.loads = 0
+
+    async def get(self, segment: ArchiveSegment) -> list[dict[str, Any]]:
+        rows = self._segments.get(segment.id)
+        if rows is not None:
+            self._segments.move_to_end(segment.id)
+            self.hits += 1
+            return rows
+        rows = await asyncio.to_thread(_read_segment, _archive_root() / segment.path)
+        self.loads += 1
+        if self.size > 0:
+            self._segments[segment.id] = rows
+            while len(self._segments) > self.size:
+                self._segments.popitem(last=False)
+        return rows
+
+    def discard(self, segment_ids: list[int]) -> None:
+        for segment_id in segment_ids:
+            self._segments.pop(segment_id, None)
+
+    def clear(self) -> None:
+        self._segments.clear()
+
+    def stats(self) -> dict[str, Any]:
+        return {"cached": len(self._segments), "hits": self.hits, "loads": self.loads}
+
+
+segment_cache = SegmentCache(settings.ARCHIVE_CACHE_SEGMENTS)
+
+
+class ArchiveService:
+    """Сервис архива старой истории."""
+
+    @staticmethod
+    async def archive_chat(job: Optional[Job], chat_id: int, platform: str, cutoff: datetime) -> int:
+        """
+        Перенос сообщений чата старше cutoff в сегменты.
+
+        Файл сегмента пишется до транзакции, в которой создаётся строка манифеста
+        и удаляются перенесённые сообщения; при ошибке транзакции файл удаляется.
+
+        Returns:
+            Количество перенесённых сообщений
+        """
+        archived = 0
+        while True:
+            rows = await (
+                ChatMessage.filter(chat_id=chat_id, platform=platform, created_at__lt=cutoff)
+                .order_by("id")
+                .limit(settings.ARCHIVE_SEGMENT_MESSAGES)
+                .values(*SEGMENT_FIELDS)
+            )
+            if not rows:
+                return archived
+
+            first, last = rows[0], rows[-1]
+            relative = Path(platform) / str(chat_id) / f"{first['id']}-{last['id']}.jsonl.gz"
+            path = _archive_root() / relative
+            size = await asyncio.to_thread(_write_segment, path, rows)
+            ids = [row["id"] for row in rows]
+            try:
+                async with in_transaction("default"):
+                    await ArchiveSegment.create(
+                        chat_id=chat_id,
+                        platform=platform,
+                        chat_type=last["chat_type"],
+                        path=relative.as_posix(),
+                        first_id=first["id"],
+                        last_id=last["id"],
+                        first_at=min(row["created_at"] for row in rows),
+                        last_at=max(row["created_at"] for row in rows),
+                        message_count=len(rows),
+                        role_counts=dict(Counter(row["role"] for row in rows)),
+                        size_bytes=size,
+                    )
+                    for start in range(0, len(ids), settings.RETENTION_BATCH_SIZE):
+                        await ChatMessage.filter(id__in=ids[start:start + settings.RETENTION_BATCH_SIZE]).delete()
+            except Exception:
+                await asyncio.to_thread(_remove_file, path)
+                raise
+
+            archived += len(rows)
+            if job is not None:
+                job.advance(len(rows))
+            if len(rows) < settings.ARCHIVE_SEGMENT_MESSAGES:
+                return archived
+            await asyncio.sleep(settings.RETENTION_BATCH_PAUSE)
+
+    @staticmethod
+    async def archive(job: Optional[Job] = None, older_than_days: Optional[int] = None) -> int:
+        """
+        Архивирование всех чатов.
+
+        Args:
+            job: Задание для отчёта о прогрессе
+            older_than_days: Возраст сообщений (по умолчанию ARCHIVE_AFTER_DAYS)
+
+        Returns:
+            Количество перенесённых сообщений
+        """
+        days = older_than_days if older_than_days is not None else settings.ARCHIVE_AFTER_DAYS
+        if days <= 0:
+            return 0
+        cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+
+        async with job_manager.lock(MAINTENANCE_LOCK):
+            archived = 0
+            checked = 0
+            last_id = 0
+            while True:
+                chats = await ChatStat.filter(id__gt=last_id).order_by("id").limit(100)
+                if not chats:
+                    break
+                for chat in chats:
+                    archived += await ArchiveService.archive_chat(job, chat.chat_id, chat.platform, cutoff)
+                    checked += 1
+                last_id = chats[-1].id
+                if job is not None:
+                    job.message = f"Проверено чатов: {checked}, в архив перенесено: {archived}"
+
+        if archived:
+            logger.info("В архив перенесено %s сообщений (старше %s дней)", archived, days)
+        return archived
+
+    @staticmethod
+    def start_job() -> Job:
+        """Запуск архивирования фоновым заданием (если оно ещё не идёт)."""
+        return job_manager.start(JOB_KIND, ArchiveService.archive)
+
+    @staticmethod
+    async def iter_archived(
+        chat_id: int,
+        platform: str,
+        low: Optional[int] = None,
+        high: Optional[int] = None,
+        reverse: bool = False,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """
+        Архивные сообщения чата с low < id < high по возрастанию id (или убыванию при reverse).
+
+        Сегменты распаковываются по одному по мере итерации.
+        """
+        query = ArchiveSegment.filter(chat_id=chat_id, platform=platform)
+        if low is not None:
+            query = query.filter(last_id__gt=low)
+        if high is not None:
+            query = query.filter(first_id__lt=high)
+        for segment in await query.order_by("-first_id" if reverse else "first_id"):
+            rows = await segment_cache.get(segment)
+            for row in reversed(rows) if reverse else rows:
+                if (low is None or row["id"] > low) and (high is None or row["id"] < high):
+                    yield row
+
+    @staticmethod
+    async def iter_messages(
+        chat_id: Optional[int] = None,
+        platform: Optional[str] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Архивные сообщения для экспорта (фильтры как у TransferService.iter_messages)."""
+        # Даты в сегментах в UTC; дата без часового пояса считается UTC
+        date_from, date_to = sql.to_datetime(date_from), sql.to_datetime(date_to)
+        query = ArchiveSegment.all()
+        if chat_id is not None:
+            query = query.filter(chat_id=chat_id)
+        if platform:
+            query = query.filter(platform=platform)
+        if date_from is not None:
+            query = query.filter(last_at__gte=date_from)
+        if date_to is not None:
+            query = query.filter(first_at__lt=date_to)
+        for segment in await query.order_by("first_id"):
+            for row in await segment_cache.get(segment):
+                created_at = row["created_at"]
+                if (date_from is None or created_at >= date_from) and (date_to is None or created_at < date_to):
+                    yield dict(row)
+
+    @staticmethod
+    async def has_archived(
+        chat_id: int,
+        platform: str,
+        before: Optional[int] = None,
+        after: Optional[int] = None,
+    ) -> bool:
+        """Есть ли в архиве сообщения чата старше before / новее after (по манифесту)."""
+        query = ArchiveSegment.filter(chat_id=chat_id, platform=platform)
+        if before is not None:
+            query = query.filter(first_id__lt=before)
+        if after is not None:
+            query = query.filter(last_id__gt=after)
+        return await query.exists()
+
+    @staticmethod
+    async def find_id_at(chat_id: int, platform: str, at: datetime) -> Optional[int]:
+        """ID первого архивного сообщения чата не раньше at."""
+        segments = await (
+            ArchiveSegment.filter(chat_id=chat_id, platform=platform, last_at__gte=at).order_by("first_id")
+        )
+        for segment in segments:
+            for row in await segment_cache.get(segment):
+                if row["created_at"] >= at:
+                    return row["id"]
+        return None
+
+    @staticmethod
+    async def _delete_segments(segments: list[ArchiveSegment], subtract: bool = True) -> int:
+        """Удаление сегментов (манифест, файлы) с вычитанием их сообщений из счётчиков."""
+        deleted = 0
+        for segment in segments:
+            async with in_transaction("default"):
+                await segment.delete()
+                if subtract:
+                    await StatsService.subtract_messages(segment.chat_id, segment.platform, segment.role_counts)
+            await asyncio.to_thread(_remove_file, _archive_root() / segment.path)
+            deleted += segment.message_count
+        segment_cache.discard([segment.id for segment in segments])
+        return deleted
+
+    @staticmethod
+    async def purge_chat(
+        chat_id: int,
+        platform: str,
+        older_than: Optional[datetime] = None,
+        before_id: Optional[int] = None,
+    ) -> int:
+        """
+        Удаление сегментов чата, целиком вышедших за политику хранения.
+
+        Args:
+            chat_id: ID чата
+            platform: Платформа
+            older_than: Удалить сегменты, все сообщения которых старше даты
+            before_id: Удалить сегменты, все сообщения которых старше id
+
+        Returns:
+            Количество удалённых сообщений
+        """
+        query = ArchiveSegment.filter(chat_id=chat_id, platform=platform)
+        if older_than is not None:
+            query = query.filter(last_at__lt=older_than)
+        if before_id is not None:
+            query = query.filter(last_id__lt=before_id)
+        return await ArchiveService._delete_segments(await query)
+
+    @staticmethod
+    async def trim_chat(chat_id: int, platform: str, keep: int) -> int:
+        """
+        Удаление старых сегментов чата сверх keep последних архивных сообщений.
+
+        Сегменты удаляются только целиком, поэтому в архиве остаётся не меньше keep сообщений.
+
+        Returns:
+            Количество удалённых сообщений
+        """
+        segments = await ArchiveSegment.filter(chat_id=chat_id, platform=platform).order_by("-last_id")
+        kept = 0
+        for index, segment in enumerate(segments):
+            kept += segment.message_count
+            if kept >= keep:
+                return await ArchiveService._delete_segments(segments[index + 1:])
+        return 0
+
+    @staticmethod
+    async def delete_chat(chat_id: int, platform: str) -> int:
+        """Удаление всего архива чата с вычитанием из счётчиков."""
+        return await ArchiveService.purge_chat(chat_id, platform)
+
+    @staticmethod
+    async def delete_all() -> None:
+        """Удаление всего архива (счётчики сбрасываются вызывающим кодом)."""
+        await ArchiveService._delete_segments(await ArchiveSegment.all(), subtract=False)
+        segment_cache.clear()
+
+    @staticmethod
+    async def stats() -> dict[str, Any]:
+        """Сводка по архиву."""
+        segments = await ArchiveSegment.all().values_list("message_count", "size_bytes")
+        return {
+            "segments": len(segments),
+            "messages": sum(count for count, _ in segments),
+            "size_bytes": sum(size for _, size in segments),
+            "cache": segment_cache.stats(),
+        }
@@ -0,0 +1,147 @@
+"""
+Кэш снимков данных для админ-панели по схеме stale-while-revalidate.
+
+Свежий снимок отдаётся сразу. Устаревший снимок тоже отдаётся сразу, а обновление
+запускается в фоне, поэтому тяжёлые агрегаты не считаются в обработчике запроса.
+Синхронно данные загружаются только при первом обращении или если снимок устарел
+сильнее допустимого. Для каждого снимка вычисляется ETag и время последнего
+изменения, чтобы браузер мог получать 304 Not Modified.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable
+
+from config import settings
+
+logger = logging.getLogger("services.cache")
+
+
+class CacheEntry:
+    """Снимок данных с метаданными для условных HTTP-запросов."""
+
+    __slots__ = ("value", "etag", "last_modified", "fetched_at")
+
+    def __init__(self, value: Any, etag: str, last_modified: datetime, fetched_at: float):
+        self.value = value
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = fetched_at
+
+
+class StaleWhileRevalidateCache:
+    """In-memory кэш снимков с фоновым обновлением."""
+
+    def __init__(self, ttl: float = 10.0, stale_ttl: float = 300.0):
+        """
+        Инициализация кэша.
+
+        Args:
+            ttl: Сколько секунд снимок считается свежим
+            stale_ttl: Сколько секунд после этого допустимо отдавать устаревший снимок
+        """
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._entries: dict[str, CacheEntry] = {}
+        self._refreshing: dict[str, asyncio.Task] = {}
+        self._generation = 0
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _make_etag(value: Any) -> str:
+        payload = json.dumps(value, sort_keys=True, default=str, ensure_ascii=False)
+        return '"' + hashlib.sha1(payload.encode("utf-8")).hexdigest() + '"'
+
+    async def _load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> CacheEntry:
+        """Загрузка снимка и замена записи в кэше."""
+        generation = self._generation
+        value = await loader()
+        etag = self._make_etag(value)
+        previous = self._entries.get(key)
+        if previous is not None and previous.etag == etag:
+            last_modified = previous.last_modified
+        else:
+            last_modified = datetime.now(timezone.utc).replace(microsecond=0)
+        entry = CacheEntry(value, etag, last_modified, time.monotonic())
+        # Загрузка, начатая до invalidate(), могла прочитать старые данные — не сохраняем её
+        if generation == self._generation:
+            self._entries[key] = entry
+            self._purge_expired()
+        return entry
+
+    def _purge_expired(self) -> None:
+        """Удаление снимков, которые уже нельзя отдать (ключей списка чатов может быть много)."""
+        deadline = time.monotonic() - self.ttl - self.stale_ttl
+        for key in [k for k, e in self._entries.items() if e.fetched_at < deadline]:
+            del self._entries[key]
+
+    def _refresh(self, key: str, loader: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        """Запуск обновления ключа; параллельные обновления одного ключа объединяются."""
+        task = self._refreshing.get(key)
+        if task is None:
+            task = asyncio.create_task(self._load(key, loader))
+            self._refreshing[key] = task
+            task.add_done_callback(lambda t: self._on_refreshed(key, t))
+        return task
+
+    def _on_refreshed(self, key: str, task: asyncio.Task) -> None:
+        if self._refreshing.get(key) is task:
+            del self._refreshing[key]
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Не удалось обновить снимок %s: %s", key, task.exception())
+
+    async def get(self, key: str, loader: Callable[[], Awaitable[Any]]) -> CacheEntry:
+        """
+        Получение снимка.
+
+        Args:
+            key: Ключ снимка
+            loader: Корутинная функция, вычисляющая данные
+
+        Returns:
+            Запись кэша
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            age = time.monotonic() - entry.fetched_at
+            if age < self.ttl:
+                self.hits += 1
+                return entry
+            if age < self.ttl + self.stale_ttl:
+                self.stale_hits += 1
+                self._refresh(key, loader)
+                return entry
+
+        self.misses += 1
+        return await asyncio.shield(self._refresh(key, loader))
+
+    def invalidate(self, prefix: str = "") -> None:
+        """
+        Сброс снимков, ключ которых начинается с prefix (по умолчанию — всех).
+
+        Args:
+            prefix: Префикс ключа
+        """
+        self._generation += 1
+        for key in [k for k in self._entries if k.startswith(prefix)]:
+            del self._entries[key]
+        for key in [k for k in self._refreshing if k.startswith(prefix)]:
+            del self._refreshing[key]
+
+    def stats(self) -> dict[str, Any]:
+        """Метрики кэша."""
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+        }
+
+
+admin_cache = StaleWhileRevalidateCache(ttl=settings.ADMIN_CACHE_TTL, stale_ttl=settings.ADMIN_CACHE_STALE_TTL)
@@ -0,0 +1,110 @@
+"""
+Диспетчер обработки входящих сообщений.
+
+Каждый чат (платформа + ID чата) получает собственную последовательную полосу,
+поэтому запись истории, чтение контекста и генерация ответа одного чата не
+перемешиваются. Общий семафор ограничивает количество одновременных запросов к LLM.
+"""
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator
+
+from config import Settings
+
+logger = logging.getLogger("services.chat_dispatcher")
+
+
+class _Lane:
+    """Последовательная полоса одного чата."""
+
+    __slots__ = ("lock", "pending")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.pending = 0
+
+
+class ChatDispatcher:
+    """Последовательные полосы по чатам и глобальный лимит одновременных генераций."""
+
+    def __init__(self, max_concurrent_generations: int = 16):
+        """
+        Инициализация диспетчера.
+
+        Args:
+            max_concurrent_generations: Максимум одновременных запросов к LLM
+        """
+        self.max_concurrent_generations = max(1, max_concurrent_generations)
+        self._semaphore = asyncio.Semaphore(self.max_concurrent_generations)
+        self._lanes: dict[tuple[str, int], _Lane] = {}
+        self._in_flight = 0
+        self._queued = 0
+        self.completed = 0
+
+    @asynccontextmanager
+    async def lane(self, platform: str, chat_id: int) -> AsyncIterator[None]:
+        """
+        Эксклюзивный вход в полосу чата. Ожидающие обслуживаются в порядке поступления.
+
+        Args:
+            platform: Платформа (telegram, discord)
+            chat_id: ID чата
+        """
+        key = (platform, chat_id)
+        lane = self._lanes.get(key)
+        if lane is None:
+            lane = self._lanes[key] = _Lane()
+
+        lane.pending += 1
+        try:
+            async with lane.lock:
+                yield
+        finally:
+            lane.pending -= 1
+            if lane.pending == 0 and self._lanes.get(key) is lane:
+                del self._lanes[key]
+
+    @asynccontextmanager
+    async def generation_slot(self) -> AsyncIterator[None]:
+        """Слот для одного запроса к LLM в рамках глобального лимита."""
+        self._queued += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._queued -= 1
+
+        self._in_flight += 1
+        try:
+            yield
+        finally:
+            self._in_flight -= 1
+            self.completed += 1
+            self._semaphore.release()
+
+    @property
+    def in_flight(self) -> int:
+        """Количество выполняющихся генераций."""
+        return self._in_flight
+
+    @property
+    def active_lanes(self) -> int:
+        """Количество чатов, в полосах которых идёт или ожидает обработка."""
+        return len(self._lanes)
+
+    def stats(self) -> dict[str, Any]:
+        """Метрики полос и очереди генераций."""
+        depths = [lane.pending for lane in self._lanes.values()]
+        return {
+            "active_lanes": len(depths),
+            "waiting_messages": sum(depths) - len(depths),
+            "max_lane_depth": max(depths, default=0),
+            "in_flight_generations": self._in_flight,
+            "queued_generations": self._queued,
+            "max_concurrent_generations": self.max_concurrent_generations,
+            "completed_generations": self.completed,
+        }
+
+
+chat_dispatcher = ChatDispatcher(Settings().MAX_CONCURRENT_GENERATIONS)
@@ -0,0 +1,153 @@
+"""
+Склейка быстрых последовательных сообщений одного чата.
+
+Пользователи часто отправляют одну мысль несколькими короткими сообщениями.
+Генерация ответа откладывается на окно склейки: новое сообщение чата переносит
+таймер, и ответ формируется один раз — по всем сообщениям серии. Handler при
+этом не ждёт окно и сразу освобождает воркер, поэтому следующие сообщения чата
+успевают прийти.
+
+Отложенная генерация выполняется в полосе чата (ChatDispatcher.lane): сначала
+по порядку сохраняются все сообщения серии, затем вызывается callback. Поэтому
+сообщение пользователя не попадает в историю между запросом и ответом
+генерации, которая ещё идёт по предыдущей серии. Ошибка сохранения одного
+сообщения не мешает сохранить остальные и ответить на серию; генерация
+пропускается, только если не сохранилось ни одно сообщение.
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable
+
+from config import Settings
+from .chat_dispatcher import chat_dispatcher
+
+logger = logging.getLogger("services.debouncer")
+
+
+class MessageDebouncer:
+    """Окно склейки сообщений по чатам."""
+
+    def __init__(self, window: float = 0.5):
+        """
+        Инициализация.
+
+        Args:
+            window: Длительность окна в секундах (0 — склейка выключена)
+        """
+        self.window = window
+        self._timers: dict[tuple[str, int], asyncio.Task] = {}
+        self._callbacks: dict[tuple[str, int], Callable[[], Awaitable[Any]]] = {}
+        self._stores: dict[tuple[str, int], list[Callable[[], Awaitable[Any]]]] = {}
+        self._running: set[asyncio.Task] = set()
+        self.triggered = 0
+        self.merged = 0
+        self.store_failures = 0
+
+    async def submit(
+        self,
+        platform: str,
+        chat_id: int,
+        callback: Callable[[], Awaitable[Any]],
+        store: Callable[[], Awaitable[Any]] | None = None,
+    ) -> None:
+        """
+        Планирование генерации ответа для чата.
+
+        Если для чата уже запланирована генерация, она отменяется и заменяется новой.
+        При выключенной склейке генерация выполняется сразу.
+
+        Args:
+            platform: Платформа (telegram, discord)
+            chat_id: ID чата
+            callback: Корутинная функция, формирующая и отправляющая ответ
+            store: Корутинная функция, сохраняющая сообщение в историю
+        """
+        key = (platform, chat_id)
+        stores = self._stores.setdefault(key, [])
+        if store is not None:
+            stores.append(store)
+
+        if self.window <= 0:
+            del self._stores[key]
+            await self._run(key, callback, stores)
+            return
+
+        pending = self._timers.pop(key, None)
+        if pending is not None:
+            pending.cancel()
+            self.merged += 1
+
+        self._callbacks[key] = callback
+        self._timers[key] = asyncio.create_task(self._fire(key, callback))
+
+    async def _fire(self, key: tuple[str, int], callback: Callable[[], Awaitable[Any]]) -> None:
+        """Ожидание окна и запуск генерации."""
+        await asyncio.sleep(self.window)
+
+        # После окончания окна новое сообщение уже не отменяет эту генерацию
+        task = self._timers.pop(key)
+        del self._callbacks[key]
+        stores = self._stores.pop(key)
+        self._running.add(task)
+        try:
+            await self._run(key, callback, stores)
+        finally:
+            self._running.discard(task)
+
+    async def _run(
+        self,
+        key: tuple[str, int],
+        callback: Callable[[], Awaitable[Any]],
+        stores: list[Callable[[], Awaitable[Any]]],
+    ) -> None:
+        self.triggered += 1
+        try:
+            async with chat_dispatcher.lane(*key):
+                stored = 0
+                for store in stores:
+                    try:
+                        await store()
+                        stored += 1
+                    except Exception as e:
+                        self.store_failures += 1
+                        logger.error("Ошибка сохранения сообщения для %s: %s", key, e, exc_info=True)
+                if stores and not stored:
+                    return
+                await callback()
+        except Exception as e:
+            logger.error("Ошибка отложенной генерации для %s: %s", key, e, exc_info=True)
+
+    def flush(self) -> int:
+        """
+        Немедленный запуск генераций, ожидающих окончания окна (при остановке приложения).
+
+        Returns:
+            Количество запущенных генераций
+        """
+        keys = list(self._timers)
+        for key in keys:
+            self._timers.pop(key).cancel()
+            task = asyncio.create_task(self._run(key, self._callbacks.pop(key), self._stores.pop(key)))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+        return len(keys)
+
+    @property
+    def pending(self) -> int:
+        """Количество чатов, ожидающих окна, и выполняющихся отложенных генераций."""
+        return len(self._timers) + len(self._running)
+
+    def stats(self) -> dict[str, Any]:
+        """Метрики склейки."""
+        return {
+            "window_seconds": self.window,
+            "pending_chats": len(self._timers),
+            "running": len(self._running),
+            "generations_triggered": self.triggered,
+            "messages_merged": self.merged,
+            "store_failures": self.store_failures,
+        }
+
+
+message_debouncer = MessageDebouncer(Settings().MESSAGE_DEBOUNCE_SECONDS)
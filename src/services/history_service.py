@@ -1,11 +1,50 @@
+import asyncio
+import base64
+import json
+from collections import Counter
 from datetime import datetime, timedelta, timezone
-from typing import Any
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
 
-from tortoise.functions import Count, Max
+from tortoise.transactions import in_transaction
 
-from src.database import ChatMessage
+from config import settings
+from src.database import ChatMessage, partitioning, sql
+from src.database.replica import on_read_replica
+from src.database.writer import write_queue
 from src.logger import log_function
 from src.database.models import AllowedChat
+from src.services.archive_service import MAINTENANCE_LOCK, ArchiveService
+from src.services.jobs import Job, job_manager
+from src.services.stats_service import StatsService
+
+# Окно, в котором сначала ищутся последние сообщения на секционированной таблице
+RECENT_HISTORY_DAYS = 31
+
+TRANSCRIPT_FIELDS = ("id", "role", "nickname", "content", "created_at")
+
+CLEAR_JOB_KIND = "clear"
+CLEAR_ALL_JOB_KIND = "clear-all"
+
+CHAT_SORT_COLUMNS = {
+    "last_activity": "s.last_message_at",
+    "messages": "s.message_count",
+}
+
+
+def _encode_cursor(value: Any, last_id: int) -> str:
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps([value, last_id]).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[Any, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        value, last_id = json.loads(base64.urlsafe_b64decode(padded))
+        return value, int(last_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
 
 
 class HistoryService:
@@ -22,91 +61,488 @@ class HistoryService:
         title: str = None,
         nickname: str = None
     ) -> ChatMessage:
-        """Добавляет сообщение в историю и обновляет метаданные чата."""
+        """
+        Добавляет сообщение в историю и обновляет метаданные чата.
+
+        На SQLite запись идёт через очередь записи (объединение в транзакции).
+        """
+        return await write_queue.submit(
+            HistoryService._write_message, chat_id, role, content, platform, chat_type, title, nickname
+        )
+
+    @staticmethod
+    async def _write_message(
+        chat_id: int,
+        role: str,
+        content: str,
+        platform: str,
+        chat_type: str,
+        title: Optional[str],
+        nickname: Optional[str],
+    ) -> ChatMessage:
         if title:
             if chat_type == "private" and nickname:
                 if f"({nickname})" not in title:
                     title = f"{title} ({nickname})"
 
-            chat_info = await AllowedChat.get_or_none(chat_id=chat_id, platform=platform)
-            if chat_info:
-                if chat_info.title != title:
-                    chat_info.title = title
-                    await chat_info.save()
+            if settings.HISTORY_SQL_FAST_PATH:
+                await HistoryService._upsert_chat_title(chat_id, platform, title)
             else:
-                await AllowedChat.create(
+                chat_info = await AllowedChat.get_or_none(chat_id=chat_id, platform=platform)
+                if chat_info:
+                    if chat_info.title != title:
+                        chat_info.title = title
+                        await chat_info.save()
+                else:
+                    await AllowedChat.create(
+                        chat_id=chat_id,
+                        platform=platform,
+                        title=title,
+                        is_active=True
+                    )
+
+        # Сообщение и счётчики фиксируются вместе: счётчики не расходятся с таблицей при сбое
+        async with in_transaction("default"):
+            if settings.HISTORY_SQL_FAST_PATH:
+                message = await HistoryService._insert_message(chat_id, role, content, platform, chat_type, nickname)
+            else:
+                message = await ChatMessage.create(
                     chat_id=chat_id,
+                    role=role,
+                    content=content,
                     platform=platform,
-                    title=title,
-                    is_active=True
+                    chat_type=chat_type,
+                    nickname=nickname
                 )
-        
-        return await ChatMessage.create(
-            chat_id=chat_id, 
-            role=role, 
-            content=content, 
-            platform=platform, 
+            await StatsService.record_message(chat_id, platform, chat_type, role, message.created_at)
+        return message
+
+    @staticmethod
+    async def _upsert_chat_title(chat_id: int, platform: str, title: str) -> None:
+        """Создание чата или обновление его названия одним запросом (без чтения строки)."""
+        connection = sql.get_connection()
+        distinct = "IS DISTINCT FROM" if sql.is_postgres(connection) else "IS NOT"
+        await sql.execute(
+            "INSERT INTO allowed_chats (chat_id, platform, title, is_active, created_at) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (chat_id, platform) DO UPDATE SET title = excluded.title "
+            f"WHERE allowed_chats.title {distinct} excluded.title",
+            [chat_id, platform, title, True, sql.datetime_param(datetime.now(timezone.utc), connection)],
+            connection,
+        )
+
+    @staticmethod
+    async def _insert_message(
+        chat_id: int,
+        role: str,
+        content: str,
+        platform: str,
+        chat_type: str,
+        nickname: Optional[str],
+    ) -> ChatMessage:
+        """Вставка сообщения запросом с RETURNING; модель собирается из известных значений."""
+        connection = sql.get_connection()
+        created_at = datetime.now(timezone.utc)
+        rows = await sql.fetch_all(
+            "INSERT INTO chat_messages (chat_id, platform, chat_type, role, nickname, content, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?) RETURNING id",
+            [chat_id, platform, chat_type, role, nickname, content, sql.datetime_param(created_at, connection)],
+            connection,
+        )
+        message = ChatMessage(
+            id=rows[0]["id"],
+            chat_id=chat_id,
+            platform=platform,
             chat_type=chat_type,
-            nickname=nickname
+            role=role,
+            nickname=nickname,
+            content=content,
+            created_at=created_at,
         )
+        message._saved_in_db = True
+        return message
 
     @staticmethod
     @log_function
     async def get_last_messages(chat_id: int, platform: str = "telegram", limit: int = 10) -> list[dict[str, str]]:
         """Возвращает последние сообщения чата."""
-        recent_messages = (
-            await ChatMessage.filter(chat_id=chat_id, platform=platform)
-            .order_by("-created_at")
-            .limit(limit * 2)
-        )
-        recent_messages.sort(key=lambda x: x.created_at)
-        return [{"role": m.role, "content": m.content, "nickname": m.nickname} for m in recent_messages]
+        recent = None
+        if partitioning.is_partitioned():
+            # Сначала только свежие секции; полный просмотр — если там не хватило сообщений
+            since = datetime.now(timezone.utc) - timedelta(days=RECENT_HISTORY_DAYS)
+            recent = await HistoryService._recent_turns(chat_id, platform, limit * 2, since)
+            if len(recent) < limit * 2:
+                recent = None
+        if recent is None:
+            recent = await HistoryService._recent_turns(chat_id, platform, limit * 2)
+        return [{"role": role, "content": content, "nickname": nickname} for role, content, nickname in reversed(recent)]
+
+    @staticmethod
+    async def _recent_turns(
+        chat_id: int,
+        platform: str,
+        count: int,
+        since: Optional[datetime] = None,
+    ) -> list[tuple]:
+        """Последние count сообщений чата кортежами (role, content, nickname), от новых к старым."""
+        if settings.HISTORY_SQL_FAST_PATH:
+            query = "SELECT role, content, nickname FROM chat_messages WHERE chat_id = ? AND platform = ?"
+            params = [chat_id, platform]
+            if since is not None:
+                query += " AND created_at >= ?"
+                params.append(sql.datetime_param(since))
+            query += " ORDER BY created_at DESC, id DESC LIMIT ?"
+            return await sql.fetch_tuples(query, [*params, count])
+
+        query = ChatMessage.filter(chat_id=chat_id, platform=platform)
+        if since is not None:
+            query = query.filter(created_at__gte=since)
+        messages = await query.order_by("-created_at", "-id").limit(count)
+        return [(m.role, m.content, m.nickname) for m in messages]
+
+    @staticmethod
+    @on_read_replica
+    async def iter_transcript(
+        chat_id: int,
+        platform: str = "telegram",
+        limit: int = 100,
+        before: Optional[int] = None,
+        after: Optional[int] = None,
+        at: Optional[datetime] = None,
+        chunk_size: int = 200,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """
+        Постраничный просмотр переписки чата в хронологическом порядке.
+
+        Страница задаётся одним из параметров: before (сообщения старше id),
+        after (новее id) или at (начиная с первого сообщения не раньше даты).
+        Без параметров возвращается последняя страница. Строки читаются пачками
+        по индексу (chat_id, platform, id) и отдаются по мере чтения; архивные
+        сегменты распаковываются, только если страница заходит в архив.
+
+        Args:
+            chat_id: ID чата
+            platform: Платформа
+            limit: Размер страницы
+            before: Курсор «раньше» (ID сообщения)
+            after: Курсор «позже» (ID сообщения)
+            at: Дата для перехода
+            chunk_size: Размер пачки при чтении из БД
+
+        Yields:
+            Сообщения страницы
+
+        Raises:
+            ValueError: Указано больше одного курсора
+        """
+        if sum(x is not None for x in (before, after, at)) > 1:
+            raise ValueError("Only one of before, after, at may be given")
+
+        query = ChatMessage.filter(chat_id=chat_id, platform=platform)
+        low, high = after, before
+        # Архивные сообщения старше сообщений таблицы; сегменты читаются, только если страница до них доходит
+        archived = await ArchiveService.has_archived(chat_id, platform)
+        if at is not None:
+            first_id = await ArchiveService.find_id_at(chat_id, platform, at) if archived else None
+            if first_id is None:
+                first_id = await query.filter(created_at__gte=at).order_by("id").first().values_list("id", flat=True)
+            if first_id is None:
+                return
+            low = first_id - 1
+        elif after is None:
+            # Нижняя граница страницы, заканчивающейся перед before (или последней страницы)
+            boundary = query.filter(id__lt=high) if high is not None else query
+            start_ids = await boundary.order_by("-id").offset(limit - 1).limit(1).values_list("id", flat=True)
+            low = start_ids[0] - 1 if start_ids else None
+            if low is None and archived:
+                # В таблице меньше limit сообщений — начало страницы в архиве
+                need = limit - await boundary.count()
+                tail = []
+                async for row in ArchiveService.iter_archived(chat_id, platform, high=high, reverse=True):
+                    tail.append(row)
+                    if len(tail) >= need:
+                        break
+                if tail:
+                    low = tail[-1]["id"] - 1
+
+        remaining = limit
+        if archived:
+            async for row in ArchiveService.iter_archived(chat_id, platform, low=low, high=high):
+                yield {field: row[field] for field in TRANSCRIPT_FIELDS}
+                low = row["id"]
+                remaining -= 1
+                if remaining <= 0:
+                    return
+        while remaining > 0:
+            chunk = query
+            if low is not None:
+                chunk = chunk.filter(id__gt=low)
+            if high is not None:
+                chunk = chunk.filter(id__lt=high)
+            rows = await (
+                chunk.order_by("id")
+                .limit(min(chunk_size, remaining))
+                .values(*TRANSCRIPT_FIELDS)
+            )
+            for row in rows:
+                yield row
+            if len(rows) < min(chunk_size, remaining):
+                return
+            remaining -= len(rows)
+            low = rows[-1]["id"]
+
+    @staticmethod
+    @on_read_replica
+    async def has_messages(
+        chat_id: int,
+        platform: str = "telegram",
+        before: Optional[int] = None,
+        after: Optional[int] = None,
+    ) -> bool:
+        """Есть ли в чате сообщения старше before / новее after."""
+        query = ChatMessage.filter(chat_id=chat_id, platform=platform)
+        if before is not None:
+            query = query.filter(id__lt=before)
+        if after is not None:
+            query = query.filter(id__gt=after)
+        return await query.exists() or await ArchiveService.has_archived(chat_id, platform, before, after)
+
+    @staticmethod
+    async def delete_messages(job: Optional[Job], chat_id: int, platform: str, **filters) -> int:
+        """
+        Удаление сообщений чата пачками по первичному ключу с вычитанием из счётчиков.
+
+        Между пачками делается пауза, чтобы не удерживать блокировки и не мешать
+        записи новых сообщений.
+
+        Returns:
+            Количество удалённых сообщений
+        """
+        deleted = 0
+        while True:
+            rows = await (
+                ChatMessage.filter(chat_id=chat_id, platform=platform, **filters)
+                .order_by("id")
+                .limit(settings.RETENTION_BATCH_SIZE)
+                .values_list("id", "role")
+            )
+            if not rows:
+                return deleted
+            async with in_transaction("default"):
+                await ChatMessage.filter(id__in=[row[0] for row in rows]).delete()
+                await StatsService.subtract_messages(chat_id, platform, Counter(role for _, role in rows))
+            deleted += len(rows)
+            if job is not None:
+                job.advance(len(rows))
+            if len(rows) < settings.RETENTION_BATCH_SIZE:
+                return deleted
+            await asyncio.sleep(settings.RETENTION_BATCH_PAUSE)
 
     @staticmethod
     @log_function
-    async def clear_history(chat_id: int, platform: str = "telegram") -> None:
-        """Очищает историю конкретного чата."""
-        await ChatMessage.filter(chat_id=chat_id, platform=platform).delete()
+    async def clear_history(
+        chat_id: int,
+        platform: str = "telegram",
+        job: Optional[Job] = None,
+        up_to_id: Optional[int] = None,
+    ) -> int:
+        """
+        Очищает историю конкретного чата (вместе с архивом).
+
+        Удаляются сообщения, записанные до начала очистки; пришедшие во время
+        неё остаются в истории и в счётчиках.
+
+        Args:
+            up_to_id: Удалить сообщения с id не больше этого (по умолчанию — последнее
+                сообщение чата на момент начала очистки)
+
+        Returns:
+            Количество удалённых сообщений
+        """
+        async with job_manager.lock(MAINTENANCE_LOCK):
+            high = up_to_id if up_to_id is not None else await HistoryService.last_message_id(chat_id, platform)
+            deleted = 0
+            if high is not None:
+                deleted += await HistoryService.delete_messages(job, chat_id, platform, id__lte=high)
+            deleted += await ArchiveService.delete_chat(chat_id, platform)
+        return deleted
+
+    @staticmethod
+    async def clear_all_history(job: Optional[Job] = None) -> None:
+        """
+        Очищает всю историю сообщений.
+
+        На Postgres таблица очищается через TRUNCATE (без построчного удаления и
+        раздувания таблицы), на SQLite — пачками с паузами, чтобы запись новых
+        сообщений не ждала одну длинную транзакцию. Счётчики затем пересчитываются
+        по оставшимся строкам.
+        """
+        async with job_manager.lock(MAINTENANCE_LOCK):
+            await ArchiveService.delete_all()
+            if sql.is_postgres():
+                await sql.execute("TRUNCATE chat_messages")
+                if job is not None:
+                    job.message = "Таблица сообщений очищена"
+            else:
+                high = await ChatMessage.all().order_by("-id").first().values_list("id", flat=True)
+                while high is not None:
+                    ids = await (
+                        ChatMessage.filter(id__lte=high)
+                        .order_by("id")
+                        .limit(settings.RETENTION_BATCH_SIZE)
+                        .values_list("id", flat=True)
+                    )
+                    if not ids:
+                        break
+                    await ChatMessage.filter(id__in=ids).delete()
+                    if job is not None:
+                        job.advance(len(ids))
+                    await asyncio.sleep(settings.RETENTION_BATCH_PAUSE)
+            await StatsService.rebuild()
 
     @staticmethod
-    async def clear_all_history() -> None:
-        """Очищает всю историю сообщений."""
-        await ChatMessage.all().delete()
+    async def last_message_id(chat_id: int, platform: str = "telegram") -> Optional[int]:
+        """ID последнего сообщения чата или None, если сообщений нет."""
+        return await (
+            ChatMessage.filter(chat_id=chat_id, platform=platform)
+            .order_by("-id")
+            .first()
+            .values_list("id", flat=True)
+        )
+
+    @staticmethod
+    def start_clear_job(
+        chat_id: int,
+        platform: str = "telegram",
+        up_to_id: Optional[int] = None,
+        notify: Optional[Callable[[], Awaitable[Any]]] = None,
+    ) -> Job:
+        """
+        Запуск очистки чата фоновым заданием (если для этого чата оно ещё не идёт).
+
+        Args:
+            chat_id: ID чата
+            platform: Платформа
+            up_to_id: Граница очистки (см. clear_history)
+            notify: Корутинная функция, вызываемая после успешной очистки
+        """
+        params = {"chat_id": chat_id, "platform": platform}
+        for job in job_manager.list():
+            if job.kind == CLEAR_JOB_KIND and job.is_active and job.params == params:
+                return job
+
+        async def run(job: Job) -> None:
+            await HistoryService.clear_history(chat_id, platform, job=job, up_to_id=up_to_id)
+            if notify is not None:
+                await notify()
+
+        return job_manager.start(CLEAR_JOB_KIND, run, params, exclusive=False)
+
+    @staticmethod
+    def start_clear_all_job() -> Job:
+        """Запуск очистки всей истории фоновым заданием (если оно ещё не идёт)."""
+        return job_manager.start(CLEAR_ALL_JOB_KIND, HistoryService.clear_all_history)
 
     @staticmethod
     async def get_stats() -> dict[str, Any]:
-        """Возвращает статистику по сообщениям."""
-        now = datetime.now(timezone.utc)
-        last_24h = now - timedelta(days=1)
-        total_messages = await ChatMessage.all().count()
-        chats_count = len(await ChatMessage.all().distinct().values_list("chat_id", flat=True))
-        tg_stats = await ChatMessage.filter(platform="telegram").count()
-        dc_stats = await ChatMessage.filter(platform="discord").count()
-        messages_24h = await ChatMessage.filter(created_at__gte=last_24h).count()
-        active_chats_24h = len(await ChatMessage.filter(created_at__gte=last_24h).distinct().values_list("chat_id", flat=True))
-        assistant_messages = await ChatMessage.filter(role="assistant").count()
-        user_messages = await ChatMessage.filter(role="user").count()
-
-        return {
-            "chats_count": chats_count, 
-            "total_messages": total_messages,
-            "telegram_messages": tg_stats,
-            "discord_messages": dc_stats,
-            "messages_24h": messages_24h,
-            "active_chats_24h": active_chats_24h,
-            "assistant_messages": assistant_messages,
-            "user_messages": user_messages
-        }
-
-    @staticmethod
-    async def list_chats() -> list[dict[str, Any]]:
-        """Возвращает список чатов с количеством сообщений и метаданными."""
-        stats = (
-            await ChatMessage.annotate(
-                message_count=Count("id"),
-                last_message_at=Max("created_at")
+        """Возвращает статистику по сообщениям (из инкрементальных счётчиков)."""
+        return await StatsService.get_summary()
+
+    @staticmethod
+    @on_read_replica
+    async def list_chats(
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        sort: str = "last_activity",
+        order: str = "desc",
+        platform: Optional[str] = None,
+        whitelisted: Optional[bool] = None,
+        search: Optional[str] = None,
+    ) -> dict[str, Any]:
+        """
+        Возвращает страницу чатов с количеством сообщений и данными белого списка.
+
+        Один запрос: счётчики chat_stats, присоединённые к allowed_chats,
+        с keyset-пагинацией по (поле сортировки, id).
+
+        Args:
+            limit: Размер страницы
+            cursor: Курсор следующей страницы из предыдущего ответа
+            sort: Поле сортировки (last_activity, messages)
+            order: Направление (desc, asc)
+            platform: Фильтр по платформе
+            whitelisted: Фильтр по наличию в активном белом списке
+            search: Поиск по названию или ID чата
+
+        Returns:
+            {"items": [...], "next_cursor": str | None}
+
+        Raises:
+            ValueError: Некорректные сортировка, направление или курсор
+        """
+        if sort not in CHAT_SORT_COLUMNS:
+            raise ValueError(f"Unknown sort: {sort}")
+        if order not in ("asc", "desc"):
+            raise ValueError(f"Unknown order: {order}")
+        column = CHAT_SORT_COLUMNS[sort]
+        direction = "DESC" if order == "desc" else "ASC"
+
+        conditions = []
+        params: list[Any] = []
+        if platform:
+            conditions.append("s.platform = ?")
+            params.append(platform)
+        if whitelisted is True:
+            conditions.append("a.is_active = ?")
+            params.append(True)
+        elif whitelisted is False:
+            conditions.append("(a.id IS NULL OR a.is_active = ?)")
+            params.append(False)
+        if search:
+            # % и _ в строке поиска — обычные символы, а не шаблоны LIKE
+            escaped = search.lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            pattern = f"%{escaped}%"
+            conditions.append(
+                "(LOWER(a.title) LIKE ? ESCAPE '\\' OR CAST(s.chat_id AS TEXT) LIKE ? ESCAPE '\\')"
             )
-            .group_by("chat_id", "platform", "chat_type")
-            .values("chat_id", "platform", "chat_type", "message_count", "last_message_at")
+            params.extend([pattern, pattern])
+        if cursor:
+            value, last_id = _decode_cursor(cursor)
+            if sort == "last_activity" and sql.is_postgres():
+                value = sql.to_datetime(value)
+            conditions.append(f"({column}, s.id) {'<' if order == 'desc' else '>'} (?, ?)")
+            params.extend([value, last_id])
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        rows = await sql.fetch_all(
+            f"""
+            SELECT s.id, s.chat_id, s.platform, s.chat_type, s.message_count, s.last_message_at,
+                   a.title AS title, a.is_active AS is_active
+            FROM chat_stats s
+            LEFT JOIN allowed_chats a ON a.chat_id = s.chat_id AND a.platform = s.platform
+            {where}
+            ORDER BY {column} {direction}, s.id {direction}
+            LIMIT ?
+            """,
+            [*params, limit + 1],
         )
-        return list(stats)
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            sort_value = last["last_message_at"] if sort == "last_activity" else last["message_count"]
+            next_cursor = _encode_cursor(sort_value, last["id"])
+
+        items = [
+            {
+                "chat_id": row["chat_id"],
+                "platform": row["platform"],
+                "chat_type": row["chat_type"],
+                "message_count": row["message_count"],
+                "last_message_at": sql.to_datetime(row["last_message_at"]),
+                "title": row["title"] if row["title"] is not None else f"Chat {row['chat_id']}",
+                "is_allowed": bool(row["is_active"]),
+            }
+            for row in rows
+        ]
+        return {"items": items, "next_cursor": next_cursor}
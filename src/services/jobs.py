@@ -0,0 +1,250 @@
+"""
+Фоновые задания обслуживания (очистка истории, применение политик хранения и т.п.).
+
+Задание выполняется отдельной asyncio-задачей и сообщает прогресс через объект Job,
+поэтому админ-панель может запустить длительную операцию и опрашивать её состояние,
+не удерживая HTTP-запрос.
+
+Именованные блокировки заданий общие для всех процессов приложения: они хранятся
+в бэкенде состояния (STATE_BACKEND=database при нескольких процессах), поэтому
+обслуживание истории не выполняется одновременно на разных репликах.
+"""
+
+import asyncio
+import itertools
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional
+
+from src.services import state
+
+logger = logging.getLogger("services.jobs")
+
+
+class Job:
+    """Состояние фонового задания."""
+
+    def __init__(self, job_id: int, kind: str, params: Optional[dict[str, Any]] = None):
+        self.id = job_id
+        self.kind = kind
+        self.params = params or {}
+        self.status = "pending"  # pending, running, done, failed, cancelled
+        self.processed = 0
+        self.total: Optional[int] = None
+        self.message = ""
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def is_active(self) -> bool:
+        return self.status in ("pending", "running")
+
+    def advance(self, count: int = 1, message: Optional[str] = None) -> None:
+        """Учёт обработанных элементов."""
+        self.processed += count
+        if message is not None:
+            self.message = message
+
+    def to_dict(self) -> dict[str, Any]:
+        end = self.finished_at or time.time()
+        elapsed = end - self.started_at if self.started_at else 0.0
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "params": self.params,
+            "status": self.status,
+            "processed": self.processed,
+            "total": self.total,
+            "message": self.message,
+            "error": self.error,
+            "elapsed_seconds": round(elapsed, 3),
+            "rate_per_second": round(self.processed / elapsed, 1) if elapsed > 0 else None,
+        }
+
+
+class SharedLock:
+    """
+    Блокировка, общая для процессов приложения.
+
+    Внутри процесса — asyncio.Lock, между процессами — ключ бэкенда состояния,
+    захваченный через set(only_if_absent=True). Пока блокировка удерживается,
+    срок ключа продлевается; ключ упавшего процесса освобождается по истечении TTL.
+    """
+
+    # Срок ключа и пауза между попытками захвата, секунды
+    TTL = 60.0
+    RETRY_INTERVAL = 0.5
+
+    _tokens = itertools.count(1)
+
+    def __init__(self, name: str):
+        self.name = name
+        self.key = f"lock:{name}"
+        self._local = asyncio.Lock()
+        self._token: Optional[str] = None
+        self._renewal: Optional[asyncio.Task] = None
+
+    def locked(self) -> bool:
+        return self._local.locked()
+
+    async def __aenter__(self) -> "SharedLock":
+        await self._local.acquire()
+        token = f"{state.INSTANCE_ID}:{next(self._tokens)}"
+        try:
+            while not await state.state_backend.set(self.key, token, ttl=self.TTL, only_if_absent=True):
+                await asyncio.sleep(self.RETRY_INTERVAL)
+        except BaseException:
+            self._local.release()
+            raise
+        self._token = token
+        self._renewal = asyncio.create_task(self._renew(token), name=f"lock-{self.name}")
+        return self
+
+    async def _renew(self, token: str) -> None:
+        """Продление срока ключа, пока блокировка удерживается."""
+        while True:
+            await asyncio.sleep(self.TTL / 3)
+            try:
+                if await state.state_backend.get(self.key) != token:
+                    logger.warning("Блокировка %s потеряна: срок ключа истёк", self.name)
+                    return
+                await state.state_backend.set(self.key, token, ttl=self.TTL)
+            except Exception as e:
+                logger.error("Не удалось продлить блокировку %s: %s", self.name, e)
+
+    async def __aexit__(self, *exc_info) -> None:
+        self._renewal.cancel()
+        try:
+            await state.state_backend.compare_and_delete(self.key, self._token)
+        except Exception as e:
+            logger.error("Не удалось освободить блокировку %s: %s", self.name, e)
+        finally:
+            self._token = None
+            self._renewal = None
+            self._local.release()
+
+
+class JobManager:
+    """Реестр фоновых заданий с ограниченной историей завершённых."""
+
+    def __init__(self, history: int = 50):
+        """
+        Инициализация.
+
+        Args:
+            history: Сколько заданий хранить в реестре
+        """
+        self.history = history
+        self._jobs: OrderedDict[int, Job] = OrderedDict()
+        self._ids = itertools.count(1)
+        self._locks: dict[str, SharedLock] = {}
+
+    def start(
+        self,
+        kind: str,
+        func: Callable[[Job], Awaitable[Any]],
+        params: Optional[dict[str, Any]] = None,
+        exclusive: bool = True,
+    ) -> Job:
+        """
+        Запуск задания.
+
+        Args:
+            kind: Тип задания
+            func: Корутинная функция, выполняющая работу и обновляющая Job
+            params: Параметры для отображения
+            exclusive: Не запускать второе задание того же типа, пока идёт первое
+
+        Returns:
+            Новое задание или уже выполняющееся задание того же типа
+        """
+        if exclusive:
+            running = self.running(kind)
+            if running is not None:
+                return running
+
+        job = Job(next(self._ids), kind, params)
+        job.task = asyncio.create_task(self._run(job, func), name=f"job-{kind}-{job.id}")
+        self._jobs[job.id] = job
+        while len(self._jobs) > self.history:
+            oldest_id = next(iter(self._jobs))
+            if self._jobs[oldest_id].is_active:
+                break
+            del self._jobs[oldest_id]
+        return job
+
+    async def _run(self, job: Job, func: Callable[[Job], Awaitable[Any]]) -> None:
+        job.status = "running"
+        job.started_at = time.time()
+        logger.info("Задание %s #%s запущено %s", job.kind, job.id, job.params)
+        try:
+            await func(job)
+            job.status = "done"
+        except asyncio.CancelledError:
+            job.status = "cancelled"
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            logger.error("Задание %s #%s завершилось ошибкой: %s", job.kind, job.id, e, exc_info=True)
+        finally:
+            job.finished_at = time.time()
+            logger.info(
+                "Задание %s #%s: %s, обработано %s за %.1fс",
+                job.kind, job.id, job.status, job.processed, job.finished_at - job.started_at
+            )
+
+    def lock(self, name: str) -> SharedLock:
+        """
+        Именованная блокировка для заданий, которые не должны выполняться одновременно
+        (например, применение политик хранения и архивирование одной и той же истории),
+        в том числе в разных процессах.
+        """
+        if name not in self._locks:
+            self._locks[name] = SharedLock(name)
+        return self._locks[name]
+
+    def get(self, job_id: int) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def running(self, kind: str) -> Optional[Job]:
+        """Выполняющееся задание указанного типа."""
+        for job in self._jobs.values():
+            if job.kind == kind and job.is_active:
+                return job
+        return None
+
+    def list(self) -> list[Job]:
+        return list(reversed(self._jobs.values()))
+
+    async def cancel(self, job_id: int) -> bool:
+        """Отмена задания. Возвращает False, если задание не найдено или уже завершено."""
+        job = self._jobs.get(job_id)
+        if job is None or not job.is_active or job.task is None:
+            return False
+        job.task.cancel()
+        await asyncio.gather(job.task, return_exceptions=True)
+        if job.status == "pending":
+            # Задача отменена до начала выполнения
+            job.status = "cancelled"
+            job.finished_at = time.time()
+        return True
+
+    async def stop(self) -> None:
+        """Отмена всех выполняющихся заданий."""
+        for job in list(self._jobs.values()):
+            if job.is_active:
+                await self.cancel(job.id)
+
+    def stats(self) -> dict[str, Any]:
+        """Метрики заданий."""
+        return {
+            "running": [job.to_dict() for job in self._jobs.values() if job.is_active],
+            "total": len(self._jobs),
+        }
+
+
+job_manager = JobManager()
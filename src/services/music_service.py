@@ -6,17 +6,26 @@
 """
 
 import asyncio
+import hashlib
 import logging
 from typing import Optional, TYPE_CHECKING
 
-# Ленивый импорт discord для избежания зависимости при использовании только Telegram
+from config import settings
+from src.services.state import state_backend
+
+# Ленивый импорт discord и yt-dlp: при использовании только Telegram они не загружаются
 if TYPE_CHECKING:
     import discord
-import yt_dlp
+    import yt_dlp
 
 logger = logging.getLogger("music.service")
 
 
+def _cache_key(kind: str, value: str) -> str:
+    """Ключ кэша в общем состоянии (запросы и URL бывают длиннее допустимого ключа)."""
+    return f"music:{kind}:{hashlib.sha1(value.encode('utf-8')).hexdigest()}"
+
+
 class MusicService:
     """
     Singleton-сервис для управления музыкальными операциями.
@@ -62,12 +71,21 @@ class MusicService:
     def __init__(self):
         """Инициализация сервиса."""
         if not hasattr(self, "_initialized"):
-            self.ytdl = yt_dlp.YoutubeDL(self.YTDL_OPTIONS)
-            self._search_cache: dict[str, list[dict]] = {}
-            self._info_cache: dict[str, dict] = {}
+            self._ytdl: Optional["yt_dlp.YoutubeDL"] = None
+            # Кэши поиска и метаданных — в общем состоянии с TTL (общие для реплик)
+            self.cache_ttl = settings.MUSIC_CACHE_TTL
             self._initialized = True
             logger.info("MusicService инициализирован (с кэшированием метаданных)")
 
+    @property
+    def ytdl(self) -> "yt_dlp.YoutubeDL":
+        """Экземпляр YoutubeDL, создаваемый при первом обращении."""
+        if self._ytdl is None:
+            import yt_dlp
+
+            self._ytdl = yt_dlp.YoutubeDL(self.YTDL_OPTIONS)
+        return self._ytdl
+
     def is_valid_url(self, url: str) -> bool:
         """
         Проверка валидности YouTube URL.
@@ -100,10 +118,11 @@ class MusicService:
         Returns:
             Список словарей с информацией о треках
         """
-        cache_key = f"{query}:{max_results}"
-        if cache_key in self._search_cache:
+        cache_key = _cache_key("search", f"{max_results}:{query}")
+        cached = await state_backend.get(cache_key)
+        if cached is not None:
             logger.info(f"Получение из кэша поиска: {query}")
-            return self._search_cache[cache_key]
+            return cached
 
         logger.info(f"Поиск треков: {query}")
         
@@ -134,9 +153,9 @@ class MusicService:
                     }
                     tracks.append(track_info)
                     if track_info["url"]:
-                        self._info_cache[track_info["url"]] = track_info
+                        await state_backend.set(_cache_key("info", track_info["url"]), track_info, ttl=self.cache_ttl)
 
-            self._search_cache[cache_key] = tracks
+            await state_backend.set(cache_key, tracks, ttl=self.cache_ttl)
             logger.info(f"Найдено треков: {len(tracks)}")
             return tracks
             
@@ -154,8 +173,9 @@ class MusicService:
         Returns:
             Словарь с информацией о треке или None при ошибке
         """
-        if url in self._info_cache:
-            return self._info_cache[url]
+        cached = await state_backend.get(_cache_key("info", url))
+        if cached is not None:
+            return cached
 
         logger.info(f"Получение информации о треке: {url}")
         
@@ -178,7 +198,7 @@ class MusicService:
                 "id": data.get("id", ""),
             }
             
-            self._info_cache[url] = info
+            await state_backend.set(_cache_key("info", url), info, ttl=self.cache_ttl)
             return info
             
         except Exception as e:
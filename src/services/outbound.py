@@ -0,0 +1,378 @@
+"""
+Диспетчер исходящих сообщений.
+
+Все ответы ботов проходят через общую очередь с приоритетами. Перед отправкой
+воркер берёт токены из бакета конкретного чата и из глобального бакета
+платформы, поэтому всплески ответов сглаживаются под лимиты Telegram и Discord,
+а ответы 429 с retry_after обрабатываются повторной отправкой после паузы.
+
+Если в бакете чата нет токена (или чат заблокирован после 429), воркер не ждёт:
+задание откладывается по таймеру и возвращается в очередь с прежним приоритетом,
+а воркер берёт следующее. Глобальный токен берётся только непосредственно перед
+отправкой.
+"""
+
+import asyncio
+import itertools
+import logging
+import time
+from enum import IntEnum
+from typing import Any, Awaitable, Callable, Optional
+
+from config import settings
+
+logger = logging.getLogger("services.outbound")
+
+
+class Priority(IntEnum):
+    """Приоритет исходящего сообщения (меньше — важнее)."""
+    HIGH = 0      # Ошибки и ответы на команды
+    NORMAL = 1    # Ответы LLM
+    LOW = 2       # Фоновые и массовые рассылки
+
+
+class TokenBucket:
+    """Бакет токенов с резервированием: токены могут уходить в минус, задавая очередь ожидания."""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated", "blocked_until")
+
+    def __init__(self, rate: float, capacity: float):
+        """
+        Инициализация бакета.
+
+        Args:
+            rate: Скорость пополнения (токенов в секунду)
+            capacity: Максимальный запас токенов (размер всплеска)
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self) -> float:
+        """
+        Резервирование одного токена.
+
+        Returns:
+            Сколько секунд нужно подождать перед отправкой
+        """
+        now = time.monotonic()
+        self._refill(now)
+        self.tokens -= 1
+        wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        return max(wait, self.blocked_until - now)
+
+    def wait_time(self) -> float:
+        """Сколько секунд осталось до появления токена (без резервирования)."""
+        now = time.monotonic()
+        self._refill(now)
+        wait = (1 - self.tokens) / self.rate if self.tokens < 1 else 0.0
+        return max(wait, self.blocked_until - now)
+
+    def block(self, seconds: float) -> None:
+        """Запрет отправки на указанное время (ответ 429 с retry_after)."""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    @property
+    def is_idle(self) -> bool:
+        """Бакет полон и не заблокирован — его можно удалить без потери состояния."""
+        now = time.monotonic()
+        self._refill(now)
+        return self.tokens >= self.capacity and self.blocked_until <= now
+
+
+def split_message(text: str, limit: int) -> list[str]:
+    """
+    Разбиение длинного текста на части не длиннее limit.
+
+    Разрез выполняется по границе абзаца, строки или слова, если она есть.
+
+    Args:
+        text: Исходный текст
+        limit: Максимальная длина части
+
+    Returns:
+        Список частей
+    """
+    chunks = []
+    while len(text) > limit:
+        cut = -1
+        for separator in ("\n\n", "\n", " "):
+            cut = text.rfind(separator, 0, limit)
+            if cut > 0:
+                break
+        if cut <= 0:
+            cut = limit
+        chunks.append(text[:cut].rstrip())
+        text = text[cut:].lstrip()
+    if text:
+        chunks.append(text)
+    return chunks
+
+
+def _get_retry_after(exc: Exception) -> Optional[float]:
+    """Извлечение паузы из ошибки ограничения скорости (aiogram TelegramRetryAfter, discord RateLimited)."""
+    retry_after = getattr(exc, "retry_after", None)
+    if retry_after is not None:
+        return float(retry_after)
+    if getattr(exc, "status", None) == 429:
+        return 1.0
+    return None
+
+
+class _Job:
+    """Группа отправок одного чата, выполняемых строго по порядку."""
+
+    __slots__ = ("platform", "chat_id", "group", "calls", "future", "priority", "sequence", "results", "attempt")
+
+    def __init__(
+        self,
+        platform: str,
+        chat_id: int,
+        group: bool,
+        calls: list,
+        future: asyncio.Future,
+        priority: int,
+        sequence: int,
+    ):
+        self.platform = platform
+        self.chat_id = chat_id
+        self.group = group
+        self.calls = calls
+        self.future = future
+        self.priority = priority
+        self.sequence = sequence
+        # Прогресс сохраняется, пока задание ожидает токен чата вне очереди
+        self.results: list[Any] = []
+        self.attempt = 0
+
+
+class OutboundDispatcher:
+    """Общий диспетчер исходящих сообщений с учётом лимитов платформ."""
+
+    # (скорость в токенах/с, размер всплеска)
+    PLATFORM_LIMITS = {
+        "telegram": {"global": (30.0, 30.0), "chat": (1.0, 3.0), "group": (20 / 60, 5.0)},
+        "discord": {"global": (50.0, 50.0), "chat": (1.0, 5.0), "group": (1.0, 5.0)},
+    }
+
+    MESSAGE_LENGTH_LIMITS = {
+        "telegram": 4096,
+        "discord": 2000,
+    }
+
+    MAX_BUCKETS = 10000
+
+    def __init__(self, workers: int = 8, max_retries: int = 3):
+        """
+        Инициализация диспетчера.
+
+        Args:
+            workers: Количество воркеров отправки
+            max_retries: Сколько раз повторять отправку после ответа 429
+        """
+        self.workers = max(1, workers)
+        self.max_retries = max_retries
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._tasks: list[asyncio.Task] = []
+        self._sequence = itertools.count()
+        self._global_buckets: dict[str, TokenBucket] = {}
+        self._chat_buckets: dict[tuple[str, int], TokenBucket] = {}
+        self._delayed: dict[_Job, asyncio.TimerHandle] = {}
+        self._in_progress = 0
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+        self.throttled_seconds = 0.0
+
+    def _ensure_started(self) -> None:
+        """Ленивый запуск воркеров в текущем event loop."""
+        if self._tasks:
+            return
+        self._queue = asyncio.PriorityQueue()
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"outbound-worker-{i}")
+            for i in range(self.workers)
+        ]
+
+    async def stop(self) -> None:
+        """Остановка воркеров. Ожидающие в очереди и отложенные отправки отменяются."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        for job, handle in self._delayed.items():
+            handle.cancel()
+            job.future.cancel()
+        self._delayed.clear()
+        while self._queue is not None and not self._queue.empty():
+            _, _, job = self._queue.get_nowait()
+            job.future.cancel()
+        self._queue = None
+
+    @property
+    def pending(self) -> int:
+        """Количество заданий в очереди, отложенных и в процессе отправки."""
+        queued = self._queue.qsize() if self._queue else 0
+        return queued + len(self._delayed) + self._in_progress
+
+    async def send_text(
+        self,
+        platform: str,
+        chat_id: int,
+        text: str,
+        send: Callable[[str], Awaitable[Any]],
+        priority: Priority = Priority.NORMAL,
+        group: bool = False,
+    ) -> list[Any]:
+        """
+        Отправка текста с разбиением на части по лимиту платформы.
+
+        Args:
+            platform: Платформа (telegram, discord)
+            chat_id: ID чата или канала
+            text: Текст сообщения
+            send: Функция отправки одной части (например, message.answer)
+            priority: Приоритет сообщения
+            group: Групповой чат (более строгий лимит Telegram)
+
+        Returns:
+            Результаты отправки каждой части
+        """
+        limit = self.MESSAGE_LENGTH_LIMITS.get(platform, 2000)
+        calls = [lambda chunk=chunk: send(chunk) for chunk in split_message(text, limit)]
+        return await self.submit(platform, chat_id, calls, priority=priority, group=group)
+
+    async def submit(
+        self,
+        platform: str,
+        chat_id: int,
+        calls: list[Callable[[], Awaitable[Any]]],
+        priority: Priority = Priority.NORMAL,
+        group: bool = False,
+    ) -> list[Any]:
+        """
+        Постановка группы отправок в очередь и ожидание их выполнения.
+
+        Args:
+            platform: Платформа (telegram, discord)
+            chat_id: ID чата или канала
+            calls: Функции отправки, выполняемые по порядку
+            priority: Приоритет
+            group: Групповой чат
+
+        Returns:
+            Результаты вызовов
+        """
+        if not calls:
+            return []
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        job = _Job(platform, chat_id, group, calls, future, int(priority), next(self._sequence))
+        await self._queue.put((job.priority, job.sequence, job))
+        return await future
+
+    def _get_global_bucket(self, platform: str) -> TokenBucket:
+        bucket = self._global_buckets.get(platform)
+        if bucket is None:
+            limits = self.PLATFORM_LIMITS.get(platform, self.PLATFORM_LIMITS["discord"])
+            bucket = self._global_buckets[platform] = TokenBucket(*limits["global"])
+        return bucket
+
+    def _get_chat_bucket(self, job: _Job) -> TokenBucket:
+        key = (job.platform, job.chat_id)
+        bucket = self._chat_buckets.get(key)
+        if bucket is None:
+            if len(self._chat_buckets) >= self.MAX_BUCKETS:
+                self._chat_buckets = {k: b for k, b in self._chat_buckets.items() if not b.is_idle}
+            limits = self.PLATFORM_LIMITS.get(job.platform, self.PLATFORM_LIMITS["discord"])
+            bucket = self._chat_buckets[key] = TokenBucket(*limits["group" if job.group else "chat"])
+        return bucket
+
+    def _delay(self, job: _Job, wait: float) -> None:
+        """Возврат задания в очередь через wait секунд."""
+        self.throttled_seconds += wait
+        self._delayed[job] = asyncio.get_running_loop().call_later(wait, self._requeue, job)
+
+    def _requeue(self, job: _Job) -> None:
+        del self._delayed[job]
+        self._queue.put_nowait((job.priority, job.sequence, job))
+
+    async def _run(self, job: _Job) -> bool:
+        """
+        Последовательное выполнение отправок задания с повторами после 429.
+
+        Returns:
+            True если все отправки выполнены, False если задание отложено до появления токена чата
+        """
+        chat_bucket = self._get_chat_bucket(job)
+        while len(job.results) < len(job.calls):
+            wait = chat_bucket.wait_time()
+            if wait > 0:
+                self._delay(job, wait)
+                return False
+            chat_bucket.reserve()
+            # Глобальный токен берётся только для отправки, которая сейчас уйдёт
+            wait = self._get_global_bucket(job.platform).reserve()
+            if wait > 0:
+                self.throttled_seconds += wait
+                await asyncio.sleep(wait)
+            try:
+                job.results.append(await job.calls[len(job.results)]())
+                self.sent += 1
+                job.attempt = 0
+            except Exception as e:
+                retry_after = _get_retry_after(e)
+                if retry_after is None or job.attempt >= self.max_retries:
+                    raise
+                job.attempt += 1
+                self.retried += 1
+                logger.warning(
+                    "Лимит %s для чата %s, повтор через %.1fс (попытка %s/%s)",
+                    job.platform, job.chat_id, retry_after, job.attempt, self.max_retries
+                )
+                chat_bucket.block(retry_after)
+        return True
+
+    async def _worker(self) -> None:
+        """Цикл воркера отправки."""
+        while True:
+            _, _, job = await self._queue.get()
+            self._in_progress += 1
+            try:
+                if await self._run(job) and not job.future.done():
+                    job.future.set_result(job.results)
+            except Exception as e:
+                self.failed += 1
+                logger.error("Не удалось отправить сообщение в %s/%s: %s", job.platform, job.chat_id, e)
+                if not job.future.done():
+                    job.future.set_exception(e)
+            finally:
+                self._in_progress -= 1
+                self._queue.task_done()
+
+    def stats(self) -> dict[str, Any]:
+        """Метрики исходящей очереди."""
+        return {
+            "workers": self.workers,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "delayed": len(self._delayed),
+            "in_progress": self._in_progress,
+            "sent": self.sent,
+            "retried": self.retried,
+            "failed": self.failed,
+            "throttled_seconds": round(self.throttled_seconds, 3),
+            "chat_buckets": len(self._chat_buckets),
+        }
+
+
+outbound_dispatcher = OutboundDispatcher(
+    workers=settings.OUTBOUND_WORKERS,
+    max_retries=settings.OUTBOUND_MAX_RETRIES,
+)
@@ -0,0 +1,264 @@
+"""
+Политики хранения истории и их фоновое применение.
+
+Политика задаёт максимальный возраст сообщений и максимальное число сообщений
+в чате. Действуют три уровня: глобальный (по умолчанию — из настроек), платформа
+и конкретный чат; незаданное поле наследуется от более общего уровня.
+
+Применение идёт фоновым заданием: чаты перебираются по chat_stats, сообщения
+удаляются небольшими пачками по первичному ключу с паузой между пачками, чтобы
+не удерживать блокировки и не мешать записи новых сообщений.
+"""
+
+import asyncio
+import logging
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+
+from tortoise.transactions import in_transaction
+
+from config import settings
+from src.database import ChatMessage, partitioning
+from src.database.models import ChatStat, RetentionPolicy
+from src.services.archive_service import MAINTENANCE_LOCK, ArchiveService
+from src.services.history_service import HistoryService
+from src.services.jobs import Job, job_manager
+from src.services.stats_service import StatsService
+
+logger = logging.getLogger("services.retention")
+
+JOB_KIND = "retention"
+
+
+class EffectivePolicy:
+    """Итоговая политика чата после наследования."""
+
+    __slots__ = ("max_age_days", "max_messages")
+
+    def __init__(self, max_age_days: Optional[int], max_messages: Optional[int]):
+        self.max_age_days = max_age_days or None
+        self.max_messages = max_messages or None
+
+    @property
+    def is_empty(self) -> bool:
+        return self.max_age_days is None and self.max_messages is None
+
+
+class RetentionService:
+    """Сервис политик хранения истории."""
+
+    @staticmethod
+    async def list_policies() -> list[RetentionPolicy]:
+        return await RetentionPolicy.all().order_by("platform", "chat_id")
+
+    @staticmethod
+    async def set_policy(
+        platform: Optional[str] = None,
+        chat_id: Optional[int] = None,
+        max_age_days: Optional[int] = None,
+        max_messages: Optional[int] = None,
+    ) -> RetentionPolicy:
+        """
+        Создание или изменение политики уровня (platform, chat_id).
+
+        Raises:
+            ValueError: chat_id указан без platform или значения отрицательные
+        """
+        if chat_id is not None and not platform:
+            raise ValueError("chat_id requires platform")
+        if any(v is not None and v < 0 for v in (max_age_days, max_messages)):
+            raise ValueError("Limits must be non-negative")
+
+        policy = await RetentionPolicy.get_or_none(platform=platform, chat_id=chat_id)
+        if policy is None:
+            return await RetentionPolicy.create(
+                platform=platform, chat_id=chat_id, max_age_days=max_age_days, max_messages=max_messages
+            )
+        policy.max_age_days = max_age_days
+        policy.max_messages = max_messages
+        await policy.save()
+        return policy
+
+    @staticmethod
+    async def delete_policy(policy_id: int) -> bool:
+        return bool(await RetentionPolicy.filter(id=policy_id).delete())
+
+    @staticmethod
+    def _resolve(policies: dict[tuple, RetentionPolicy], platform: Optional[str], chat_id: Optional[int]) -> EffectivePolicy:
+        """Наследование полей: чат -> платформа -> глобальная политика -> настройки."""
+        chain = [
+            policies.get((platform, chat_id)),
+            policies.get((platform, None)),
+            policies.get((None, None)),
+        ]
+        max_age = settings.RETENTION_MAX_AGE_DAYS
+        max_messages = settings.RETENTION_MAX_MESSAGES
+        for policy in reversed(chain):
+            if policy is None:
+                continue
+            if policy.max_age_days is not None:
+                max_age = policy.max_age_days
+            if policy.max_messages is not None:
+                max_messages = policy.max_messages
+        return EffectivePolicy(max_age, max_messages)
+
+    @staticmethod
+    async def enforce_chat(job: Optional[Job], chat: ChatStat, policy: EffectivePolicy) -> int:
+        """Применение политики к одному чату. Возвращает количество удалённых сообщений."""
+        deleted = 0
+        if policy.max_age_days is not None:
+            cutoff = datetime.now(timezone.utc) - timedelta(days=policy.max_age_days)
+            deleted += await HistoryService.delete_messages(job, chat.chat_id, chat.platform, created_at__lt=cutoff)
+            deleted += await ArchiveService.purge_chat(chat.chat_id, chat.platform, older_than=cutoff)
+
+        # Счётчик chat_stats (вместе с архивом) позволяет не трогать чаты, укладывающиеся в лимит
+        if policy.max_messages is not None and chat.message_count - deleted > policy.max_messages:
+            # Граница: id самого старого из последних max_messages сообщений
+            boundary = await (
+                ChatMessage.filter(chat_id=chat.chat_id, platform=chat.platform)
+                .order_by("-id")
+                .offset(policy.max_messages - 1)
+                .limit(1)
+                .values_list("id", flat=True)
+            )
+            if boundary:
+                deleted += await HistoryService.delete_messages(
+                    job, chat.chat_id, chat.platform, id__lt=boundary[0]
+                )
+                # Архив старше всех сообщений таблицы; сегменты удаляются только целиком
+                deleted += await ArchiveService.purge_chat(chat.chat_id, chat.platform, before_id=boundary[0])
+            else:
+                # В таблице меньше max_messages сообщений: остаток лимита приходится на архив
+                kept = await ChatMessage.filter(chat_id=chat.chat_id, platform=chat.platform).count()
+                deleted += await ArchiveService.trim_chat(
+                    chat.chat_id, chat.platform, keep=policy.max_messages - kept
+                )
+        return deleted
+
+    @staticmethod
+    def _partition_max_age(policies: dict[tuple, RetentionPolicy]) -> Optional[int]:
+        """
+        Возраст, старше которого сообщения не нужны ни одному чату.
+
+        Секцию можно удалить целиком, только если никакая политика платформы или
+        чата не хранит сообщения дольше глобальной.
+        """
+        global_policy = RetentionService._resolve(policies, None, None)
+        if global_policy.max_age_days is None:
+            return None
+        ages = [global_policy.max_age_days]
+        for (platform, chat_id), policy in policies.items():
+            if platform is None or policy.max_age_days is None:
+                continue
+            if policy.max_age_days == 0:
+                return None
+            ages.append(policy.max_age_days)
+        return max(ages)
+
+    @staticmethod
+    async def _retire_partitions(job: Optional[Job], policies: dict[tuple, RetentionPolicy]) -> int:
+        """Отсоединение или удаление секций, целиком вышедших за срок хранения."""
+        deleted = 0
+        expired = partitioning.expired_partitions(
+            await partitioning.list_partitions(), RetentionService._partition_max_age(policies)
+        )
+        for name in expired:
+            by_chat: dict[tuple[int, str], Counter] = {}
+            # DETACH (без CONCURRENTLY) и DROP транзакционны: секция выводится вместе с
+            # уменьшением счётчиков, иначе сбой между ними оставил бы счётчики завышенными
+            async with in_transaction("default"):
+                for row in await partitioning.partition_counts(name):
+                    by_chat.setdefault((row["chat_id"], row["platform"]), Counter())[row["role"]] += row["count"]
+                await partitioning.retire_partition(name)
+                for (chat_id, platform), by_role in by_chat.items():
+                    await StatsService.subtract_messages(chat_id, platform, by_role)
+            count = sum(sum(c.values()) for c in by_chat.values())
+            deleted += count
+            if job is not None:
+                job.advance(count, f"Секция {name} выведена из таблицы")
+        return deleted
+
+    @staticmethod
+    async def enforce(job: Optional[Job] = None) -> int:
+        """
+        Применение политик ко всем чатам.
+
+        Returns:
+            Количество удалённых сообщений
+        """
+        policies = {(p.platform, p.chat_id): p for p in await RetentionPolicy.all()}
+        if job is not None:
+            job.total = None
+            job.message = "Проверка чатов"
+
+        async with job_manager.lock(MAINTENANCE_LOCK):
+            deleted = 0
+            if partitioning.is_partitioned():
+                await partitioning.ensure_partitions()
+                deleted += await RetentionService._retire_partitions(job, policies)
+
+            checked = 0
+            last_id = 0
+            while True:
+                chats = await ChatStat.filter(id__gt=last_id).order_by("id").limit(100)
+                if not chats:
+                    break
+                for chat in chats:
+                    policy = RetentionService._resolve(policies, chat.platform, chat.chat_id)
+                    if not policy.is_empty:
+                        deleted += await RetentionService.enforce_chat(job, chat, policy)
+                    checked += 1
+                last_id = chats[-1].id
+                if job is not None:
+                    job.message = f"Проверено чатов: {checked}, удалено сообщений: {deleted}"
+
+        if deleted:
+            logger.info("Политики хранения: удалено %s сообщений в %s чатах", deleted, checked)
+        return deleted
+
+    @staticmethod
+    def start_job() -> Job:
+        """Запуск применения политик фоновым заданием (если оно ещё не идёт)."""
+        return job_manager.start(JOB_KIND, RetentionService.enforce)
+
+
+class RetentionScheduler:
+    """Периодический запуск применения политик хранения и архивирования."""
+
+    def __init__(self, interval_minutes: int = 60):
+        self.interval = interval_minutes * 60
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self._loop(), name="retention-scheduler")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                if partitioning.is_partitioned():
+                    await partitioning.ensure_partitions()
+                if settings.RETENTION_MAX_AGE_DAYS or settings.RETENTION_MAX_MESSAGES or await RetentionPolicy.exists():
+                    RetentionService.start_job()
+                if settings.ARCHIVE_AFTER_DAYS > 0:
+                    ArchiveService.start_job()
+            except Exception as e:
+                logger.error("Не удалось запустить обслуживание истории: %s", e)
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def stats(self) -> dict[str, Any]:
+        return {"interval_seconds": self.interval, "running": self._task is not None}
+
+
+retention_scheduler = RetentionScheduler(settings.RETENTION_INTERVAL_MINUTES)
@@ -0,0 +1,127 @@
+"""
+Полнотекстовый поиск по истории сообщений.
+
+Запросы идут только через полнотекстовый индекс (FTS5 в SQLite, GIN по tsvector
+в Postgres); базовая таблица читается лишь по первичному ключу найденных строк.
+"""
+
+import html
+import re
+from datetime import datetime
+from typing import Any, Optional
+
+from src.database import sql
+from src.database.fulltext import FTS_TABLE, get_search_config, tsvector_expression
+from src.database.replica import on_read_replica
+
+# Маркеры подсветки внутри сниппета; заменяются на <mark> после экранирования HTML
+_HL_START = "\x02"
+_HL_END = "\x03"
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def _fts5_query(text: str) -> str:
+    """Пользовательский запрос -> выражение FTS5: все слова обязательны, операторы игнорируются."""
+    return " ".join(f'"{word}"' for word in _WORD.findall(text))
+
+
+def _highlight(snippet: Optional[str]) -> str:
+    escaped = html.escape(snippet or "")
+    return escaped.replace(_HL_START, "<mark>").replace(_HL_END, "</mark>")
+
+
+class SearchService:
+    """Сервис полнотекстового поиска."""
+
+    @staticmethod
+    @on_read_replica
+    async def search(
+        query: str,
+        platform: Optional[str] = None,
+        chat_id: Optional[int] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        limit: int = 20,
+        offset: int = 0,
+    ) -> dict[str, Any]:
+        """
+        Поиск сообщений по содержимому.
+
+        Args:
+            query: Поисковый запрос
+            platform: Фильтр по платформе
+            chat_id: Фильтр по чату
+            date_from: Сообщения не раньше даты
+            date_to: Сообщения раньше даты
+            limit: Размер страницы
+            offset: Смещение
+
+        Returns:
+            {"items": [...], "has_more": bool}; у каждого результата есть
+            экранированный сниппет с подсветкой <mark>
+        """
+        postgres = sql.is_postgres()
+        if postgres:
+            match_value = query.strip()
+        else:
+            match_value = _fts5_query(query)
+        if not match_value:
+            return {"items": [], "has_more": False}
+
+        conditions = []
+        params: list[Any] = []
+        if platform:
+            conditions.append("m.platform = ?")
+            params.append(platform)
+        if chat_id is not None:
+            conditions.append("m.chat_id = ?")
+            params.append(chat_id)
+        if date_from is not None:
+            conditions.append("m.created_at >= ?")
+            params.append(sql.datetime_param(date_from))
+        if date_to is not None:
+            conditions.append("m.created_at < ?")
+            params.append(sql.datetime_param(date_to))
+        filters = "".join(f" AND {condition}" for condition in conditions)
+
+        if postgres:
+            config = get_search_config()
+            headline_options = f"StartSel={_HL_START}, StopSel={_HL_END}, MaxWords=30, MinWords=10, MaxFragments=2"
+            statement = f"""
+                SELECT m.id, m.chat_id, m.platform, m.role, m.nickname, m.created_at,
+                       ts_headline('{config}'::regconfig, m.content, q, ?) AS snippet,
+                       ts_rank({tsvector_expression('m.content')}, q) AS rank
+                FROM chat_messages m, websearch_to_tsquery('{config}'::regconfig, ?) q
+                WHERE {tsvector_expression('m.content')} @@ q{filters}
+                ORDER BY rank DESC, m.id DESC
+                LIMIT ? OFFSET ?
+            """
+            params = [headline_options, match_value, *params]
+        else:
+            statement = f"""
+                SELECT m.id, m.chat_id, m.platform, m.role, m.nickname, m.created_at,
+                       snippet({FTS_TABLE}, 0, '{_HL_START}', '{_HL_END}', '…', 16) AS snippet,
+                       bm25({FTS_TABLE}) AS rank
+                FROM {FTS_TABLE}
+                JOIN chat_messages m ON m.id = {FTS_TABLE}.rowid
+                WHERE {FTS_TABLE} MATCH ?{filters}
+                ORDER BY rank, m.id DESC
+                LIMIT ? OFFSET ?
+            """
+            params = [match_value, *params]
+
+        rows = await sql.fetch_all(statement, [*params, limit + 1, offset])
+        items = [
+            {
+                "id": row["id"],
+                "chat_id": row["chat_id"],
+                "platform": row["platform"],
+                "role": row["role"],
+                "nickname": row["nickname"],
+                "created_at": sql.to_datetime(row["created_at"]),
+                "snippet": _highlight(row["snippet"]),
+            }
+            for row in rows[:limit]
+        ]
+        return {"items": items, "has_more": len(rows) > limit}
@@ -0,0 +1,359 @@
+"""
+Общее состояние процессов приложения.
+
+Состояние, которое раньше жило в глобальных переменных модулей (ожидание ввода
+промпта, кэши метаданных музыки, данные бота), хранится в бэкенде состояния. При нескольких репликах за балансировщиком
+бэкенд database делает это состояние общим.
+
+Бэкенды:
+    memory   — словарь в памяти процесса (один процесс, по умолчанию)
+    database — таблицы state_entries и state_events в основной БД (SQLite или Postgres)
+
+Ключи живут до истечения TTL; set(..., only_if_absent=True), pop() и
+compare_and_delete() атомарны и годятся для захвата и освобождения владения.
+Значения сериализуются в JSON в обоих бэкендах, поэтому в памяти и в БД
+ведут себя одинаково (get() возвращает копию).
+
+Pub/sub простой: подписчик получает сообщения, опубликованные после подписки.
+Бэкенд database опрашивает таблицу событий раз в STATE_POLL_INTERVAL секунд и
+не гарантирует доставку сообщений, пропущенных за время простоя подписчика.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any, Optional
+
+from config import settings
+from src.database import sql
+
+logger = logging.getLogger("services.state")
+
+# Идентификатор процесса: значение ключей владения и отметка источника событий
+INSTANCE_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, ensure_ascii=False)
+
+
+class Subscription(ABC):
+    """Подписка на канал: `async for message in subscription` или get()."""
+
+    def __init__(self, backend: "StateBackend", channel: str):
+        self.backend = backend
+        self.channel = channel
+        self.closed = False
+
+    @abstractmethod
+    async def get(self) -> Any:
+        """Ожидание следующего сообщения канала."""
+
+    async def close(self) -> None:
+        self.closed = True
+
+    def __aiter__(self) -> "Subscription":
+        return self
+
+    async def __anext__(self) -> Any:
+        if self.closed:
+            raise StopAsyncIteration
+        return await self.get()
+
+    async def __aenter__(self) -> "Subscription":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+
+class StateBackend(ABC):
+    """Интерфейс бэкенда состояния."""
+
+    name = ""
+
+    def __init__(self):
+        self._pending: set[asyncio.Task] = set()
+        self.reads = 0
+        self.writes = 0
+        self.published = 0
+
+    @abstractmethod
+    async def get(self, key: str) -> Any:
+        """Значение ключа или None, если ключа нет или его срок истёк."""
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None, only_if_absent: bool = False) -> bool:
+        """
+        Запись значения.
+
+        Args:
+            key: Ключ
+            value: Значение (сериализуемое в JSON)
+            ttl: Срок жизни, секунды (None — без срока)
+            only_if_absent: Записать, только если ключа нет или его срок истёк
+
+        Returns:
+            Записано ли значение
+        """
+
+    @abstractmethod
+    async def pop(self, key: str) -> Any:
+        """Атомарное чтение и удаление ключа; None, если ключа не было."""
+
+    @abstractmethod
+    async def compare_and_delete(self, key: str, value: Any) -> bool:
+        """Удаление ключа, только если его значение равно value (освобождение владения)."""
+
+    @abstractmethod
+    async def publish(self, channel: str, message: Any) -> None:
+        """Публикация сообщения (сериализуемого в JSON) в канал."""
+
+    @abstractmethod
+    async def subscribe(self, channel: str) -> Subscription:
+        """Подписка на сообщения канала, опубликованные после вызова."""
+
+    async def purge(self) -> None:
+        """Удаление истёкших ключей и старых событий."""
+
+    def publish_nowait(self, channel: str, message: Any) -> None:
+        """Публикация из синхронного кода: в фоне, ошибки только логируются."""
+        task = asyncio.get_running_loop().create_task(self.publish(channel, message))
+        self._pending.add(task)
+        task.add_done_callback(self._published)
+
+    def _published(self, task: asyncio.Task) -> None:
+        self._pending.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Не удалось опубликовать событие: %s", task.exception())
+
+    async def close(self) -> None:
+        """Ожидание фоновых публикаций."""
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "backend": self.name,
+            "instance": INSTANCE_ID,
+            "reads": self.reads,
+            "writes": self.writes,
+            "published": self.published,
+        }
+
+
+class MemorySubscription(Subscription):
+    def __init__(self, backend: "MemoryStateBackend", channel: str):
+        super().__init__(backend, channel)
+        self.queue: asyncio.Queue = asyncio.Queue()
+
+    async def get(self) -> Any:
+        return json.loads(await self.queue.get())
+
+    async def close(self) -> None:
+        await super().close()
+        self.backend._subscribers.get(self.channel, set()).discard(self)
+
+
+class MemoryStateBackend(StateBackend):
+    """Состояние в памяти процесса."""
+
+    name = "memory"
+    # Истёкшие ключи удаляются при чтении и полным проходом раз в столько записей
+    PURGE_EVERY = 1000
+
+    def __init__(self):
+        super().__init__()
+        self._entries: dict[str, tuple[str, Optional[float]]] = {}
+        self._subscribers: dict[str, set[MemorySubscription]] = {}
+
+    def _live(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.time():
+            del self._entries[key]
+            return None
+        return value
+
+    async def get(self, key: str) -> Any:
+        self.reads += 1
+        value = self._live(key)
+        return json.loads(value) if value is not None else None
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None, only_if_absent: bool = False) -> bool:
+        if only_if_absent and self._live(key) is not None:
+            return False
+        self.writes += 1
+        self._entries[key] = (_dumps(value), time.time() + ttl if ttl is not None else None)
+        if self.writes % self.PURGE_EVERY == 0:
+            await self.purge()
+        return True
+
+    async def pop(self, key: str) -> Any:
+        value = self._live(key)
+        if value is None:
+            return None
+        self.writes += 1
+        del self._entries[key]
+        return json.loads(value)
+
+    async def compare_and_delete(self, key: str, value: Any) -> bool:
+        if self._live(key) != _dumps(value):
+            return False
+        self.writes += 1
+        del self._entries[key]
+        return True
+
+    async def publish(self, channel: str, message: Any) -> None:
+        payload = _dumps(message)
+        self.published += 1
+        for subscription in self._subscribers.get(channel, ()):
+            subscription.queue.put_nowait(payload)
+
+    async def subscribe(self, channel: str) -> Subscription:
+        subscription = MemorySubscription(self, channel)
+        self._subscribers.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    async def purge(self) -> None:
+        now = time.time()
+        for key in [key for key, (_, expires_at) in self._entries.items() if expires_at is not None and expires_at <= now]:
+            del self._entries[key]
+
+    def stats(self) -> dict[str, Any]:
+        return {**super().stats(), "keys": len(self._entries)}
+
+
+class DatabaseSubscription(Subscription):
+    def __init__(self, backend: "DatabaseStateBackend", channel: str, last_id: int):
+        super().__init__(backend, channel)
+        self.last_id = last_id
+        self._buffer: deque[str] = deque()
+
+    async def get(self) -> Any:
+        while not self._buffer:
+            rows = await sql.fetch_tuples(
+                "SELECT id, payload FROM state_events WHERE channel = ? AND id > ? ORDER BY id LIMIT 100",
+                (self.channel, self.last_id),
+            )
+            if rows:
+                self.last_id = rows[-1][0]
+                self._buffer.extend(payload for _, payload in rows)
+            else:
+                await asyncio.sleep(self.backend.poll_interval)
+        return json.loads(self._buffer.popleft())
+
+
+class DatabaseStateBackend(StateBackend):
+    """
+    Состояние в основной БД.
+
+    Атомарность обеспечивается одиночными запросами: upsert с условием для
+    only_if_absent и DELETE ... RETURNING для pop (SQLite 3.35+ и Postgres).
+    """
+
+    name = "database"
+    # Истёкшие ключи и старые события удаляются раз в столько записей
+    PURGE_EVERY = 500
+
+    def __init__(self, poll_interval: float = 1.0, event_retention: float = 300.0):
+        """
+        Инициализация бэкенда.
+
+        Args:
+            poll_interval: Как часто подписчики проверяют новые события, секунды
+            event_retention: Сколько хранить события, секунды
+        """
+        super().__init__()
+        self.poll_interval = poll_interval
+        self.event_retention = event_retention
+
+    async def _written(self) -> None:
+        self.writes += 1
+        if self.writes % self.PURGE_EVERY == 0:
+            await self.purge()
+
+    async def get(self, key: str) -> Any:
+        self.reads += 1
+        rows = await sql.fetch_tuples("SELECT value, expires_at FROM state_entries WHERE key = ?", (key,))
+        if not rows:
+            return None
+        value, expires_at = rows[0]
+        if expires_at is not None and expires_at <= time.time():
+            return None
+        return json.loads(value)
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None, only_if_absent: bool = False) -> bool:
+        now = time.time()
+        expires_at = now + ttl if ttl is not None else None
+        query = (
+            "INSERT INTO state_entries (key, value, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at"
+        )
+        params: tuple = (key, _dumps(value), expires_at)
+        if only_if_absent:
+            # Существующий ключ перезаписывается, только если его срок истёк
+            query += " WHERE state_entries.expires_at IS NOT NULL AND state_entries.expires_at <= ?"
+            params += (now,)
+        # RETURNING вместо счётчика строк: для INSERT клиент asyncpg его не возвращает
+        written = bool(await sql.fetch_all(query + " RETURNING key", params))
+        if written:
+            await self._written()
+        return written
+
+    async def pop(self, key: str) -> Any:
+        rows = await sql.fetch_all("DELETE FROM state_entries WHERE key = ? RETURNING value, expires_at", (key,))
+        if not rows:
+            return None
+        await self._written()
+        value, expires_at = rows[0]["value"], rows[0]["expires_at"]
+        if expires_at is not None and expires_at <= time.time():
+            return None
+        return json.loads(value)
+
+    async def compare_and_delete(self, key: str, value: Any) -> bool:
+        deleted = await sql.execute("DELETE FROM state_entries WHERE key = ? AND value = ?", (key, _dumps(value))) > 0
+        if deleted:
+            await self._written()
+        return deleted
+
+    async def publish(self, channel: str, message: Any) -> None:
+        await sql.execute(
+            "INSERT INTO state_events (channel, payload, created_at) VALUES (?, ?, ?)",
+            (channel, _dumps(message), time.time()),
+        )
+        self.published += 1
+        await self._written()
+
+    async def subscribe(self, channel: str) -> Subscription:
+        rows = await sql.fetch_tuples("SELECT MAX(id) FROM state_events")
+        return DatabaseSubscription(self, channel, rows[0][0] or 0)
+
+    async def purge(self) -> None:
+        now = time.time()
+        try:
+            await sql.execute(
+                "DELETE FROM state_entries WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,)
+            )
+            await sql.execute("DELETE FROM state_events WHERE created_at < ?", (now - self.event_retention,))
+        except Exception as e:
+            logger.error("Ошибка очистки состояния: %s", e)
+
+
+def create_state_backend(name: str) -> StateBackend:
+    """Бэкенд состояния по имени из настроек (STATE_BACKEND)."""
+    if name == "memory":
+        return MemoryStateBackend()
+    if name == "database":
+        return DatabaseStateBackend(settings.STATE_POLL_INTERVAL, settings.STATE_EVENT_RETENTION)
+    raise ValueError(f"Неизвестный бэкенд состояния: {name}")
+
+
+state_backend = create_state_backend(settings.STATE_BACKEND)
@@ -0,0 +1,424 @@
+"""
+Инкрементальные счётчики статистики сообщений.
+
+Счётчики обновляются при записи каждого сообщения, поэтому статистика и графики
+активности читаются из небольших таблиц без агрегации по chat_messages:
+- stat_counters: всего сообщений, по платформам и по ролям;
+- chat_stats: количество сообщений и последняя активность по чатам;
+- hourly_stats: количество сообщений по часам (для «за 24ч» и графиков).
+
+Почасовые счётчики отражают активность: очистка истории отдельного чата их не
+уменьшает. Полная очистка истории сбрасывает все счётчики.
+
+Вызывающий код изменяет счётчики в одной транзакции с записью или удалением
+сообщений; вставка, которая может столкнуться с параллельной, выполняется в
+точке сохранения, чтобы конфликт не прерывал внешнюю транзакцию (Postgres).
+"""
+
+import logging
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from tortoise.exceptions import IntegrityError
+from tortoise.expressions import F
+from tortoise.functions import Count, Max
+from tortoise.transactions import in_transaction
+
+from config import settings
+from src.database import ChatMessage, sql
+from src.database.models import ArchiveSegment, ChatStat, HourlyStat, StatCounter
+from src.database.replica import on_read_replica
+
+logger = logging.getLogger("services.stats")
+
+
+def _hour(dt: datetime) -> datetime:
+    """Начало часа в UTC."""
+    return dt.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+class StatsDelta:
+    """Изменения счётчиков, накопленные при массовой вставке сообщений (импорт)."""
+
+    def __init__(self):
+        self.counters: Counter = Counter()
+        # (chat_id, platform) -> [количество, последнее сообщение, тип чата последнего сообщения]
+        self.chats: dict[tuple[int, str], list] = {}
+        self.hourly: Counter = Counter()
+        self._since = datetime.now(timezone.utc) - timedelta(days=settings.STATS_HOURLY_RETENTION_DAYS)
+
+    def add(self, chat_id: int, platform: str, chat_type: str, role: str, created_at: datetime) -> None:
+        """Учёт одного сообщения."""
+        self.counters.update(("messages", f"platform:{platform}", f"role:{role}"))
+        chat = self.chats.get((chat_id, platform))
+        if chat is None:
+            self.chats[(chat_id, platform)] = [1, created_at, chat_type]
+        else:
+            chat[0] += 1
+            if created_at > chat[1]:
+                chat[1], chat[2] = created_at, chat_type
+        if created_at >= self._since:
+            self.hourly[(_hour(created_at), platform)] += 1
+
+
+class StatsService:
+    """Сервис для работы со счётчиками статистики."""
+
+    @staticmethod
+    async def _add_to_counters(deltas: dict[str, int]) -> None:
+        """Атомарное изменение счётчиков; недостающие счётчики создаются."""
+        by_delta: dict[int, list[str]] = defaultdict(list)
+        for name, delta in deltas.items():
+            if delta:
+                by_delta[delta].append(name)
+
+        for delta, names in by_delta.items():
+            updated = await StatCounter.filter(name__in=names).update(value=F("value") + delta)
+            if updated == len(names):
+                continue
+            existing = set(await StatCounter.filter(name__in=names).values_list("name", flat=True))
+            for name in names:
+                if name in existing:
+                    continue
+                try:
+                    async with in_transaction("default"):
+                        await StatCounter.create(name=name, value=delta)
+                except IntegrityError:
+                    # Счётчик создан параллельной записью
+                    await StatCounter.filter(name=name).update(value=F("value") + delta)
+
+    @staticmethod
+    async def record_message(
+        chat_id: int,
+        platform: str,
+        chat_type: str,
+        role: str,
+        created_at: datetime,
+    ) -> None:
+        """
+        Учёт нового сообщения в счётчиках.
+
+        Args:
+            chat_id: ID чата
+            platform: Платформа
+            chat_type: Тип чата
+            role: Роль автора сообщения
+            created_at: Время сообщения
+        """
+        if settings.HISTORY_SQL_FAST_PATH:
+            await StatsService._record_message_sql(chat_id, platform, chat_type, role, created_at)
+            return
+
+        await StatsService._add_to_counters({"messages": 1, f"platform:{platform}": 1, f"role:{role}": 1})
+
+        chat_values = {
+            "message_count": F("message_count") + 1,
+            "last_message_at": created_at,
+            "chat_type": chat_type,
+        }
+        if not await ChatStat.filter(chat_id=chat_id, platform=platform).update(**chat_values):
+            try:
+                async with in_transaction("default"):
+                    await ChatStat.create(
+                        chat_id=chat_id,
+                        platform=platform,
+                        chat_type=chat_type,
+                        message_count=1,
+                        last_message_at=created_at,
+                    )
+            except IntegrityError:
+                await ChatStat.filter(chat_id=chat_id, platform=platform).update(**chat_values)
+
+        bucket = _hour(created_at)
+        if not await HourlyStat.filter(bucket=bucket, platform=platform).update(messages=F("messages") + 1):
+            try:
+                async with in_transaction("default"):
+                    await HourlyStat.create(bucket=bucket, platform=platform, messages=1)
+            except IntegrityError:
+                await HourlyStat.filter(bucket=bucket, platform=platform).update(messages=F("messages") + 1)
+            else:
+                # Новый час — заодно удаляем устаревшие почасовые счётчики
+                cutoff = bucket - timedelta(days=settings.STATS_HOURLY_RETENTION_DAYS)
+                await HourlyStat.filter(bucket__lt=cutoff).delete()
+
+    @staticmethod
+    async def _record_message_sql(
+        chat_id: int,
+        platform: str,
+        chat_type: str,
+        role: str,
+        created_at: datetime,
+    ) -> None:
+        """Учёт сообщения тремя запросами INSERT ... ON CONFLICT вместо чтения и обновления строк."""
+        connection = sql.get_connection()
+        await sql.execute(
+            "INSERT INTO stat_counters (name, value) VALUES (?, 1), (?, 1), (?, 1) "
+            "ON CONFLICT (name) DO UPDATE SET value = stat_counters.value + excluded.value",
+            ["messages", f"platform:{platform}", f"role:{role}"],
+            connection,
+        )
+        await sql.execute(
+            "INSERT INTO chat_stats (chat_id, platform, chat_type, message_count, last_message_at) "
+            "VALUES (?, ?, ?, 1, ?) ON CONFLICT (chat_id, platform) DO UPDATE SET "
+            "message_count = chat_stats.message_count + 1, "
+            "last_message_at = excluded.last_message_at, chat_type = excluded.chat_type",
+            [chat_id, platform, chat_type, sql.datetime_param(created_at, connection)],
+            connection,
+        )
+        bucket = _hour(created_at)
+        rows = await sql.fetch_all(
+            "INSERT INTO hourly_stats (bucket, platform, messages) VALUES (?, ?, 1) "
+            "ON CONFLICT (bucket, platform) DO UPDATE SET messages = hourly_stats.messages + 1 RETURNING messages",
+            [sql.datetime_param(bucket, connection), platform],
+            connection,
+        )
+        if rows and rows[0]["messages"] == 1:
+            # Новый час — заодно удаляем устаревшие почасовые счётчики
+            cutoff = bucket - timedelta(days=settings.STATS_HOURLY_RETENTION_DAYS)
+            await HourlyStat.filter(bucket__lt=cutoff).delete()
+
+    @staticmethod
+    async def apply(delta: StatsDelta) -> None:
+        """
+        Добавление накопленных изменений к счётчикам (без пересчёта по всей истории).
+
+        Вызывается в транзакции массовой вставки.
+        """
+        await StatsService._add_to_counters(dict(delta.counters))
+
+        for (chat_id, platform), (count, last_at, chat_type) in delta.chats.items():
+            chat = ChatStat.filter(chat_id=chat_id, platform=platform)
+            if not await chat.update(message_count=F("message_count") + count):
+                try:
+                    async with in_transaction("default"):
+                        await ChatStat.create(
+                            chat_id=chat_id,
+                            platform=platform,
+                            chat_type=chat_type,
+                            message_count=count,
+                            last_message_at=last_at,
+                        )
+                    continue
+                except IntegrityError:
+                    await chat.update(message_count=F("message_count") + count)
+            # Импортированная история может быть старше уже записанной
+            await chat.filter(last_message_at__lt=last_at).update(last_message_at=last_at, chat_type=chat_type)
+
+        for (bucket, platform), count in delta.hourly.items():
+            hourly = HourlyStat.filter(bucket=bucket, platform=platform)
+            if not await hourly.update(messages=F("messages") + count):
+                try:
+                    async with in_transaction("default"):
+                        await HourlyStat.create(bucket=bucket, platform=platform, messages=count)
+                except IntegrityError:
+                    await hourly.update(messages=F("messages") + count)
+
+    @staticmethod
+    async def forget_chat(chat_id: int, platform: str) -> None:
+        """
+        Вычитание сообщений чата из счётчиков. Вызывается до удаления сообщений.
+
+        Args:
+            chat_id: ID чата
+            platform: Платформа
+        """
+        by_role = (
+            await ChatMessage.filter(chat_id=chat_id, platform=platform)
+            .annotate(count=Count("id"))
+            .group_by("role")
+            .values("role", "count")
+        )
+        total = sum(row["count"] for row in by_role)
+        if total:
+            deltas = {"messages": -total, f"platform:{platform}": -total}
+            for row in by_role:
+                deltas[f"role:{row['role']}"] = -row["count"]
+            await StatsService._add_to_counters(deltas)
+        await ChatStat.filter(chat_id=chat_id, platform=platform).delete()
+
+    @staticmethod
+    async def subtract_messages(chat_id: int, platform: str, by_role: dict[str, int]) -> None:
+        """
+        Вычитание удалённых сообщений чата из счётчиков (частичная очистка истории).
+
+        Args:
+            chat_id: ID чата
+            platform: Платформа
+            by_role: Количество удалённых сообщений по ролям
+        """
+        total = sum(by_role.values())
+        if not total:
+            return
+        deltas = {"messages": -total, f"platform:{platform}": -total}
+        for role, count in by_role.items():
+            deltas[f"role:{role}"] = -count
+        await StatsService._add_to_counters(deltas)
+        await ChatStat.filter(chat_id=chat_id, platform=platform).update(message_count=F("message_count") - total)
+        await ChatStat.filter(chat_id=chat_id, platform=platform, message_count__lte=0).delete()
+
+    @staticmethod
+    async def reset() -> None:
+        """Сброс всех счётчиков."""
+        await StatCounter.all().delete()
+        await ChatStat.all().delete()
+        await HourlyStat.all().delete()
+
+    @staticmethod
+    async def rebuild() -> None:
+        """Пересчёт всех счётчиков по таблице сообщений."""
+        await StatsService.reset()
+
+        counters: Counter = Counter()
+        for field, prefix in (("platform", "platform:"), ("role", "role:")):
+            rows = await ChatMessage.annotate(count=Count("id")).group_by(field).values(field, "count")
+            for row in rows:
+                counters[prefix + row[field]] += row["count"]
+                if field == "platform":
+                    counters["messages"] += row["count"]
+
+        # Архивные сегменты остаются частью истории
+        chats: dict[tuple[int, str], ChatStat] = {}
+        for segment in await ArchiveSegment.all().order_by("first_id"):
+            counters["messages"] += segment.message_count
+            counters[f"platform:{segment.platform}"] += segment.message_count
+            for role, count in segment.role_counts.items():
+                counters[f"role:{role}"] += count
+            key = (segment.chat_id, segment.platform)
+            chat = chats.setdefault(
+                key,
+                ChatStat(
+                    chat_id=segment.chat_id,
+                    platform=segment.platform,
+                    chat_type=segment.chat_type,
+                    message_count=0,
+                    last_message_at=segment.last_at,
+                ),
+            )
+            chat.message_count += segment.message_count
+            if segment.last_at > chat.last_message_at:
+                chat.chat_type = segment.chat_type
+                chat.last_message_at = segment.last_at
+        await StatCounter.bulk_create([StatCounter(name=name, value=value) for name, value in counters.items()])
+
+        rows = (
+            await ChatMessage.annotate(count=Count("id"), last_message_at=Max("created_at"))
+            .group_by("chat_id", "platform", "chat_type")
+            .values("chat_id", "platform", "chat_type", "count", "last_message_at")
+        )
+        for row in rows:
+            key = (row["chat_id"], row["platform"])
+            chat = chats.get(key)
+            if chat is None:
+                chats[key] = ChatStat(
+                    chat_id=row["chat_id"],
+                    platform=row["platform"],
+                    chat_type=row["chat_type"],
+                    message_count=row["count"],
+                    last_message_at=row["last_message_at"],
+                )
+                continue
+            chat.message_count += row["count"]
+            if row["last_message_at"] > chat.last_message_at:
+                chat.chat_type = row["chat_type"]
+                chat.last_message_at = row["last_message_at"]
+        await ChatStat.bulk_create(list(chats.values()), batch_size=1000)
+
+        since = datetime.now(timezone.utc) - timedelta(days=settings.STATS_HOURLY_RETENTION_DAYS)
+        connection = sql.get_connection()
+        # Группировка по часу в БД: в приложение приходит по строке на час и платформу
+        if sql.is_postgres(connection):
+            hour = "date_trunc('hour', created_at AT TIME ZONE 'UTC')"
+        else:
+            hour = "strftime('%Y-%m-%d %H:00:00', created_at)"
+        hourly = await sql.fetch_tuples(
+            f"SELECT {hour}, platform, COUNT(*) FROM chat_messages WHERE created_at >= ? GROUP BY 1, 2",
+            [sql.datetime_param(since, connection)],
+            connection,
+        )
+        await HourlyStat.bulk_create(
+            [
+                HourlyStat(bucket=sql.to_datetime(bucket), platform=platform, messages=n)
+                for bucket, platform, n in hourly
+            ],
+            batch_size=1000,
+        )
+        logger.info("Счётчики статистики пересчитаны: %s сообщений, %s чатов", counters["messages"], len(chats))
+
+    @staticmethod
+    async def ensure_initialized() -> None:
+        """Заполнение счётчиков для уже существующей истории (первый запуск после обновления)."""
+        if await StatCounter.exists() or not (await ChatMessage.exists() or await ArchiveSegment.exists()):
+            return
+        await StatsService.rebuild()
+
+    @staticmethod
+    @on_read_replica
+    async def get_summary() -> dict[str, Any]:
+        """Сводная статистика по счётчикам."""
+        counters = dict(await StatCounter.all().values_list("name", "value"))
+        now = datetime.now(timezone.utc)
+        first_bucket = _hour(now) - timedelta(hours=23)
+        hourly = await HourlyStat.filter(bucket__gte=first_bucket).values_list("messages", flat=True)
+
+        return {
+            "chats_count": await ChatStat.all().count(),
+            "total_messages": counters.get("messages", 0),
+            "telegram_messages": counters.get("platform:telegram", 0),
+            "discord_messages": counters.get("platform:discord", 0),
+            "messages_24h": sum(hourly),
+            "active_chats_24h": await ChatStat.filter(last_message_at__gte=now - timedelta(days=1)).count(),
+            "assistant_messages": counters.get("role:assistant", 0),
+            "user_messages": counters.get("role:user", 0),
+        }
+
+    @staticmethod
+    @on_read_replica
+    async def get_hourly_activity(hours: int = 24) -> list[dict[str, Any]]:
+        """
+        Количество сообщений по часам за последние hours часов (включая текущий).
+
+        Returns:
+            Список {"bucket", "telegram", "discord", "total"} по возрастанию времени
+        """
+        first_bucket = _hour(datetime.now(timezone.utc)) - timedelta(hours=hours - 1)
+        rows = await HourlyStat.filter(bucket__gte=first_bucket).values_list("bucket", "platform", "messages")
+        by_bucket: dict[datetime, Counter] = defaultdict(Counter)
+        for bucket, platform, messages in rows:
+            by_bucket[_hour(bucket)][platform] += messages
+
+        return [
+            StatsService._point(first_bucket + timedelta(hours=i), by_bucket.get(first_bucket + timedelta(hours=i)))
+            for i in range(hours)
+        ]
+
+    @staticmethod
+    @on_read_replica
+    async def get_daily_activity(days: int = 30) -> list[dict[str, Any]]:
+        """
+        Количество сообщений по дням (UTC) за последние days дней (включая текущий).
+
+        Returns:
+            Список {"bucket", "telegram", "discord", "total"} по возрастанию даты
+        """
+        today = _hour(datetime.now(timezone.utc)).replace(hour=0)
+        first_day = today - timedelta(days=days - 1)
+        rows = await HourlyStat.filter(bucket__gte=first_day).values_list("bucket", "platform", "messages")
+        by_day: dict[datetime, Counter] = defaultdict(Counter)
+        for bucket, platform, messages in rows:
+            by_day[_hour(bucket).replace(hour=0)][platform] += messages
+
+        return [
+            StatsService._point(first_day + timedelta(days=i), by_day.get(first_day + timedelta(days=i)))
+            for i in range(days)
+        ]
+
+    @staticmethod
+    def _point(bucket: datetime, counts: Counter | None) -> dict[str, Any]:
+        counts = counts or Counter()
+        return {
+            "bucket": bucket,
+            "telegram": counts["telegram"],
+            "discord": counts["discord"],
+            "total": sum(counts.values()),
+        }
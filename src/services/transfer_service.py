@@ -0,0 +1,208 @@
+"""
+Экспорт и импорт истории сообщений.
+
+Экспорт читает сообщения пачками по первичному ключу и сразу отдаёт их
+в NDJSON или CSV (при необходимости сжимая gzip), поэтому память не зависит
+от объёма истории. Импорт читает и разбирает файл пачками в отдельном потоке
+(распаковка и разбор не блокируют цикл событий) и вставляет каждую пачку в своей
+транзакции вместе с обновлением счётчиков статистики: через COPY на Postgres и
+bulk_create на SQLite. Блокировка записи SQLite держится только на время пачки.
+"""
+
+import asyncio
+import csv
+import gzip
+import io
+import json
+import logging
+import zlib
+from datetime import datetime, timezone
+from typing import IO, Any, AsyncIterator, Iterator, Optional
+
+from tortoise.transactions import in_transaction
+
+from src.database import ChatMessage, sql
+from src.database.replica import on_read_replica
+from src.services.archive_service import ArchiveService
+from src.services.stats_service import StatsDelta, StatsService
+
+logger = logging.getLogger("services.transfer")
+
+EXPORT_FIELDS = ["id", "chat_id", "platform", "chat_type", "role", "nickname", "content", "created_at"]
+IMPORT_COLUMNS = ["chat_id", "platform", "chat_type", "role", "nickname", "content", "created_at"]
+FORMATS = ("ndjson", "csv")
+
+
+class TransferService:
+    """Сервис экспорта и импорта истории."""
+
+    @staticmethod
+    @on_read_replica
+    async def iter_messages(
+        chat_id: Optional[int] = None,
+        platform: Optional[str] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        archived: bool = False,
+        chunk_size: int = 1000,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """
+        Сообщения по возрастанию id, прочитанные пачками по chunk_size.
+
+        С archived сначала отдаются сообщения архивных сегментов, затем таблицы.
+        """
+        if archived:
+            async for row in ArchiveService.iter_messages(chat_id, platform, date_from, date_to):
+                yield {field: row.get(field) for field in EXPORT_FIELDS}
+
+        query = ChatMessage.all()
+        if chat_id is not None:
+            query = query.filter(chat_id=chat_id)
+        if platform:
+            query = query.filter(platform=platform)
+        if date_from is not None:
+            query = query.filter(created_at__gte=date_from)
+        if date_to is not None:
+            query = query.filter(created_at__lt=date_to)
+
+        last_id = 0
+        while True:
+            rows = await query.filter(id__gt=last_id).order_by("id").limit(chunk_size).values(*EXPORT_FIELDS)
+            for row in rows:
+                yield row
+            if len(rows) < chunk_size:
+                return
+            last_id = rows[-1]["id"]
+
+    @staticmethod
+    async def export(fmt: str = "ndjson", compress: bool = False, **filters) -> AsyncIterator[bytes]:
+        """
+        Потоковый экспорт истории.
+
+        Args:
+            fmt: Формат (ndjson, csv)
+            compress: Сжимать gzip
+            **filters: Фильтры iter_messages (chat_id, platform, date_from, date_to, archived)
+
+        Yields:
+            Части файла
+        """
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown format: {fmt}")
+        compressor = zlib.compressobj(wbits=31) if compress else None
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS) if fmt == "csv" else None
+        if writer is not None:
+            writer.writeheader()
+
+        count = 0
+        async for row in TransferService.iter_messages(**filters):
+            row["created_at"] = row["created_at"].isoformat() if row["created_at"] else None
+            if writer is not None:
+                writer.writerow(row)
+            else:
+                buffer.write(json.dumps(row, ensure_ascii=False))
+                buffer.write("\n")
+            count += 1
+
+            if buffer.tell() >= 64 * 1024:
+                data = buffer.getvalue().encode("utf-8")
+                buffer.seek(0)
+                buffer.truncate()
+                yield compressor.compress(data) if compressor else data
+
+        data = buffer.getvalue().encode("utf-8")
+        if compressor:
+            data = compressor.compress(data) + compressor.flush()
+        if data:
+            yield data
+        logger.info("Экспортировано сообщений: %s (%s%s)", count, fmt, ", gzip" if compress else "")
+
+    @staticmethod
+    def _read_records(file: IO[bytes], fmt: str) -> Iterator[tuple]:
+        """Построчное чтение файла импорта в кортежи IMPORT_COLUMNS."""
+        head = file.read(2)
+        file.seek(0)
+        raw = gzip.GzipFile(fileobj=file, mode="rb") if head == b"\x1f\x8b" else file
+        text = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+
+        if fmt == "csv":
+            rows = csv.DictReader(text)
+        else:
+            rows = (json.loads(line) for line in text if line.strip())
+
+        now = datetime.now(timezone.utc)
+        for number, row in enumerate(rows, start=1):
+            try:
+                created_at = row.get("created_at")
+                created_at = sql.to_datetime(created_at) if created_at else now
+                yield (
+                    int(row["chat_id"]),
+                    row.get("platform") or "telegram",
+                    row.get("chat_type") or "private",
+                    row["role"],
+                    row.get("nickname") or None,
+                    row["content"],
+                    created_at,
+                )
+            except (KeyError, TypeError, ValueError) as e:
+                raise ValueError(f"Record {number}: invalid or missing field ({e})") from e
+
+    @staticmethod
+    def _batches(records: Iterator[tuple], batch_size: int) -> Iterator[list[tuple]]:
+        batch = []
+        for record in records:
+            batch.append(record)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    @staticmethod
+    async def import_file(file: IO[bytes], fmt: str = "ndjson", batch_size: int = 5000) -> int:
+        """
+        Импорт истории из файла NDJSON или CSV (в том числе сжатого gzip).
+
+        Каждая пачка вставляется в своей транзакции: при ошибке пачки, вставленные
+        до неё, остаются сохранены, а ошибочная пачка откатывается целиком.
+        Идентификаторы сообщений назначаются заново.
+
+        Args:
+            file: Бинарный файл
+            fmt: Формат (ndjson, csv)
+            batch_size: Размер пачки вставки
+
+        Returns:
+            Количество импортированных сообщений
+
+        Raises:
+            ValueError: Неизвестный формат или некорректная запись
+        """
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown format: {fmt}")
+        batches = TransferService._batches(TransferService._read_records(file, fmt), batch_size)
+        count = 0
+
+        while True:
+            try:
+                batch = await asyncio.to_thread(next, batches, None)
+            except ValueError as e:
+                raise ValueError(f"{e}; imported before the error: {count}") from e
+            if batch is None:
+                break
+            # Счётчики статистики дополняются сообщениями пачки в той же транзакции
+            delta = StatsDelta()
+            for chat_id, platform, chat_type, role, _, _, created_at in batch:
+                delta.add(chat_id, platform, chat_type, role, created_at)
+            async with in_transaction("default") as tx:
+                if sql.is_postgres(tx):
+                    async with tx.acquire_connection() as raw:
+                        await raw.copy_records_to_table("chat_messages", records=batch, columns=IMPORT_COLUMNS)
+                else:
+                    await ChatMessage.bulk_create([ChatMessage(**dict(zip(IMPORT_COLUMNS, r))) for r in batch])
+                await StatsService.apply(delta)
+            count += len(batch)
+
+        logger.info("Импортировано сообщений: %s (%s)", count, fmt)
+        return count
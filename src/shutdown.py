@@ -0,0 +1,87 @@
+"""
+Дренаж при остановке приложения.
+
+После остановки приёма обновлений процесс не закрывает соединения сразу, а ждёт
+(не дольше SHUTDOWN_DRAIN_TIMEOUT) завершения начатой работы: обработки уже
+полученных обновлений, отложенных и выполняющихся генераций, исходящих сообщений.
+Только после этого останавливаются очереди, сбрасывается очередь записи и
+закрываются пулы соединений. Прогресс пишется в лог.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Callable, Optional
+
+logger = logging.getLogger("bot.shutdown")
+
+
+class ShutdownDrain:
+    """Ожидание завершения начатой работы перед остановкой."""
+
+    # Как часто проверять счётчики и как часто писать прогресс в лог, секунды
+    POLL_INTERVAL = 0.1
+    LOG_INTERVAL = 1.0
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        """Сброс состояния при запуске приложения."""
+        self.draining = False
+        self.started: Optional[float] = None
+        self.duration: Optional[float] = None
+        self.remaining: dict[str, int] = {}
+        self.timed_out = False
+
+    def begin(self) -> None:
+        """Начало дренажа: платформы перестают принимать новые сообщения."""
+        self.draining = True
+        self.started = time.perf_counter()
+        logger.info("Остановка: приём новых обновлений прекращён, ожидание начатой работы")
+
+    async def wait(self, sources: dict[str, Callable[[], int]], timeout: float) -> bool:
+        """
+        Ожидание, пока все источники не сообщат об отсутствии работы.
+
+        Args:
+            sources: Имя источника -> функция, возвращающая количество незавершённой работы
+            timeout: Предельное время ожидания, секунды (0 или меньше — не ждать)
+
+        Returns:
+            True если работа завершилась до истечения времени
+        """
+        if self.started is None:
+            self.begin()
+        deadline = time.perf_counter() + max(0.0, timeout)
+        next_log = time.perf_counter()
+        while True:
+            self.remaining = {name: count() for name, count in sources.items()}
+            busy = {name: count for name, count in self.remaining.items() if count}
+            now = time.perf_counter()
+            if not busy:
+                break
+            if now >= deadline:
+                self.timed_out = True
+                logger.warning(
+                    "Дренаж прерван по таймауту %.0f с, не завершено: %s",
+                    timeout,
+                    ", ".join(f"{name} {count}" for name, count in busy.items()),
+                )
+                break
+            if now >= next_log:
+                logger.info(
+                    "Дренаж: %s (осталось %.0f с)",
+                    ", ".join(f"{name} {count}" for name, count in busy.items()),
+                    deadline - now,
+                )
+                next_log = now + self.LOG_INTERVAL
+            await asyncio.sleep(self.POLL_INTERVAL)
+
+        self.duration = time.perf_counter() - self.started
+        if not self.timed_out:
+            logger.info("Дренаж завершён за %.2f с", self.duration)
+        return not self.timed_out
+
+
+shutdown_drain = ShutdownDrain()
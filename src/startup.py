@@ -0,0 +1,64 @@
+"""
+Замер времени запуска приложения по этапам и занятой памяти.
+
+Отсчёт идёт от импорта модуля (src.main импортирует его первым), этапы отмечаются
+вызовами mark(). Итог пишется в лог при готовности и отдаётся в /admin/api/metrics.
+"""
+
+import logging
+import resource
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+logger = logging.getLogger("bot.startup")
+
+
+def rss_bytes() -> int:
+    """Текущий RSS процесса (на Linux — из /proc, иначе пиковый из getrusage)."""
+    try:
+        for line in Path("/proc/self/status").read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class StartupReport:
+    """Длительность этапов запуска и RSS процесса."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._last = self.started
+        self.phases: dict[str, float] = {}
+        self.total: Optional[float] = None
+        self.rss: Optional[int] = None
+
+    def mark(self, phase: str) -> None:
+        """Завершение этапа: время с предыдущей отметки."""
+        now = time.perf_counter()
+        self.phases[phase] = now - self._last
+        self._last = now
+
+    def ready(self) -> None:
+        """Приложение готово принимать запросы."""
+        self.total = time.perf_counter() - self.started
+        self.rss = rss_bytes()
+        logger.info(
+            "Запуск занял %.2f с (%s), RSS %.1f МБ",
+            self.total,
+            ", ".join(f"{phase} {seconds * 1000:.0f} мс" for phase, seconds in self.phases.items()),
+            self.rss / 1024 / 1024,
+        )
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "total_ms": round(self.total * 1000, 1) if self.total is not None else None,
+            "phases_ms": {phase: round(seconds * 1000, 1) for phase, seconds in self.phases.items()},
+            "rss_at_ready_mb": round(self.rss / 1024 / 1024, 1) if self.rss is not None else None,
+            "rss_mb": round(rss_bytes() / 1024 / 1024, 1),
+        }
+
+
+startup_report = StartupReport()
@@ -1,13 +1,45 @@
+import csv
+import gzip
+import json
 import time
+import zlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
 from pathlib import Path
-from typing import Annotated
+from typing import Annotated, AsyncIterator, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Request, Form, status
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, Form, UploadFile, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse, Response, StreamingResponse
 from fastapi.templating import Jinja2Templates
 
-from src.services import HistoryService, LLMService, SettingsService, UserService
+from src.services import (
+    ArchiveService,
+    HistoryService,
+    LLMService,
+    RetentionService,
+    SearchService,
+    SettingsService,
+    StatsService,
+    TransferService,
+    UserService,
+    admin_cache,
+    chat_dispatcher,
+    job_manager,
+    message_debouncer,
+    outbound_dispatcher,
+    retention_scheduler,
+    state_backend,
+    INSTANCE_ID,
+)
+from src.services.archive_service import segment_cache
+from src.services.cache import CacheEntry
 from src.database.models import AllowedChat, Setting
+from src.database import pool
+from src.database.replica import replica_router
+from src.database.writer import write_queue
+from src.startup import startup_report
+from src.bot.platforms import platform_manager
 from config import settings
 
 BASE_DIR = Path(__file__).resolve().parent
@@ -61,27 +93,57 @@ async def logout():
     return response
 
 
+async def _load_stats() -> dict:
+    return await HistoryService.get_stats()
+
+
+def _conditional_json(request: Request, entry: CacheEntry) -> Response:
+    """Ответ из снимка кэша с поддержкой If-None-Match / If-Modified-Since."""
+    headers = {
+        "ETag": entry.etag,
+        "Last-Modified": format_datetime(entry.last_modified, usegmt=True),
+        "Cache-Control": "private, no-cache",
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if entry.etag in [tag.strip() for tag in if_none_match.split(",")]:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    elif request.headers.get("if-modified-since"):
+        try:
+            since = parsedate_to_datetime(request.headers["if-modified-since"])
+            if entry.last_modified <= since:
+                return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        except (TypeError, ValueError):
+            pass
+
+    return JSONResponse(content=jsonable_encoder(entry.value), headers=headers)
+
+
+# Канал общего состояния, через который реплики админки сбрасывают кэш друг друга
+CACHE_INVALIDATION_CHANNEL = "admin:cache-invalidate"
+
+
+def invalidate_dashboard_cache() -> None:
+    """Сброс снимков статистики и списка чатов после изменений из админки (во всех репликах)."""
+    admin_cache.invalidate()
+    state_backend.publish_nowait(CACHE_INVALIDATION_CHANNEL, {"origin": INSTANCE_ID})
+
+
+async def listen_cache_invalidations() -> None:
+    """Сброс кэша по событиям других реплик; выполняется до отмены задачи."""
+    async with await state_backend.subscribe(CACHE_INVALIDATION_CHANNEL) as subscription:
+        async for message in subscription:
+            if message.get("origin") != INSTANCE_ID:
+                admin_cache.invalidate()
+
+
 @router.get("", response_class=HTMLResponse)
 async def admin_page(
     request: Request, 
     user: str = Depends(verify_session)
 ):
-    stats = await HistoryService.get_stats()
-    raw_chats = await HistoryService.list_chats()
-    
-    chats = []
-    for chat in raw_chats:
-        chat_id = int(chat["chat_id"])
-        platform = chat["platform"]
-        
-        allowed = await AllowedChat.get_or_none(chat_id=chat_id, platform=platform)
-        if allowed:
-            chat["is_allowed"] = allowed.is_active  # Use the actual is_active status
-            chat["title"] = allowed.title
-        else:
-            chat["is_allowed"] = False
-            chat["title"] = f"Chat {chat_id}"
-        chats.append(chat)
+    stats = (await admin_cache.get("stats", _load_stats)).value
     
     System_prompt = await SettingsService.get_system_prompt()
     connections = await LLMService.list_connections()
@@ -92,7 +154,6 @@ async def admin_page(
             "request": request,
             "user": user,
             "stats": stats,
-            "chats": chats,
             "prompt": System_prompt,
             "connections": connections,
             "now_timestamp": int(time.time()),
@@ -109,39 +170,302 @@ async def verify_api_session(request: Request):
     return user
 
 @router.get("/api/stats")
-async def api_stats(_: Annotated[str, Depends(verify_api_session)]) -> dict:
-    return await HistoryService.get_stats()
+async def api_stats(request: Request, _: Annotated[str, Depends(verify_api_session)]) -> Response:
+    return _conditional_json(request, await admin_cache.get("stats", _load_stats))
+
+
+@router.get("/api/stats/activity")
+async def api_stats_activity(
+    request: Request,
+    _: Annotated[str, Depends(verify_api_session)],
+    period: str = "hourly",
+) -> Response:
+    if period == "hourly":
+        loader = lambda: StatsService.get_hourly_activity(hours=48)
+    elif period == "daily":
+        loader = lambda: StatsService.get_daily_activity(days=30)
+    else:
+        raise HTTPException(status_code=400, detail="period must be 'hourly' or 'daily'")
+    return _conditional_json(request, await admin_cache.get(f"activity:{period}", loader))
+
+
+@router.get("/api/metrics")
+async def api_metrics(request: Request, _: Annotated[str, Depends(verify_api_session)]) -> dict:
+    update_queue = getattr(request.app.state, "update_queue", None)
+    return {
+        "dispatcher": chat_dispatcher.stats(),
+        "debounce": message_debouncer.stats(),
+        "outbound": outbound_dispatcher.stats(),
+        "admin_cache": admin_cache.stats(),
+        "jobs": job_manager.stats(),
+        "retention": retention_scheduler.stats(),
+        "archive_cache": segment_cache.stats(),
+        "sqlite_writer": write_queue.stats(),
+        "state": state_backend.stats(),
+        "postgres_pool": pool.stats(),
+        "read_replica": replica_router.stats(),
+        "telegram_updates": update_queue.stats() if update_queue else None,
+        "startup": startup_report.stats(),
+        "platforms": platform_manager.stats(),
+    }
 
 
 @router.get("/api/chats")
-async def api_chats(_: Annotated[str, Depends(verify_api_session)]) -> list:
-    chats = await HistoryService.list_chats()
-    
-    # Добавляем информацию о белом списке
-    for chat in chats:
-        chat_id = int(chat["chat_id"])
-        platform = chat["platform"]
-        allowed = await AllowedChat.get_or_none(chat_id=chat_id, platform=platform)
-        if allowed:
-            chat["is_allowed"] = allowed.is_active
-            chat["title"] = allowed.title
+async def api_chats(
+    request: Request,
+    _: Annotated[str, Depends(verify_api_session)],
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    sort: str = "last_activity",
+    order: str = "desc",
+    platform: Optional[str] = None,
+    whitelisted: Optional[bool] = None,
+    q: Optional[str] = None,
+) -> Response:
+    params = {
+        "limit": limit,
+        "cursor": cursor,
+        "sort": sort,
+        "order": order,
+        "platform": platform,
+        "whitelisted": whitelisted,
+        "search": q,
+    }
+
+    async def loader() -> dict:
+        return await HistoryService.list_chats(**params)
+
+    # Снимок на каждую страницу и набор фильтров; сбрасывается вместе со статистикой
+    key = "chats:" + json.dumps(params, sort_keys=True, ensure_ascii=False)
+    try:
+        return _conditional_json(request, await admin_cache.get(key, loader))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/chats/{platform}/{chat_id}", response_class=HTMLResponse)
+async def transcript_page(
+    request: Request,
+    platform: str,
+    chat_id: int,
+    user: str = Depends(verify_session)
+):
+    chat = await AllowedChat.get_or_none(chat_id=chat_id, platform=platform)
+    return templates.TemplateResponse(
+        "transcript.html",
+        {
+            "request": request,
+            "user": user,
+            "chat_id": chat_id,
+            "platform": platform,
+            "title": chat.title if chat and chat.title else f"Chat {chat_id}",
+            "now_timestamp": int(time.time()),
+        }
+    )
+
+
+async def _stream_transcript(chat_id: int, platform: str, **page) -> AsyncIterator[str]:
+    """JSON-страница переписки, отдаваемая по мере чтения сообщений из БД."""
+    first_id = last_id = None
+    yield '{"messages": ['
+    async for row in HistoryService.iter_transcript(chat_id, platform=platform, **page):
+        if first_id is None:
+            first_id = row["id"]
         else:
-            chat["is_allowed"] = False
-            chat["title"] = f"Chat {chat_id}"
-            
-    return chats
+            yield ","
+        last_id = row["id"]
+        yield json.dumps(jsonable_encoder(row), ensure_ascii=False)
+
+    prev_cursor = next_cursor = None
+    if first_id is not None:
+        if await HistoryService.has_messages(chat_id, platform=platform, before=first_id):
+            prev_cursor = first_id
+        if await HistoryService.has_messages(chat_id, platform=platform, after=last_id):
+            next_cursor = last_id
+    yield f'], "prev_cursor": {json.dumps(prev_cursor)}, "next_cursor": {json.dumps(next_cursor)}}}'
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Дата из параметра запроса в UTC (без часового пояса считается UTC)."""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+@router.get("/api/chats/{platform}/{chat_id}/messages")
+async def api_chat_messages(
+    platform: str,
+    chat_id: int,
+    _: Annotated[str, Depends(verify_api_session)],
+    limit: int = Query(100, ge=1, le=5000),
+    before: Optional[int] = None,
+    after: Optional[int] = None,
+    at: Optional[datetime] = None,
+) -> StreamingResponse:
+    if sum(x is not None for x in (before, after, at)) > 1:
+        raise HTTPException(status_code=400, detail="Only one of before, after, at may be given")
+    return StreamingResponse(
+        _stream_transcript(chat_id, platform, limit=limit, before=before, after=after, at=_as_utc(at)),
+        media_type="application/json",
+    )
+
+
+@router.get("/api/search")
+async def api_search(
+    _: Annotated[str, Depends(verify_api_session)],
+    q: str,
+    platform: Optional[str] = None,
+    chat_id: Optional[int] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=10000),
+) -> dict:
+    return await SearchService.search(
+        q,
+        platform=platform,
+        chat_id=chat_id,
+        date_from=date_from,
+        date_to=date_to,
+        limit=limit,
+        offset=offset,
+    )
+
+
+@router.get("/api/export")
+async def api_export(
+    _: Annotated[str, Depends(verify_api_session)],
+    fmt: str = Query("ndjson", alias="format"),
+    compress: bool = Query(False, alias="gzip"),
+    chat_id: Optional[int] = None,
+    platform: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    archived: bool = False,
+) -> StreamingResponse:
+    if fmt not in ("ndjson", "csv"):
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'csv'")
+    filename = f"chat_history.{fmt}" + (".gz" if compress else "")
+    media_type = "application/gzip" if compress else ("text/csv" if fmt == "csv" else "application/x-ndjson")
+    return StreamingResponse(
+        TransferService.export(
+            fmt,
+            compress=compress,
+            chat_id=chat_id,
+            platform=platform,
+            date_from=_as_utc(date_from),
+            date_to=_as_utc(date_to),
+            archived=archived,
+        ),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.post("/api/import")
+async def api_import(
+    _: Annotated[str, Depends(verify_api_session)],
+    file: UploadFile = File(...),
+    fmt: Optional[str] = Form(None, alias="format"),
+) -> dict:
+    if fmt is None:
+        name = (file.filename or "").removesuffix(".gz")
+        fmt = "csv" if name.endswith(".csv") else "ndjson"
+    try:
+        imported = await TransferService.import_file(file.file, fmt=fmt)
+    except (ValueError, csv.Error, gzip.BadGzipFile, EOFError, zlib.error) as e:
+        # Некорректный CSV и повреждённый gzip (обрезанный или не gzip после сигнатуры) — ошибка клиента
+        raise HTTPException(status_code=400, detail=str(e))
+    invalidate_dashboard_cache()
+    return {"imported": imported}
+
+
+@router.get("/api/jobs")
+async def api_jobs(_: Annotated[str, Depends(verify_api_session)]) -> list:
+    return [job.to_dict() for job in job_manager.list()]
+
+
+@router.get("/api/jobs/{job_id}")
+async def api_job(job_id: int, _: Annotated[str, Depends(verify_api_session)]) -> dict:
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+
+@router.post("/api/jobs/{job_id}/cancel")
+async def api_cancel_job(job_id: int, _: Annotated[str, Depends(verify_api_session)]) -> dict:
+    return {"ok": await job_manager.cancel(job_id)}
+
+
+@router.get("/api/retention/policies")
+async def api_retention_policies(_: Annotated[str, Depends(verify_api_session)]) -> list:
+    return [
+        {
+            "id": p.id,
+            "platform": p.platform,
+            "chat_id": str(p.chat_id) if p.chat_id is not None else None,
+            "max_age_days": p.max_age_days,
+            "max_messages": p.max_messages,
+        }
+        for p in await RetentionService.list_policies()
+    ]
+
+
+@router.post("/api/retention/policies")
+async def api_set_retention_policy(request: Request, _: Annotated[str, Depends(verify_api_session)]) -> dict:
+    data = await request.json()
+    try:
+        chat_id = data.get("chat_id")
+        policy = await RetentionService.set_policy(
+            platform=data.get("platform") or None,
+            chat_id=int(chat_id) if chat_id not in (None, "") else None,
+            max_age_days=data.get("max_age_days"),
+            max_messages=data.get("max_messages"),
+        )
+    except (TypeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"id": policy.id}
+
+
+@router.delete("/api/retention/policies/{policy_id}")
+async def api_delete_retention_policy(policy_id: int, _: Annotated[str, Depends(verify_api_session)]) -> dict:
+    if not await RetentionService.delete_policy(policy_id):
+        raise HTTPException(status_code=404, detail="Policy not found")
+    return {"ok": True}
+
+
+@router.post("/api/retention/run")
+async def api_run_retention(_: Annotated[str, Depends(verify_api_session)]) -> dict:
+    return RetentionService.start_job().to_dict()
+
+
+@router.get("/api/archive")
+async def api_archive(_: Annotated[str, Depends(verify_api_session)]) -> dict:
+    return {"after_days": settings.ARCHIVE_AFTER_DAYS, **await ArchiveService.stats()}
+
+
+@router.post("/api/archive/run")
+async def api_run_archive(_: Annotated[str, Depends(verify_api_session)]) -> dict:
+    if settings.ARCHIVE_AFTER_DAYS <= 0:
+        raise HTTPException(status_code=400, detail="Archiving is disabled (ARCHIVE_AFTER_DAYS=0)")
+    return ArchiveService.start_job().to_dict()
 
 
 @router.post("/api/clear-all")
 async def api_clear_all(_: Annotated[str, Depends(verify_api_session)]) -> dict:
-    await HistoryService.clear_all_history()
-    return {"ok": True}
+    job = HistoryService.start_clear_all_job()
+    job.task.add_done_callback(lambda _: invalidate_dashboard_cache())
+    return job.to_dict()
 
 
 @router.post("/api/clear/{chat_id}/{platform}")
 async def api_clear_chat(chat_id: int, platform: str, _: Annotated[str, Depends(verify_api_session)]) -> dict:
-    await HistoryService.clear_history(chat_id, platform=platform)
-    return {"ok": True}
+    job = HistoryService.start_clear_job(chat_id, platform=platform)
+    job.task.add_done_callback(lambda _: invalidate_dashboard_cache())
+    return job.to_dict()
 
 
 @router.get("/api/prompt")
@@ -334,6 +658,7 @@ async def api_add_whitelist(request: Request, _: Annotated[str, Depends(verify_a
          raise HTTPException(status_code=400, detail="Chat ID already in whitelist")
 
     chat = await AllowedChat.create(chat_id=chat_id, title=title, platform=platform, is_active=True)
+    invalidate_dashboard_cache()
     return {"id": chat.id}
 
 
@@ -342,6 +667,7 @@ async def api_delete_whitelist(item_id: int, _: Annotated[str, Depends(verify_ap
     deleted_count = await AllowedChat.filter(id=item_id).delete()
     if not deleted_count:
         raise HTTPException(status_code=404, detail="Item not found")
+    invalidate_dashboard_cache()
     return {"ok": True}
 
 
@@ -353,6 +679,7 @@ async def api_toggle_whitelist(item_id: int, request: Request, _: Annotated[str,
     updated_count = await AllowedChat.filter(id=item_id).update(is_active=is_active)
     if not updated_count:
         raise HTTPException(status_code=404, detail="Item not found")
+    invalidate_dashboard_cache()
     return {"ok": True}
 
 
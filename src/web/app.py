@@ -2,6 +2,7 @@ import asyncio
 import logging
 from contextlib import asynccontextmanager
 from pathlib import Path
+from typing import Iterable, Optional
 
 from aiogram import Bot
 from aiogram.types import Update
@@ -12,59 +13,183 @@ from tortoise import Tortoise
 from tortoise.exceptions import DoesNotExist, OperationalError, IntegrityError
 
 from config import Settings
-from src.bot.discord import discord_bot
+from src.bot.platforms import platform_manager
+from src.bot.telegram.handlers import set_bot_identity
+from src.bot.telegram.update_queue import UpdateQueue
+from src.database import partitioning, pool, sql
 from src.database.config import get_tortoise_config
-from src.web.admin import router as admin_router
+from src.database.fulltext import ensure_fulltext_index
+from src.database.writer import write_queue
+from src.services import (
+    StatsService,
+    chat_dispatcher,
+    job_manager,
+    message_debouncer,
+    outbound_dispatcher,
+    retention_scheduler,
+    state_backend,
+)
+from src.shutdown import shutdown_drain
+from src.startup import startup_report
+from src.web.admin import listen_cache_invalidations, router as admin_router
 
+# Компоненты приложения, которые может обслуживать процесс
+TELEGRAM = "telegram"
+DISCORD = "discord"
+ADMIN = "admin"
+MAINTENANCE = "maintenance"
+COMPONENTS = frozenset({TELEGRAM, DISCORD, ADMIN, MAINTENANCE})
 
-def create_app(bot: Bot, dp, use_webhook: bool = False) -> FastAPI:
+# Роли процессов: всё в одном процессе или по процессу на компонент с общей БД
+ROLES = {
+    "all": COMPONENTS,
+    "telegram-worker": frozenset({TELEGRAM}),
+    "discord-worker": frozenset({DISCORD}),
+    "admin-web": frozenset({ADMIN}),
+    "maintenance": frozenset({MAINTENANCE}),
+}
+
+
+def create_app(
+    bot: Optional[Bot],
+    dp,
+    use_webhook: bool = False,
+    components: Iterable[str] = COMPONENTS,
+    role: str = "all",
+) -> FastAPI:
+    """
+    Создание приложения для набора компонентов.
+
+    Args:
+        bot: Telegram бот (нужен только компоненту telegram)
+        dp: Диспетчер aiogram
+        use_webhook: Получать обновления Telegram через webhook, а не polling
+        components: Компоненты, которые обслуживает процесс
+        role: Имя роли процесса (для /health и логов)
+    """
     settings = Settings()
+    components = frozenset(components)
+    unknown = components - COMPONENTS
+    if unknown:
+        raise ValueError(f"Unknown components: {sorted(unknown)}")
+    telegram = TELEGRAM in components
+    update_queue = UpdateQueue(
+        bot,
+        dp,
+        workers=settings.TELEGRAM_UPDATE_WORKERS,
+        maxsize=settings.TELEGRAM_UPDATE_QUEUE_SIZE,
+        enqueue_timeout=settings.TELEGRAM_UPDATE_ENQUEUE_TIMEOUT,
+    ) if telegram else None
+    polling_task: Optional[asyncio.Task] = None
+    invalidation_task: Optional[asyncio.Task] = None
 
     @asynccontextmanager
     async def lifespan(app: FastAPI):
+        nonlocal polling_task, invalidation_task
         logger = logging.getLogger("bot.startup")
+        logger.info("Роль процесса: %s (%s)", role, ", ".join(sorted(components)))
+        shutdown_drain.reset()
+        startup_report.mark("app")
         await Tortoise.init(config=get_tortoise_config())
         logger.info("Tortoise ORM инициализирован")
+        await pool.warm_up()
+        startup_report.mark("database")
+        if MAINTENANCE in components:
+            await StatsService.ensure_initialized()
+        await partitioning.setup()
+        await ensure_fulltext_index()
+        if settings.SQLITE_WRITE_QUEUE and not sql.is_postgres() and (telegram or DISCORD in components):
+            write_queue.start()
+        if MAINTENANCE in components:
+            retention_scheduler.start()
+        if ADMIN in components:
+            invalidation_task = asyncio.create_task(listen_cache_invalidations(), name="admin-cache-invalidation")
+        startup_report.mark("services")
 
-        try:
-            bot_user = await bot.get_me()
-            logger.info("Бот успешно подключен: @%s (ID: %s)", bot_user.username, bot_user.id)
-        except Exception as e:
-            logger.error("Ошибка при проверке подключения бота: %s", e)
-
-        if use_webhook:
-            url = f"{settings.BASE_WEBHOOK_URL.rstrip('/')}{settings.WEBHOOK_PATH}"
-            secret = settings.WEBHOOK_SECRET or None
-            await bot.set_webhook(url, secret_token=secret)
-            logger.info("Запуск в режиме WEBHOOK: %s", url)
-        else:
-            await bot.delete_webhook(drop_pending_updates=True)
-            logger.info("Запуск в режиме POLLING (в фоне)")
-            asyncio.create_task(dp.start_polling(bot))
+        if telegram:
+            try:
+                bot_user = await bot.get_me()
+                await set_bot_identity(bot_user)
+                logger.info("Бот успешно подключен: @%s (ID: %s)", bot_user.username, bot_user.id)
+            except Exception as e:
+                logger.error("Ошибка при проверке подключения бота: %s", e)
 
-        try:
-            logger.info("Инициализация Discord бота...")
-            asyncio.create_task(discord_bot.start())
-        except Exception as e:
-             logger.error(f"Не удалось запустить Discord бота: {e}")
+            if use_webhook:
+                update_queue.start()
+                url = f"{settings.BASE_WEBHOOK_URL.rstrip('/')}{settings.WEBHOOK_PATH}"
+                secret = settings.WEBHOOK_SECRET or None
+                await bot.set_webhook(url, secret_token=secret)
+                logger.info("Запуск в режиме WEBHOOK: %s", url)
+            else:
+                await bot.delete_webhook(drop_pending_updates=True)
+                logger.info("Запуск в режиме POLLING (в фоне)")
+                # Сигналы остановки обрабатывает uvicorn, polling останавливается в lifespan
+                polling_task = asyncio.create_task(
+                    dp.start_polling(bot, handle_signals=False, close_bot_session=False), name="telegram-polling"
+                )
+
+        if DISCORD in components:
+            platform_manager.start()
+        startup_report.mark("bots")
+        startup_report.ready()
 
         yield
 
-        logger.info("Завершение работы приложения...")
-        try:
-            await discord_bot.stop()
-            logger.info("Discord бот остановлен.")
-        except Exception as e:
-            logger.error(f"Ошибка при остановке Discord бота: {e}")
+        logger.info("Завершение работы приложения (%s)...", role)
+        # 1. Прекращение приема: polling больше не забирает обновления (неполученные
+        # Telegram доставит после перезапуска), Discord пропускает новые сообщения
+        shutdown_drain.begin()
+        if polling_task is not None:
+            if not polling_task.done():
+                await dp.stop_polling()
+            await asyncio.gather(polling_task, return_exceptions=True)
+            polling_task = None
+
+        # 2. Ожидание начатой работы: полученных обновлений, генераций и исходящих сообщений
+        flushed = message_debouncer.flush()
+        if flushed:
+            logger.info("Запущено отложенных генераций: %s", flushed)
+        sources = {
+            "обновлений": lambda: (update_queue.pending if update_queue else 0)
+            + len(getattr(dp, "_handle_update_tasks", ())),
+            "отложенных генераций": lambda: message_debouncer.pending,
+            "чатов в обработке": lambda: chat_dispatcher.active_lanes,
+            "исходящих": lambda: outbound_dispatcher.pending,
+        }
+        await shutdown_drain.wait(sources, settings.SHUTDOWN_DRAIN_TIMEOUT)
 
+        # 3. Остановка компонентов; незавершенное к этому моменту отменяется
+        if update_queue is not None:
+            await update_queue.stop()
+        await outbound_dispatcher.stop()
+        await retention_scheduler.stop()
+        await job_manager.stop()
+        await platform_manager.stop()
+        if invalidation_task is not None:
+            invalidation_task.cancel()
+            await asyncio.gather(invalidation_task, return_exceptions=True)
+            invalidation_task = None
+        await state_backend.close()
+
+        # 4. Сброс буферизованных записей и закрытие соединений
+        queued_writes = write_queue.stats()["queued"]
+        await write_queue.stop()
+        if queued_writes:
+            logger.info("Очередь записи сброшена: %s операций", queued_writes)
+        if telegram and bot is not None:
+            await bot.session.close()
         await Tortoise.close_connections()
         logger.info("Tortoise ORM соединения закрыты")
 
     app = FastAPI(lifespan=lifespan)
-    static_path = Path(__file__).parent / "static"
-    app.mount("/static", StaticFiles(directory=str(static_path)), name="static")
-    
-    app.include_router(admin_router)
+    app.state.update_queue = update_queue
+    app.state.role = role
+    app.state.components = components
+
+    if ADMIN in components:
+        static_path = Path(__file__).parent / "static"
+        app.mount("/static", StaticFiles(directory=str(static_path)), name="static")
+        app.include_router(admin_router)
 
     @app.exception_handler(DoesNotExist)
     async def does_not_exist_handler(request: Request, exc: DoesNotExist):
@@ -78,23 +203,57 @@ def create_app(bot: Bot, dp, use_webhook: bool = False) -> FastAPI:
     async def operational_error_handler(request: Request, exc: OperationalError):
         return JSONResponse(status_code=500, content={"detail": str(exc)})
 
+    def component_health() -> dict[str, str]:
+        checks = {}
+        if telegram:
+            if use_webhook:
+                checks[TELEGRAM] = "ok" if update_queue.is_running else "stopped"
+            else:
+                checks[TELEGRAM] = "ok" if polling_task is not None and not polling_task.done() else "stopped"
+        if DISCORD in components:
+            checks[DISCORD] = platform_manager.health().get(DISCORD, "disabled")
+        if MAINTENANCE in components:
+            if retention_scheduler.interval <= 0:
+                checks[MAINTENANCE] = "disabled"
+            else:
+                checks[MAINTENANCE] = "ok" if retention_scheduler.is_running else "stopped"
+        return checks
+
     @app.get("/")
     @app.get("/health")
-    async def health() -> dict:
-        return {"status": "ok"}
+    async def health() -> JSONResponse:
+        checks = component_health()
+        try:
+            await sql.fetch_all("SELECT 1 AS one")
+            checks["database"] = "ok"
+        except Exception as e:
+            checks["database"] = f"error: {e}"
+        healthy = all(value in ("ok", "disabled") for value in checks.values())
+        return JSONResponse(
+            status_code=200 if healthy else 503,
+            content={"status": "ok" if healthy else "degraded", "role": role, "components": checks},
+        )
+
+    if telegram:
+        @app.post(settings.WEBHOOK_PATH)
+        async def webhook(request: Request) -> Response:
+            if settings.WEBHOOK_SECRET:
+                secret = request.headers.get("X-Telegram-Bot-Api-Secret-Token")
+                if secret != settings.WEBHOOK_SECRET:
+                    return Response(status_code=403)
 
-    @app.post(settings.WEBHOOK_PATH)
-    async def webhook(request: Request) -> Response:
-        body = await request.json()
+            body = await request.json()
+            update = Update.model_validate(body, context={"bot": bot})
 
-        if settings.WEBHOOK_SECRET:
-            secret = request.headers.get("X-Telegram-Bot-Api-Secret-Token")
-            if secret != settings.WEBHOOK_SECRET:
-                return Response(status_code=403)
+            if not update_queue.is_running:
+                await dp.feed_update(bot, update)
+                return Response(status_code=200)
 
-        update = Update.model_validate(body, context={"bot": bot})
-        await dp.feed_update(bot, update)
+            # Отвечаем сразу: генерация идёт в фоне, Telegram не ждёт её и не ретраит.
+            # При переполнении очереди отдаём 503, чтобы Telegram повторил доставку позже.
+            if not await update_queue.enqueue(update):
+                return Response(status_code=503)
 
-        return Response(status_code=200)
+            return Response(status_code=200)
 
     return app
@@ -0,0 +1,45 @@
+// Графики активности строятся по почасовым счётчикам (/api/stats/activity)
+
+let currentActivityPeriod = 'hourly';
+
+function formatActivityLabel(bucket, period) {
+    const d = new Date(bucket);
+    if (period === 'hourly') {
+        return d.toLocaleString('ru-RU', { hour: '2-digit', minute: '2-digit', day: '2-digit', month: '2-digit' });
+    }
+    return d.toLocaleDateString('ru-RU', { day: '2-digit', month: '2-digit' });
+}
+
+function renderActivity(points, period) {
+    const chart = document.getElementById('activity_chart');
+    if (!chart) return;
+    const max = Math.max(1, ...points.map(p => p.total));
+
+    chart.innerHTML = '';
+    points.forEach(p => {
+        const bar = document.createElement('div');
+        bar.style.flex = '1';
+        bar.style.minHeight = '2px';
+        bar.style.height = (p.total / max * 100) + '%';
+        bar.style.borderRadius = '4px 4px 0 0';
+        bar.style.background = p.total ? 'var(--accent-primary)' : 'rgba(107, 70, 193, 0.15)';
+        bar.title = `${formatActivityLabel(p.bucket, period)}: ${p.total} (Telegram ${p.telegram}, Discord ${p.discord})`;
+        chart.appendChild(bar);
+    });
+}
+
+async function loadActivity(period = currentActivityPeriod) {
+    const points = await api('/stats/activity?period=' + period);
+    if (points) renderActivity(points, period);
+}
+
+function switchActivityPeriod(period) {
+    currentActivityPeriod = period;
+    $$('[data-period]').forEach(el => el.classList.toggle('active', el.dataset.period === period));
+    loadActivity(period).catch(() => { });
+}
+
+document.addEventListener('DOMContentLoaded', () => {
+    if (!document.getElementById('activity_chart')) return;
+    loadActivity().catch(() => { });
+});
@@ -0,0 +1,123 @@
+// Список активных чатов: постраничная подгрузка с /api/chats (keyset-курсор)
+
+const CHATS_PAGE_SIZE = 50;
+
+let chatsCursor = null;
+let chatsLoading = false;
+let chatsGeneration = 0;
+let chatsSearchTimer = null;
+
+function escapeHtml(value) {
+    const div = document.createElement('div');
+    div.textContent = value ?? '';
+    return div.innerHTML;
+}
+
+function formatChatTime(value) {
+    if (!value) return '-';
+    const d = new Date(value);
+    const pad = (n) => String(n).padStart(2, '0');
+    return `${pad(d.getHours())}:${pad(d.getMinutes())} ${pad(d.getDate())}.${pad(d.getMonth() + 1)}`;
+}
+
+function renderChatRow(c) {
+    let platform = escapeHtml(c.platform);
+    if (c.platform === 'telegram') {
+        platform = '<div class="flex" title="Telegram" style="color: #3b82f6;"><i data-lucide="send" style="width: 16px; height: 16px;"></i></div>';
+    } else if (c.platform === 'discord') {
+        platform = '<div class="flex" title="Discord" style="color: #8b5cf6;"><i data-lucide="gamepad-2" style="width: 16px; height: 16px;"></i></div>';
+    }
+    const type = c.chat_type === 'private'
+        ? '<i data-lucide="user" title="Личное сообщение" style="width: 16px; height: 16px; opacity: 0.7;"></i>'
+        : '<i data-lucide="users" title="Группа/Сервер" style="width: 16px; height: 16px; opacity: 0.7;"></i>';
+    const allowed = c.is_allowed
+        ? `<span class="flex" style="color: var(--success); font-size: 0.85rem; font-weight: 500;">
+               <i data-lucide="check-circle" style="width: 14px; height: 14px; margin-right: 0.4rem;"></i>В списке</span>`
+        : `<span class="flex" style="color: var(--text-secondary); font-size: 0.85rem; opacity: 0.6;">
+               <i data-lucide="minus-circle" style="width: 14px; height: 14px; margin-right: 0.4rem;"></i>Нет</span>`;
+
+    const row = document.createElement('tr');
+    row.dataset.chat = `${c.chat_id}:${c.platform}`;
+    row.innerHTML = `
+        <td>${platform}</td>
+        <td>${type}</td>
+        <td style="font-family: monospace; font-size: 0.9rem; opacity: 0.8;">${c.chat_id}</td>
+        <td style="font-weight: 500;">
+            <a href="/admin/chats/${encodeURIComponent(c.platform)}/${c.chat_id}" style="color: inherit;">${escapeHtml(c.title)}</a>
+        </td>
+        <td>
+            <span class="badge"
+                style="background: rgba(107, 70, 193, 0.1); color: var(--accent-primary); padding: 0.2rem 0.6rem; border-radius: 10px; font-weight: 600;">
+                ${c.message_count}
+            </span>
+        </td>
+        <td>${allowed}</td>
+        <td style="font-size: 0.85rem; color: var(--text-secondary);">${formatChatTime(c.last_message_at)}</td>
+        <td>
+            <div class="flex justify-end">
+                <button class="btn btn-danger flex"
+                    style="padding:0.4rem 0.8rem; font-size:0.8rem; border-radius: 10px;"
+                    onclick="clearChat(${c.chat_id}, '${escapeHtml(c.platform)}')">
+                    <i data-lucide="trash-2" style="width: 14px; height: 14px; margin-right: 0.4rem;"></i>
+                    Очистить
+                </button>
+            </div>
+        </td>`;
+    return row;
+}
+
+function chatsQuery() {
+    const params = new URLSearchParams({ limit: CHATS_PAGE_SIZE, sort: $('#chats_sort').value });
+    const search = $('#chats_search').value.trim();
+    if (search) params.set('q', search);
+    if ($('#chats_platform').value) params.set('platform', $('#chats_platform').value);
+    if ($('#chats_whitelisted').value) params.set('whitelisted', $('#chats_whitelisted').value);
+    if (chatsCursor) params.set('cursor', chatsCursor);
+    return params.toString();
+}
+
+async function loadChatsPage() {
+    if (chatsLoading) return;
+    chatsLoading = true;
+    const generation = chatsGeneration;
+    try {
+        const page = await api('/chats?' + chatsQuery());
+        // Фильтры сменились, пока шёл запрос
+        if (!page || generation !== chatsGeneration) return;
+
+        const body = document.getElementById('active_chats_body');
+        page.items.forEach(c => body.appendChild(renderChatRow(c)));
+        chatsCursor = page.next_cursor;
+        document.getElementById('active_chats_more').style.display = chatsCursor ? 'flex' : 'none';
+        showEmptyChatsRow();
+        if (window.lucide) lucide.createIcons();
+    } catch (e) {
+    } finally {
+        chatsLoading = false;
+    }
+}
+
+function reloadChats() {
+    chatsGeneration++;
+    chatsCursor = null;
+    chatsLoading = false;
+    document.getElementById('active_chats_body').innerHTML = '';
+    loadChatsPage();
+}
+
+function onChatsFilterInput() {
+    clearTimeout(chatsSearchTimer);
+    chatsSearchTimer = setTimeout(reloadChats, 300);
+}
+
+document.addEventListener('DOMContentLoaded', () => {
+    const more = document.getElementById('active_chats_more');
+    if (!more) return;
+    loadChatsPage();
+
+    if ('IntersectionObserver' in window) {
+        new IntersectionObserver(entries => {
+            if (entries.some(e => e.isIntersecting) && chatsCursor) loadChatsPage();
+        }).observe(more);
+    }
+});
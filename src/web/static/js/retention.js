@@ -0,0 +1,117 @@
+// Политики хранения истории, архив и прогресс фоновых заданий обслуживания
+
+function retentionScope(p) {
+    if (p.chat_id) return `Чат ${p.platform} / ${p.chat_id}`;
+    if (p.platform) return `Платформа ${p.platform}`;
+    return 'Глобально';
+}
+
+async function loadRetentionPolicies() {
+    const policies = await api('/retention/policies');
+    if (!policies) return;
+    const body = document.getElementById('retention_policies_body');
+    body.innerHTML = '';
+    policies.forEach(p => {
+        const row = document.createElement('tr');
+        row.innerHTML = `
+            <td style="font-weight: 500;">${escapeHtml(retentionScope(p))}</td>
+            <td>${p.max_age_days ?? '—'}</td>
+            <td>${p.max_messages ?? '—'}</td>
+            <td>
+                <div class="flex justify-end">
+                    <button class="btn btn-danger btn-sm" onclick="deleteRetentionPolicy(${p.id})">
+                        <i data-lucide="trash-2" class="icon-small"></i>
+                    </button>
+                </div>
+            </td>`;
+        body.appendChild(row);
+    });
+    if (!policies.length) {
+        body.innerHTML = '<tr><td colspan="4" style="text-align:center; padding: 1rem; color: var(--text-secondary);">Политики не заданы</td></tr>';
+    }
+    if (window.lucide) lucide.createIcons();
+}
+
+function parseLimit(id) {
+    const value = document.getElementById(id).value;
+    return value === '' ? null : parseInt(value, 10);
+}
+
+async function saveRetentionPolicy() {
+    try {
+        await api('/retention/policies', 'POST', {
+            platform: $('#retention_platform').value || null,
+            chat_id: $('#retention_chat_id').value.trim() || null,
+            max_age_days: parseLimit('retention_max_age'),
+            max_messages: parseLimit('retention_max_messages'),
+        });
+        showToast('Политика сохранена');
+        await loadRetentionPolicies();
+    } catch (e) { }
+}
+
+async function deleteRetentionPolicy(id) {
+    const confirmed = await confirmAction('Удалить политику хранения?');
+    if (!confirmed) return;
+    try {
+        await api('/retention/policies/' + id, 'DELETE');
+        await loadRetentionPolicies();
+    } catch (e) { }
+}
+
+function renderJobProgress(el, job) {
+    const rate = job.rate_per_second ? `, ${job.rate_per_second}/с` : '';
+    el.textContent = `Задание #${job.id}: ${job.status}, обработано ${job.processed}${rate}. ${job.message || ''}${job.error ? ' Ошибка: ' + job.error : ''}`;
+}
+
+// Опрос состояния задания до его завершения (свой таймер у каждого элемента прогресса)
+function pollJob(jobId, el, onDone) {
+    clearTimeout(el.pollTimer);
+    const tick = async () => {
+        try {
+            const job = await api('/jobs/' + jobId);
+            renderJobProgress(el, job);
+            if (job.status === 'pending' || job.status === 'running') {
+                el.pollTimer = setTimeout(tick, 1000);
+            } else if (onDone) {
+                onDone(job);
+            }
+        } catch (e) { }
+    };
+    tick();
+}
+
+async function runRetention() {
+    try {
+        const job = await api('/retention/run', 'POST');
+        pollJob(job.id, document.getElementById('retention_job'), () => {
+            refreshStats().catch(() => { });
+            reloadChats();
+        });
+    } catch (e) { }
+}
+
+async function loadArchiveStats() {
+    const stats = await api('/archive');
+    if (!stats) return;
+    const el = document.getElementById('archive_stats');
+    const size = (stats.size_bytes / 1024 / 1024).toFixed(1);
+    const mode = stats.after_days > 0 ? `в архив переносятся сообщения старше ${stats.after_days} дн.` : 'архивирование выключено';
+    el.textContent = `Архив: ${stats.messages} сообщений в ${stats.segments} сегментах (${size} МБ), ${mode}`;
+}
+
+async function runArchive() {
+    try {
+        const job = await api('/archive/run', 'POST');
+        pollJob(job.id, document.getElementById('retention_job'), () => {
+            loadArchiveStats().catch(() => { });
+        });
+    } catch (e) { }
+}
+
+document.addEventListener('DOMContentLoaded', () => {
+    if (document.getElementById('retention_policies_body')) {
+        loadRetentionPolicies().catch(() => { });
+        loadArchiveStats().catch(() => { });
+    }
+});
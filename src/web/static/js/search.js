@@ -0,0 +1,59 @@
+// Полнотекстовый поиск по истории (/api/search); сниппеты уже экранированы сервером
+
+const SEARCH_PAGE_SIZE = 20;
+
+let searchOffset = 0;
+
+function searchParams() {
+    const params = new URLSearchParams({ q: $('#search_query').value.trim(), limit: SEARCH_PAGE_SIZE, offset: searchOffset });
+    if ($('#search_platform').value) params.set('platform', $('#search_platform').value);
+    const from = $('#search_date_from').value;
+    const to = $('#search_date_to').value;
+    if (from) params.set('date_from', new Date(from).toISOString());
+    if (to) {
+        const end = new Date(to);
+        end.setDate(end.getDate() + 1);
+        params.set('date_to', end.toISOString());
+    }
+    return params;
+}
+
+function renderSearchResult(item) {
+    const link = document.createElement('a');
+    link.href = `/admin/chats/${encodeURIComponent(item.platform)}/${item.chat_id}?at=${encodeURIComponent(item.created_at)}`;
+    link.style.display = 'block';
+    link.style.padding = '0.75rem 1rem';
+    link.style.borderRadius = '14px';
+    link.style.border = '1px solid var(--border-color)';
+    link.style.color = 'inherit';
+    link.style.textDecoration = 'none';
+
+    const header = document.createElement('div');
+    header.style.fontSize = '0.8rem';
+    header.style.color = 'var(--text-secondary)';
+    header.style.marginBottom = '0.35rem';
+    header.textContent = `${item.platform} / ${item.chat_id} · ${item.nickname || item.role} · ${new Date(item.created_at).toLocaleString('ru-RU')}`;
+
+    const snippet = document.createElement('div');
+    snippet.innerHTML = item.snippet;
+
+    link.append(header, snippet);
+    return link;
+}
+
+async function runSearch(more = false) {
+    if (!$('#search_query').value.trim()) return;
+    searchOffset = more ? searchOffset + SEARCH_PAGE_SIZE : 0;
+
+    try {
+        const result = await api('/search?' + searchParams());
+        if (!result) return;
+        const list = document.getElementById('search_results');
+        if (!more) list.innerHTML = '';
+        result.items.forEach(item => list.appendChild(renderSearchResult(item)));
+        if (!more && !result.items.length) {
+            list.innerHTML = '<div style="text-align:center; padding: 1rem; color: var(--text-secondary);">Ничего не найдено</div>';
+        }
+        document.getElementById('search_more').style.display = result.has_more ? 'inline-flex' : 'none';
+    } catch (e) { }
+}
@@ -2,8 +2,12 @@ async function clearAll() {
     const confirmed = await confirmAction("Вы уверены, что хотите удалить ВСЮ историю?");
     if (!confirmed) return;
     try {
-        await api("/clear-all", "POST");
-        window.location.reload();
+        const job = await api("/clear-all", "POST");
+        pollJob(job.id, document.getElementById("clear_job"), () => {
+            reloadChats();
+            refreshStats().catch(() => { });
+            if (typeof loadActivity === "function") loadActivity().catch(() => { });
+        });
     } catch (e) { }
 }
 
@@ -11,11 +15,62 @@ async function clearChat(id, platform) {
     const confirmed = await confirmAction("Удалить этот чат?");
     if (!confirmed) return;
     try {
-        await api("/clear/" + id + "/" + platform, "POST");
-        window.location.reload();
+        const job = await api("/clear/" + id + "/" + platform, "POST");
+        const row = document.querySelector(`#active_chats_body tr[data-chat="${id}:${platform}"]`);
+        if (row) row.remove();
+        showEmptyChatsRow();
+        pollJob(job.id, document.getElementById("clear_job"), () => {
+            refreshStats().catch(() => { });
+        });
     } catch (e) { }
 }
 
+async function importHistory(input) {
+    const file = input.files[0];
+    input.value = "";
+    if (!file) return;
+    const body = new FormData();
+    body.append("file", file);
+    try {
+        const r = await fetch("/admin/api/import", { method: "POST", body });
+        const data = await r.json();
+        if (!r.ok) throw new Error(data?.detail || r.statusText);
+        showToast(`Импортировано сообщений: ${data.imported}`);
+        reloadChats();
+        await refreshStats();
+    } catch (e) {
+        showToast(e.message, true);
+    }
+}
+
+function showEmptyChatsRow() {
+    const body = document.getElementById("active_chats_body");
+    if (!body || body.querySelector("tr")) return;
+    body.innerHTML = '<tr class="empty-row"><td colspan="8" style="text-align:center; padding: 2rem; color: var(--text-secondary);">Нет активных диалогов</td></tr>';
+}
+
+// Обновление карточек статистики без перезагрузки страницы.
+// Сервер отдаёт ETag, поэтому повторные запросы браузер ревалидирует и получает 304.
+async function refreshStats() {
+    const stats = await api("/stats");
+    if (!stats) return;
+    $$("[data-stat]").forEach(el => {
+        const value = stats[el.dataset.stat];
+        if (value !== undefined) el.textContent = value;
+    });
+}
+
+const STATS_POLL_INTERVAL = 30000;
+
+document.addEventListener("DOMContentLoaded", () => {
+    if (!$("[data-stat]")) return;
+    setInterval(() => {
+        if (document.visibilityState !== "visible") return;
+        refreshStats().catch(() => { });
+        if (typeof loadActivity === "function") loadActivity().catch(() => { });
+    }, STATS_POLL_INTERVAL);
+});
+
 // --- Settings & Whitelist Logic ---
 
 let currentSettingsTab = 'telegram';
@@ -0,0 +1,92 @@
+// Просмотр переписки чата: страницы по курсорам prev/next и переход к дате
+
+const TRANSCRIPT_PAGE_SIZE = 100;
+
+let transcriptPrev = null;
+let transcriptNext = null;
+
+function transcriptUrl(params) {
+    const el = document.getElementById('transcript');
+    const query = new URLSearchParams({ limit: TRANSCRIPT_PAGE_SIZE, ...params });
+    return `/chats/${el.dataset.platform}/${el.dataset.chatId}/messages?${query}`;
+}
+
+function renderTranscriptMessage(m) {
+    const item = document.createElement('div');
+    const isBot = m.role === 'assistant';
+    item.style.padding = '0.75rem 1rem';
+    item.style.borderRadius = '14px';
+    item.style.border = '1px solid var(--border-color)';
+    item.style.background = isBot ? 'rgba(107, 70, 193, 0.05)' : 'var(--bg-primary)';
+
+    const header = document.createElement('div');
+    header.style.fontSize = '0.8rem';
+    header.style.color = 'var(--text-secondary)';
+    header.style.marginBottom = '0.35rem';
+    header.textContent = `#${m.id} · ${m.nickname || m.role} · ${new Date(m.created_at).toLocaleString('ru-RU')}`;
+
+    const content = document.createElement('div');
+    content.style.whiteSpace = 'pre-wrap';
+    content.textContent = m.content;
+
+    item.append(header, content);
+    return item;
+}
+
+function updateTranscriptButtons() {
+    document.getElementById('transcript_older').style.display = transcriptPrev ? 'inline-flex' : 'none';
+    document.getElementById('transcript_newer').style.display = transcriptNext ? 'inline-flex' : 'none';
+}
+
+async function loadTranscript(params, mode) {
+    const page = await api(transcriptUrl(params));
+    if (!page) return;
+    const list = document.getElementById('transcript_messages');
+    const nodes = page.messages.map(renderTranscriptMessage);
+
+    if (mode === 'replace') {
+        list.replaceChildren(...nodes);
+        transcriptPrev = page.prev_cursor;
+        transcriptNext = page.next_cursor;
+    } else if (mode === 'prepend') {
+        list.prepend(...nodes);
+        transcriptPrev = page.prev_cursor;
+    } else {
+        list.append(...nodes);
+        transcriptNext = page.next_cursor;
+    }
+
+    if (mode === 'replace' && !nodes.length) {
+        list.innerHTML = '<div style="text-align:center; padding: 2rem; color: var(--text-secondary);">Нет сообщений</div>';
+    }
+    updateTranscriptButtons();
+}
+
+function loadLatest() {
+    return loadTranscript({}, 'replace').catch(() => { });
+}
+
+function loadOlder() {
+    if (transcriptPrev) loadTranscript({ before: transcriptPrev }, 'prepend').catch(() => { });
+}
+
+function loadNewer() {
+    if (transcriptNext) loadTranscript({ after: transcriptNext }, 'append').catch(() => { });
+}
+
+function jumpToDate() {
+    const value = document.getElementById('transcript_date').value;
+    if (!value) return;
+    loadTranscript({ at: new Date(value).toISOString() }, 'replace').catch(() => { });
+}
+
+document.addEventListener('DOMContentLoaded', () => {
+    if (!document.getElementById('transcript')) return;
+    // Переход из результатов поиска: /admin/chats/<platform>/<id>?at=<дата>
+    const at = new URLSearchParams(window.location.search).get('at');
+    if (at) {
+        loadTranscript({ at }, 'replace').catch(() => { });
+    } else {
+        loadLatest();
+    }
+});
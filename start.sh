@@ -6,29 +6,54 @@ cd -- "$(dirname -- "$0")"
 export PYTHONPATH="${PYTHONPATH}:."
 export TORTOISE_ORM="src.database.config.CONFIG"
 
-echo "Running database migrations..."
+# fast — проверка версии схемы и применение поставленных миграций из migrations/;
+# dev — как раньше: aerich migrate (генерация миграций по моделям) и upgrade
+MIGRATIONS_MODE="${MIGRATIONS_MODE:-fast}"
+# Роль процесса (python -m src.cli --help); при запуске по ролям миграции
+# выполняет один процесс, остальным задаётся RUN_MIGRATIONS=false
+APP_ROLE="${APP_ROLE:-all}"
+RUN_MIGRATIONS="${RUN_MIGRATIONS:-true}"
+
+now_ms() {
+    python -c 'import time; print(int(time.time() * 1000))'
+}
+
+STARTED_MS=$(now_ms)
+
+if [ "$RUN_MIGRATIONS" = "true" ]; then
+    echo "Running database migrations (mode: $MIGRATIONS_MODE)..."
+
+    if [ "$MIGRATIONS_MODE" = "dev" ]; then
+        if [ ! -f "pyproject.toml" ] || ! grep -q "\[tool.aerich\]" pyproject.toml; then
+            echo "Initializing Aerich config..."
+            aerich init -t "$TORTOISE_ORM"
+        fi
+
+        if [ -z "$(ls migrations/models/*.py 2>/dev/null)" ]; then
+            echo "No migrations found. Initializing database with initial schema..."
+            aerich init-db
+        else
+            echo "Migrations exist. Checking for model changes..."
+
+            if aerich migrate 2>&1 | grep -q "No changes detected"; then
+                echo "No model changes detected. Skipping migration creation."
+            else
+                echo "New migration created. Applying it..."
+            fi
+            aerich upgrade
+        fi
+    else
+        python scripts/migrate.py
+    fi
 
-if [ ! -f "pyproject.toml" ] || ! grep -q "\[tool.aerich\]" pyproject.toml; then
-    echo "Initializing Aerich config..."
-    aerich init -t "$TORTOISE_ORM"
-fi
+    MIGRATED_MS=$(now_ms)
+    echo "Migrations step took $((MIGRATED_MS - STARTED_MS)) ms"
 
-if [ ! -d "migrations/models" ] || [ -z "$(ls -A migrations/models 2>/dev/null)" ]; then
-    echo "No migrations found. Initializing database with initial schema..."
-    aerich init-db
-else
-    echo "Migrations exist. Checking for model changes..."
+    echo "Creating superuser..."
+    python scripts/create_superuser.py
 
-    if aerich migrate 2>&1 | grep -q "No changes detected"; then
-        echo "No model changes detected. Skipping migration creation."
-    else
-        echo "New migration created. Applying it..."
-        aerich upgrade
-    fi
+    echo "Pre-start steps took $(($(now_ms) - STARTED_MS)) ms"
 fi
 
-echo "Creating superuser..."
-python scripts/create_superuser.py
-
-echo "Starting app..."
-exec python -m src.main
\ No newline at end of file
+echo "Starting app (role: $APP_ROLE)..."
+exec python -m src.cli "$APP_ROLE"
@@ -0,0 +1,152 @@
+import gzip
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from tortoise import Tortoise
+
+from config import settings
+from src.database import ChatMessage
+from src.database.models import ArchiveSegment
+from src.services import ArchiveService, HistoryService, RetentionService, StatsService, TransferService
+from src.services.archive_service import segment_cache
+
+
+@pytest.fixture(scope="function", autouse=True)
+async def init_db(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "ARCHIVE_DIR", str(tmp_path / "archive"))
+    monkeypatch.setattr(settings, "ARCHIVE_SEGMENT_MESSAGES", 4)
+    monkeypatch.setattr(settings, "RETENTION_BATCH_PAUSE", 0)
+    segment_cache.clear()
+    config = {
+        "connections": {"default": "sqlite://:memory:"},
+        "apps": {
+            "models": {
+                "models": ["src.database.models"],
+                "default_connection": "default",
+            }
+        },
+    }
+    await Tortoise.init(config=config)
+    await Tortoise.generate_schemas()
+    yield
+    await Tortoise.close_connections()
+
+
+async def _fill(chat_id: int, count: int, days_ago_start: int) -> list[int]:
+    """Сообщения m0..m{count-1} возрастом days_ago_start..(days_ago_start - count + 1) дней."""
+    now = datetime.now(timezone.utc)
+    ids = []
+    for i in range(count):
+        message = await HistoryService.add_message(chat_id, "user" if i % 2 == 0 else "assistant", f"m{i}")
+        await ChatMessage.filter(id=message.id).update(created_at=now - timedelta(days=days_ago_start - i))
+        ids.append(message.id)
+    return ids
+
+
+async def _transcript(chat_id: int, **page) -> list[str]:
+    return [row["content"] async for row in HistoryService.iter_transcript(chat_id, **page)]
+
+
+@pytest.mark.asyncio
+async def test_archive_moves_old_messages_to_segments():
+    await _fill(1, 12, days_ago_start=11)  # m0..m9 старше 2 дней
+
+    archived = await ArchiveService.archive(older_than_days=2)
+
+    assert archived == 10
+    assert await ChatMessage.filter(chat_id=1).count() == 2
+    segments = await ArchiveSegment.filter(chat_id=1).order_by("first_id")
+    assert [s.message_count for s in segments] == [4, 4, 2]
+    assert segments[0].role_counts == {"user": 2, "assistant": 2}
+
+    path = settings.ARCHIVE_DIR + "/" + segments[0].path
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        assert [json.loads(line)["content"] for line in f] == ["m0", "m1", "m2", "m3"]
+
+    # Архивные сообщения остаются в статистике, в том числе после пересчёта
+    assert (await HistoryService.get_stats())["total_messages"] == 12
+    await StatsService.rebuild()
+    stats = await HistoryService.get_stats()
+    assert stats["total_messages"] == 12
+    assert stats["user_messages"] == 6
+    assert stats["chats_count"] == 1
+
+
+@pytest.mark.asyncio
+async def test_transcript_reads_archive_lazily():
+    ids = await _fill(1, 12, days_ago_start=11)
+    await ArchiveService.archive(older_than_days=2)
+
+    # Последняя страница целиком в таблице — сегменты не читаются
+    assert await _transcript(1, limit=2) == ["m10", "m11"]
+    assert segment_cache.stats()["loads"] == 0
+
+    assert await _transcript(1, limit=5) == ["m7", "m8", "m9", "m10", "m11"]
+    assert await _transcript(1, limit=3, before=ids[10]) == ["m7", "m8", "m9"]
+    assert await _transcript(1, limit=3, after=ids[2]) == ["m3", "m4", "m5"]
+    assert await _transcript(1, limit=4, after=ids[8]) == ["m9", "m10", "m11"]
+
+    at = datetime.now(timezone.utc) - timedelta(days=6, hours=1)
+    assert await _transcript(1, limit=2, at=at) == ["m5", "m6"]
+
+    assert await HistoryService.has_messages(1, before=ids[10])
+    assert not await HistoryService.has_messages(1, before=ids[0])
+    assert await HistoryService.has_messages(1, after=ids[0])
+
+
+@pytest.mark.asyncio
+async def test_export_includes_archive_on_request():
+    await _fill(1, 6, days_ago_start=5)
+    await ArchiveService.archive(older_than_days=2)
+
+    hot = [row["content"] async for row in TransferService.iter_messages()]
+    everything = [row["content"] async for row in TransferService.iter_messages(archived=True)]
+
+    assert hot == ["m4", "m5"]
+    assert everything == ["m0", "m1", "m2", "m3", "m4", "m5"]
+
+
+@pytest.mark.asyncio
+async def test_clear_and_retention_remove_segments():
+    await _fill(1, 8, days_ago_start=9)
+    await _fill(2, 8, days_ago_start=9)
+    await ArchiveService.archive(older_than_days=1)
+    assert await ArchiveSegment.all().count() == 4
+
+    await HistoryService.clear_history(1)
+    assert not await ArchiveSegment.filter(chat_id=1).exists()
+    assert (await HistoryService.get_stats())["total_messages"] == 8
+
+    # Сегмент m0..m3 (возраст 9..6 дней) целиком старше 5 дней, сегмент m4..m7 — нет
+    await RetentionService.set_policy(max_age_days=5)
+    deleted = await RetentionService.enforce()
+    assert deleted == 4
+    assert await ArchiveSegment.filter(chat_id=2).count() == 1
+    assert await _transcript(2, limit=10) == ["m4", "m5", "m6", "m7"]
+    assert (await HistoryService.get_stats())["total_messages"] == 4
+
+    await HistoryService.clear_all_history()
+    assert not await ArchiveSegment.exists()
+
+
+@pytest.mark.asyncio
+async def test_message_limit_counts_archived_messages():
+    await _fill(1, 10, days_ago_start=9)
+    await ArchiveService.archive(older_than_days=1)  # m0..m7 в двух сегментах, m8, m9 в таблице
+
+    # Лимит 5: в таблице 2 сообщения, на архив приходится 3 — остаётся сегмент m4..m7
+    await RetentionService.set_policy(max_messages=5)
+    assert await RetentionService.enforce() == 4
+    assert await _transcript(1, limit=10) == ["m4", "m5", "m6", "m7", "m8", "m9"]
+    assert (await HistoryService.get_stats())["total_messages"] == 6
+
+
+@pytest.mark.asyncio
+async def test_export_dates_without_timezone_are_utc():
+    await _fill(1, 6, days_ago_start=5)
+    await ArchiveService.archive(older_than_days=2)
+
+    date_from = (datetime.now(timezone.utc) - timedelta(days=4, hours=12)).replace(tzinfo=None)
+    rows = [row["content"] async for row in ArchiveService.iter_messages(chat_id=1, date_from=date_from)]
+    assert rows == ["m1", "m2", "m3"]
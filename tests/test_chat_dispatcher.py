@@ -0,0 +1,45 @@
+import asyncio
+
+import pytest
+
+from src.services.chat_dispatcher import ChatDispatcher
+
+
+@pytest.mark.asyncio
+async def test_lane_is_serial_per_chat():
+    dispatcher = ChatDispatcher()
+    events: list[str] = []
+
+    async def turn(chat_id: int, name: str):
+        async with dispatcher.lane("telegram", chat_id):
+            events.append(f"start {name}")
+            await asyncio.sleep(0.01)
+            events.append(f"end {name}")
+
+    await asyncio.gather(turn(1, "a"), turn(1, "b"), turn(2, "c"))
+
+    chat_1 = [e for e in events if not e.endswith("c")]
+    assert chat_1 == ["start a", "end a", "start b", "end b"]
+    # Другой чат не ждёт первый
+    assert events.index("start c") < events.index("end a")
+    assert dispatcher.stats()["active_lanes"] == 0
+
+
+@pytest.mark.asyncio
+async def test_generation_slot_caps_concurrency():
+    dispatcher = ChatDispatcher(max_concurrent_generations=2)
+    peak = 0
+
+    async def generate():
+        nonlocal peak
+        async with dispatcher.generation_slot():
+            peak = max(peak, dispatcher.in_flight)
+            await asyncio.sleep(0.01)
+
+    tasks = [asyncio.create_task(generate()) for _ in range(6)]
+    await asyncio.sleep(0.001)
+    assert dispatcher.stats()["queued_generations"] == 4
+    await asyncio.gather(*tasks)
+
+    assert peak == 2
+    assert dispatcher.stats()["completed_generations"] == 6
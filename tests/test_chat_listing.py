@@ -0,0 +1,87 @@
+import pytest
+from tortoise import Tortoise
+
+from src.database.models import AllowedChat
+from src.services import HistoryService
+
+
+@pytest.fixture(scope="function", autouse=True)
+async def init_db():
+    config = {
+        "connections": {"default": "sqlite://:memory:"},
+        "apps": {
+            "models": {
+                "models": ["src.database.models"],
+                "default_connection": "default",
+            }
+        },
+    }
+    await Tortoise.init(config=config)
+    await Tortoise.generate_schemas()
+    yield
+    await Tortoise.close_connections()
+
+
+async def _fill():
+    # Чат N получает N сообщений; последним пишет чат 1
+    for chat_id in range(5, 0, -1):
+        for _ in range(chat_id):
+            await HistoryService.add_message(chat_id, "user", "hi", platform="telegram")
+    await HistoryService.add_message(100, "user", "hi", platform="discord", title="Guild Room")
+    await AllowedChat.create(chat_id=3, platform="telegram", title="Support", is_active=True)
+
+
+async def _all_pages(**kwargs) -> list[int]:
+    chat_ids, cursor = [], None
+    while True:
+        page = await HistoryService.list_chats(limit=2, cursor=cursor, **kwargs)
+        chat_ids.extend(c["chat_id"] for c in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return chat_ids
+
+
+@pytest.mark.asyncio
+async def test_keyset_pages_by_activity_and_count():
+    await _fill()
+
+    assert await _all_pages() == [100, 1, 2, 3, 4, 5]
+    assert await _all_pages(sort="messages") == [5, 4, 3, 2, 100, 1]
+    assert await _all_pages(sort="messages", order="asc") == [1, 100, 2, 3, 4, 5]
+
+
+@pytest.mark.asyncio
+async def test_filters_and_whitelist_join():
+    await _fill()
+
+    assert await _all_pages(platform="discord") == [100]
+    assert await _all_pages(whitelisted=True) == [100, 3]
+    assert await _all_pages(whitelisted=False) == [1, 2, 4, 5]
+    assert await _all_pages(search="support") == [3]
+
+    page = await HistoryService.list_chats(search="3")
+    chat = page["items"][0]
+    assert chat["title"] == "Support"
+    assert chat["is_allowed"] is True
+    assert chat["message_count"] == 3
+
+    page = await HistoryService.list_chats(search="4")
+    assert page["items"][0]["title"] == "Chat 4"
+    assert page["items"][0]["is_allowed"] is False
+
+
+@pytest.mark.asyncio
+async def test_search_treats_wildcards_literally():
+    await _fill()
+    await AllowedChat.create(chat_id=4, platform="telegram", title="100% off_topic", is_active=True)
+
+    assert await _all_pages(search="%") == [4]
+    assert await _all_pages(search="_") == [4]
+    assert await _all_pages(search="0% o") == [4]
+    assert await _all_pages(search="o_f") == []
+
+
+@pytest.mark.asyncio
+async def test_invalid_cursor():
+    with pytest.raises(ValueError):
+        await HistoryService.list_chats(cursor="not-a-cursor")
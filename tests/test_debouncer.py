@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+
+from src.services.chat_dispatcher import chat_dispatcher
+from src.services.debouncer import MessageDebouncer
+
+
+@pytest.mark.asyncio
+async def test_rapid_messages_trigger_single_generation():
+    debouncer = MessageDebouncer(window=0.05)
+    calls: list[str] = []
+
+    def reply(text: str):
+        async def callback():
+            calls.append(text)
+        return callback
+
+    for text in ("раз", "два", "три"):
+        await debouncer.submit("telegram", 1, reply(text))
+        await asyncio.sleep(0.01)
+    await debouncer.submit("telegram", 2, reply("другой чат"))
+
+    await asyncio.sleep(0.1)
+
+    assert sorted(calls) == ["другой чат", "три"]
+    stats = debouncer.stats()
+    assert stats["messages_merged"] == 2
+    assert stats["generations_triggered"] == 2
+    assert stats["pending_chats"] == 0
+
+
+@pytest.mark.asyncio
+async def test_zero_window_runs_inline():
+    debouncer = MessageDebouncer(window=0)
+    calls = []
+
+    async def callback():
+        calls.append(1)
+
+    await debouncer.submit("discord", 1, callback)
+    assert calls == [1]
+
+
+@pytest.mark.asyncio
+async def test_series_is_stored_in_lane_before_generation():
+    debouncer = MessageDebouncer(window=0.05)
+    events: list[str] = []
+
+    def store(text: str):
+        async def callback():
+            events.append(f"store {text}")
+        return callback
+
+    async def reply():
+        events.append("generate")
+
+    async def previous_generation():
+        async with chat_dispatcher.lane("telegram", 1):
+            await asyncio.sleep(0.15)
+            events.append("previous reply")
+
+    previous = asyncio.create_task(previous_generation())
+    await asyncio.sleep(0)
+    for text in ("раз", "два"):
+        await debouncer.submit("telegram", 1, reply, store=store(text))
+
+    # Сообщения серии не сохраняются, пока по чату идёт предыдущая генерация
+    await asyncio.sleep(0.1)
+    assert events == []
+
+    await previous
+    await asyncio.sleep(0.05)
+    assert events == ["previous reply", "store раз", "store два", "generate"]
+
+
+@pytest.mark.asyncio
+async def test_failed_store_does_not_drop_series():
+    debouncer = MessageDebouncer(window=0.05)
+    events: list[str] = []
+
+    def store(text: str):
+        async def callback():
+            if text == "два":
+                raise RuntimeError("db is busy")
+            events.append(f"store {text}")
+        return callback
+
+    async def reply():
+        events.append("generate")
+
+    for text in ("раз", "два", "три"):
+        await debouncer.submit("telegram", 1, reply, store=store(text))
+    await asyncio.sleep(0.1)
+
+    # Остальные сообщения серии сохраняются, ответ формируется
+    assert events == ["store раз", "store три", "generate"]
+    assert debouncer.stats()["store_failures"] == 1
+
+    # Если не сохранилось ничего, генерация не запускается
+    events.clear()
+    await debouncer.submit("telegram", 1, reply, store=store("два"))
+    await asyncio.sleep(0.1)
+    assert events == []
@@ -0,0 +1,145 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from httpx import AsyncClient, ASGITransport
+from tortoise import Tortoise
+
+from config import settings
+from src.database import ChatMessage
+from src.services import HistoryService, StatsService, UserService, job_manager
+from src.services.archive_service import MAINTENANCE_LOCK
+from src.services.jobs import JobManager
+from src.services.state import DatabaseStateBackend
+from src.web.app import create_app
+
+
+@pytest.fixture(scope="function", autouse=True)
+async def init_db(monkeypatch):
+    config = {
+        "connections": {"default": "sqlite://:memory:"},
+        "apps": {
+            "models": {
+                "models": ["src.database.models"],
+                "default_connection": "default",
+            }
+        },
+    }
+    await Tortoise.init(config=config)
+    await Tortoise.generate_schemas()
+    monkeypatch.setattr(settings, "RETENTION_BATCH_SIZE", 3)
+    monkeypatch.setattr(settings, "RETENTION_BATCH_PAUSE", 0)
+    yield
+    await Tortoise.close_connections()
+
+
+@pytest.fixture
+async def client():
+    app = create_app(MagicMock(), MagicMock())
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as c:
+        await UserService.create_user("admin", "admin", is_superuser=True)
+        response = await c.post("/admin/login", data={"username": "admin", "password": "admin"})
+        assert response.status_code == 303
+        yield c
+
+
+@pytest.mark.asyncio
+async def test_clear_chat_job_deletes_in_batches(client):
+    for i in range(10):
+        await HistoryService.add_message(1, "user", f"m{i}")
+    await HistoryService.add_message(2, "user", "other chat")
+
+    resp = await client.post("/admin/api/clear/1/telegram")
+    assert resp.status_code == 200
+    job = job_manager.get(resp.json()["id"])
+    assert job.kind == "clear" and job.params == {"chat_id": 1, "platform": "telegram"}
+    # Повторный запрос для того же чата возвращает уже идущее задание
+    assert (await client.post("/admin/api/clear/1/telegram")).json()["id"] == job.id
+    await job.task
+
+    assert job.status == "done" and job.processed == 10
+    assert await ChatMessage.filter(chat_id=1).count() == 0
+    assert (await HistoryService.get_stats())["total_messages"] == 1
+
+
+@pytest.mark.asyncio
+async def test_clear_keeps_messages_written_during_clear(monkeypatch):
+    for i in range(5):
+        await HistoryService.add_message(1, "user", f"m{i}")
+
+    subtract = StatsService.subtract_messages
+    written = []
+
+    async def subtract_and_write(*args):
+        await subtract(*args)
+        # Сообщение приходит в чат между пачками удаления
+        if not written:
+            written.append(await HistoryService.add_message(1, "user", "during"))
+
+    monkeypatch.setattr(StatsService, "subtract_messages", subtract_and_write)
+    assert await HistoryService.clear_history(1) == 5
+
+    assert await ChatMessage.filter(chat_id=1).values_list("content", flat=True) == ["during"]
+    stats = await HistoryService.get_stats()
+    assert (stats["total_messages"], stats["chats_count"]) == (1, 1)
+
+
+@pytest.mark.asyncio
+async def test_clear_all_job(client):
+    for i in range(7):
+        await HistoryService.add_message(i, "user", f"m{i}")
+
+    resp = await client.post("/admin/api/clear-all")
+    job = job_manager.get(resp.json()["id"])
+    assert job.kind == "clear-all"
+    await job.task
+
+    assert job.status == "done" and job.processed == 7
+    assert await ChatMessage.all().count() == 0
+    stats = await HistoryService.get_stats()
+    assert (stats["total_messages"], stats["chats_count"]) == (0, 0)
+
+
+@pytest.mark.asyncio
+async def test_clear_command_does_not_wait_for_maintenance():
+    from src.bot.telegram.handlers import cmd_clear
+
+    for i in range(3):
+        await HistoryService.add_message(1, "user", f"m{i}")
+    message = MagicMock()
+    message.chat.id = 1
+    message.answer = AsyncMock()
+
+    async with job_manager.lock(MAINTENANCE_LOCK):
+        # Обслуживание истории идёт: команда возвращается сразу, очистка ждёт в задании
+        await asyncio.wait_for(cmd_clear(message), 1)
+        await HistoryService.add_message(1, "user", "после команды")
+        message.answer.assert_not_called()
+
+    job = next(job for job in job_manager.list() if job.kind == "clear")
+    await job.task
+    message.answer.assert_awaited_once_with("История очищена.")
+    assert await ChatMessage.filter(chat_id=1).values_list("content", flat=True) == ["после команды"]
+
+
+@pytest.mark.asyncio
+async def test_maintenance_lock_is_shared_between_processes(monkeypatch):
+    monkeypatch.setattr("src.services.state.state_backend", DatabaseStateBackend())
+    monkeypatch.setattr("src.services.jobs.SharedLock.RETRY_INTERVAL", 0.01)
+    # Два процесса — два реестра заданий с общей БД
+    first, second = JobManager(), JobManager()
+    events = []
+
+    async def hold():
+        async with first.lock(MAINTENANCE_LOCK):
+            events.append("first")
+            await asyncio.sleep(0.1)
+            events.append("first done")
+
+    holder = asyncio.create_task(hold())
+    await asyncio.sleep(0.02)
+    async with second.lock(MAINTENANCE_LOCK):
+        events.append("second")
+    await holder
+
+    assert events == ["first", "first done", "second"]
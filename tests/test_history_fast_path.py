@@ -0,0 +1,78 @@
+import pytest
+from tortoise import Tortoise
+
+from config import settings
+from src.database import ChatMessage, sql
+from src.database.models import AllowedChat, ChatStat, HourlyStat
+from src.services import HistoryService
+
+
+@pytest.fixture(scope="function", autouse=True)
+async def init_db():
+    config = {
+        "connections": {"default": "sqlite://:memory:"},
+        "apps": {
+            "models": {
+                "models": ["src.database.models"],
+                "default_connection": "default",
+            }
+        },
+    }
+    await Tortoise.init(config=config)
+    await Tortoise.generate_schemas()
+    yield
+    await Tortoise.close_connections()
+
+
+async def _turns(fast: bool, monkeypatch) -> None:
+    monkeypatch.setattr(settings, "HISTORY_SQL_FAST_PATH", fast)
+    await HistoryService.add_message(1, "user", f"question {fast}", chat_type="group", title=f"Chat {fast}")
+    await HistoryService.add_message(1, "assistant", f"answer {fast}", chat_type="group", title=f"Chat {fast}")
+
+
+@pytest.mark.asyncio
+async def test_fast_path_matches_orm_rows(monkeypatch):
+    await _turns(False, monkeypatch)
+    await _turns(True, monkeypatch)
+
+    chat = await AllowedChat.get(chat_id=1, platform="telegram")
+    assert chat.title == "Chat True" and chat.is_active
+
+    # Значения, записанные обоими путями, хранятся в одном формате и попадают в те же строки счётчиков
+    stored = await sql.fetch_all("SELECT created_at FROM chat_messages ORDER BY id")
+    assert len({len(row["created_at"]) for row in stored}) == 1
+    assert await HourlyStat.all().count() == 1
+    assert (await HourlyStat.first()).messages == 4
+    chat_stat = await ChatStat.get(chat_id=1, platform="telegram")
+    assert chat_stat.message_count == 4
+
+    stats = await HistoryService.get_stats()
+    assert (stats["total_messages"], stats["user_messages"], stats["assistant_messages"]) == (4, 2, 2)
+
+
+@pytest.mark.asyncio
+async def test_fast_path_returns_saved_message(monkeypatch):
+    monkeypatch.setattr(settings, "HISTORY_SQL_FAST_PATH", True)
+    message = await HistoryService.add_message(5, "user", "hello", nickname="bob")
+
+    stored = await ChatMessage.get(id=message.id)
+    assert (stored.content, stored.nickname, stored.created_at) == ("hello", "bob", message.created_at)
+
+    message.content = "edited"
+    await message.save()
+    assert await ChatMessage.all().count() == 1
+    assert (await ChatMessage.get(id=message.id)).content == "edited"
+
+
+@pytest.mark.asyncio
+async def test_recent_turns_same_on_both_paths(monkeypatch):
+    for i in range(8):
+        await HistoryService.add_message(1, "user" if i % 2 == 0 else "assistant", f"m{i}")
+
+    monkeypatch.setattr(settings, "HISTORY_SQL_FAST_PATH", True)
+    fast = await HistoryService.get_last_messages(1, limit=3)
+    monkeypatch.setattr(settings, "HISTORY_SQL_FAST_PATH", False)
+    orm = await HistoryService.get_last_messages(1, limit=3)
+
+    assert fast == orm
+    assert [m["content"] for m in fast] == ["m2", "m3", "m4", "m5", "m6", "m7"]
@@ -0,0 +1,117 @@
+import asyncio
+
+import pytest
+
+from src.services.outbound import OutboundDispatcher, Priority, TokenBucket, _Job, split_message
+
+
+class FakeRetryAfter(Exception):
+    def __init__(self, retry_after: float):
+        super().__init__("Flood control exceeded")
+        self.retry_after = retry_after
+
+
+def _job(platform: str, chat_id: int) -> _Job:
+    return _Job(platform, chat_id, False, [], None, 0, 0)
+
+
+def test_split_message_respects_limit_and_boundaries():
+    text = "первый абзац\n\nвторой абзац " + "слово " * 10
+    chunks = split_message(text, 20)
+    assert all(len(c) <= 20 for c in chunks)
+    assert chunks[0] == "первый абзац"
+    assert split_message("x" * 45, 20) == ["x" * 20, "x" * 20, "x" * 5]
+    assert split_message("коротко", 20) == ["коротко"]
+
+
+def test_token_bucket_reservation():
+    bucket = TokenBucket(rate=10, capacity=2)
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == pytest.approx(0.1, abs=0.01)
+    bucket.block(5)
+    assert bucket.reserve() >= 4.9
+
+
+@pytest.mark.asyncio
+async def test_send_text_splits_and_keeps_order():
+    dispatcher = OutboundDispatcher(workers=4)
+    sent: list[str] = []
+
+    async def send(text: str):
+        sent.append(text)
+        return len(text)
+
+    result = await dispatcher.send_text("discord", 1, "a" * 2500, send)
+    await dispatcher.stop()
+
+    assert sent == ["a" * 2000, "a" * 500]
+    assert result == [2000, 500]
+
+
+@pytest.mark.asyncio
+async def test_retry_after_is_honoured():
+    dispatcher = OutboundDispatcher(workers=1, max_retries=2)
+    attempts = 0
+
+    async def send():
+        nonlocal attempts
+        attempts += 1
+        if attempts == 1:
+            raise FakeRetryAfter(0.01)
+        return "ok"
+
+    assert await dispatcher.submit("telegram", 1, [send]) == ["ok"]
+    assert dispatcher.stats()["retried"] == 1
+    await dispatcher.stop()
+
+
+@pytest.mark.asyncio
+async def test_high_priority_jumps_the_queue():
+    dispatcher = OutboundDispatcher(workers=1)
+    order: list[str] = []
+    gate = asyncio.Event()
+
+    async def blocker():
+        await gate.wait()
+
+    def record(name: str):
+        async def call():
+            order.append(name)
+        return call
+
+    first = asyncio.create_task(dispatcher.submit("discord", 1, [blocker]))
+    await asyncio.sleep(0.01)
+    low = asyncio.create_task(dispatcher.submit("discord", 2, [record("low")], priority=Priority.LOW))
+    high = asyncio.create_task(dispatcher.submit("discord", 3, [record("high")], priority=Priority.HIGH))
+    await asyncio.sleep(0.01)
+    gate.set()
+    await asyncio.gather(first, low, high)
+    await dispatcher.stop()
+
+    assert order == ["high", "low"]
+
+
+@pytest.mark.asyncio
+async def test_empty_chat_bucket_does_not_block_worker():
+    dispatcher = OutboundDispatcher(workers=1)
+    sent: list[str] = []
+
+    def record(name: str):
+        async def call():
+            sent.append(name)
+        return call
+
+    dispatcher._global_buckets["telegram"] = TokenBucket(rate=0.001, capacity=30)
+    # Токены первого чата исчерпаны: его вторая часть ждёт вне очереди
+    dispatcher._get_chat_bucket(_job("telegram", 1)).tokens = 1
+    first = asyncio.create_task(dispatcher.submit("telegram", 1, [record("1a"), record("1b")]))
+    await asyncio.sleep(0.01)
+    assert await asyncio.wait_for(dispatcher.submit("telegram", 2, [record("2")]), 0.1) == [None]
+    assert dispatcher.stats()["delayed"] == 1
+    # Глобальные токены потрачены только на фактические отправки
+    assert dispatcher._get_global_bucket("telegram").tokens == pytest.approx(28, abs=0.01)
+
+    assert await first == [None, None]
+    await dispatcher.stop()
+    assert sent == ["1a", "2", "1b"]
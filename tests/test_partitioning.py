@@ -0,0 +1,58 @@
+from datetime import datetime, timezone
+
+from src.database import partitioning
+from src.database.models import RetentionPolicy
+from src.services.retention_service import RetentionService
+
+
+def utc(*args) -> datetime:
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+def test_add_months_crosses_year():
+    assert partitioning.add_months(utc(2026, 11, 1), 2) == utc(2027, 1, 1)
+    assert partitioning.add_months(utc(2026, 1, 1), -1) == utc(2025, 12, 1)
+    assert partitioning.month_start(utc(2026, 10, 18, 23, 45)) == utc(2026, 10, 1)
+
+
+def test_partition_name_roundtrip():
+    name = partitioning.partition_name(utc(2026, 3, 1))
+    assert name == "chat_messages_p202603"
+    assert partitioning.parse_partition_month(name) == utc(2026, 3, 1)
+    assert partitioning.parse_partition_month(partitioning.DEFAULT_PARTITION) is None
+
+
+def test_create_partition_sql_bounds():
+    statement = partitioning.create_partition_sql(utc(2026, 12, 1))
+    assert "chat_messages_p202612 PARTITION OF chat_messages" in statement
+    assert "FROM ('2026-12-01T00:00:00+00:00') TO ('2027-01-01T00:00:00+00:00')" in statement
+
+
+def test_expired_partitions_only_whole_months():
+    partitions = [
+        {"name": partitioning.partition_name(utc(2026, m, 1)), "month": utc(2026, m, 1)} for m in (9, 7, 8, 10)
+    ]
+    partitions.append({"name": partitioning.DEFAULT_PARTITION, "month": None})
+    now = utc(2026, 10, 18)
+
+    # Граница 2026-08-19: июль закончился раньше, август ещё содержит нужные сообщения
+    assert partitioning.expired_partitions(partitions, 60, now) == ["chat_messages_p202607"]
+    assert partitioning.expired_partitions(partitions, 90, now) == []
+    assert partitioning.expired_partitions(partitions, None, now) == []
+
+
+def test_partition_max_age_respects_longer_policies():
+    def policy(platform, chat_id, max_age_days):
+        return RetentionPolicy(platform=platform, chat_id=chat_id, max_age_days=max_age_days)
+
+    policies = {(None, None): policy(None, None, 30)}
+    assert RetentionService._partition_max_age(policies) == 30
+
+    policies[("discord", None)] = policy("discord", None, 90)
+    assert RetentionService._partition_max_age(policies) == 90
+
+    # Чат с бессрочным хранением запрещает удаление секций целиком
+    policies[("telegram", 1)] = policy("telegram", 1, 0)
+    assert RetentionService._partition_max_age(policies) is None
+
+    assert RetentionService._partition_max_age({}) is None
@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+
+from config import Settings
+from src.database.config import postgres_pool_options
+from src.database.pool import InstrumentedAsyncpgClient, InstrumentedPool, PoolStats
+
+
+class FakePool:
+    """Пул из max_size соединений, выдающий их по очереди."""
+
+    def __init__(self, max_size: int):
+        self._free = asyncio.Queue()
+        for i in range(max_size):
+            self._free.put_nowait(f"conn{i}")
+        self.max_size = max_size
+
+    async def acquire(self, timeout=None):
+        return await self._free.get()
+
+    async def release(self, connection, timeout=None):
+        self._free.put_nowait(connection)
+
+    def get_size(self):
+        return self.max_size
+
+    def get_idle_size(self):
+        return self._free.qsize()
+
+    def get_max_size(self):
+        return self.max_size
+
+
+def test_pool_options_reach_asyncpg_client():
+    settings = Settings(POSTGRES_POOL_MIN_SIZE=3, POSTGRES_POOL_MAX_SIZE=7, POSTGRES_STATEMENT_CACHE_SIZE=0)
+    client = InstrumentedAsyncpgClient(
+        connection_name="default",
+        host="localhost",
+        port=5432,
+        user="postgres",
+        password="postgres",
+        database="llm_bot",
+        **postgres_pool_options(settings),
+    )
+
+    assert (client.pool_minsize, client.pool_maxsize) == (3, 7)
+    assert client.extra["statement_cache_size"] == 0
+    assert client.extra["max_queries"] == settings.POSTGRES_POOL_MAX_QUERIES
+    assert client.extra["command_timeout"] == settings.POSTGRES_COMMAND_TIMEOUT
+    assert client.application_name == "llm_bot"
+
+
+@pytest.mark.asyncio
+async def test_instrumented_pool_reports_waits_and_saturation():
+    stats = PoolStats()
+    pool = InstrumentedPool(FakePool(2), stats)
+
+    first = await pool.acquire()
+    second = await pool.acquire()
+    assert stats.to_dict(pool)["saturation"] == 1.0
+
+    # Третий запрос ждёт, пока освободится соединение
+    waiter = asyncio.create_task(pool.acquire())
+    await asyncio.sleep(0.05)
+    assert stats.waiting == 1
+    await pool.release(first)
+    third = await waiter
+
+    await pool.release(second)
+    await pool.release(third)
+    report = stats.to_dict(pool)
+    assert report["acquired"] == 3
+    assert report["in_use"] == 0
+    assert report["peak_in_use"] == 2
+    assert report["slow_acquires"] == 1
+    assert report["wait_max_ms"] >= 20
+    assert report["idle"] == 2
@@ -0,0 +1,51 @@
+import asyncio
+import subprocess
+import sys
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from config import settings
+from src.bot import platforms
+from src.bot.platforms import Platform, PlatformManager, discord_token
+
+
+def test_telegram_only_import_skips_discord_and_yt_dlp():
+    # Отдельный процесс: другие тесты подменяют discord в sys.modules
+    code = (
+        "import sys, src.main; "
+        "print(sorted({m.split('.')[0] for m in sys.modules} & {'discord', 'yt_dlp'}))"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip().splitlines()[-1] == "[]"
+
+
+@pytest.mark.parametrize("token, expected", [
+    (None, None),
+    ("", None),
+    ("your_token_here", None),
+    ("'abc' ", "abc"),
+])
+def test_discord_token(monkeypatch, token, expected):
+    monkeypatch.setattr(settings, "DISCORD_BOT_TOKEN", token)
+    assert discord_token() == expected
+
+
+@pytest.mark.asyncio
+async def test_only_configured_platforms_are_loaded(monkeypatch):
+    adapter = MagicMock(start=AsyncMock(), stop=AsyncMock())
+    fake_module = MagicMock(adapter=adapter)
+    monkeypatch.setattr(platforms.importlib, "import_module", lambda name: fake_module)
+
+    manager = PlatformManager([
+        Platform("on", "fake.on", "adapter", lambda: True),
+        Platform("off", "fake.off", "adapter", lambda: False),
+    ])
+    manager.start()
+    assert manager.stats() == {"available": ["on", "off"], "loaded": ["on"]}
+    await asyncio.sleep(0)
+
+    await manager.stop()
+    adapter.start.assert_awaited_once()
+    adapter.stop.assert_awaited_once()
+    assert manager.stats()["loaded"] == []
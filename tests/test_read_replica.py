@@ -0,0 +1,90 @@
+from datetime import datetime, timezone
+
+import pytest
+from tortoise import Tortoise, connections
+from tortoise.utils import get_schema_sql
+
+from src.database import sql
+from src.database.fulltext import ensure_fulltext_index
+from src.database.replica import ReplicaRouter, read_replica, replica_router
+from src.services import HistoryService, SearchService, StatsService
+
+
+@pytest.fixture(scope="function", autouse=True)
+async def init_db(tmp_path, monkeypatch):
+    for attr, value in vars(ReplicaRouter()).items():
+        monkeypatch.setattr(replica_router, attr, value)
+    config = {
+        "connections": {
+            "default": f"sqlite://{tmp_path / 'primary.db'}",
+            "replica": f"sqlite://{tmp_path / 'replica.db'}",
+        },
+        "apps": {
+            "models": {
+                "models": ["src.database.models"],
+                "default_connection": "default",
+            }
+        },
+    }
+    await Tortoise.init(config=config)
+    await Tortoise.generate_schemas()
+    replica = connections.get("replica")
+    await replica.execute_script(get_schema_sql(connections.get("default"), safe=True))
+    await ensure_fulltext_index()
+    await ensure_fulltext_index(replica)
+
+    # Разные данные на основном сервере и реплике показывают, откуда прочитан ответ
+    await HistoryService.add_message(1, "user", "primary message")
+    # Реплика заполняется напрямую: запись сообщения идёт в транзакции основного соединения
+    for i in range(3):
+        await sql.execute(
+            "INSERT INTO chat_messages (chat_id, platform, chat_type, role, content, created_at) "
+            "VALUES (?, 'telegram', 'private', 'user', ?, ?)",
+            [2, f"replica message {i}", sql.datetime_param(datetime.now(timezone.utc), replica)],
+            replica,
+        )
+    async with read_replica():
+        await StatsService.rebuild()
+    yield
+    await Tortoise.close_connections()
+    # Tortoise дополняет конфигурацию соединений при повторной инициализации, а не заменяет её
+    connections.db_config.pop("replica", None)
+
+
+@pytest.mark.asyncio
+async def test_admin_reads_go_to_replica():
+    assert (await HistoryService.get_stats())["total_messages"] == 3
+    page = await HistoryService.list_chats()
+    assert [item["chat_id"] for item in page["items"]] == [2]
+    transcript = [row["content"] async for row in HistoryService.iter_transcript(2)]
+    assert transcript == ["replica message 0", "replica message 1", "replica message 2"]
+    assert (await SearchService.search("replica"))["items"]
+
+    # Запись ботов и чтение контекста остаются на основном сервере
+    assert await HistoryService.get_last_messages(1) == [
+        {"role": "user", "content": "primary message", "nickname": None}
+    ]
+    assert replica_router.stats()["routed"] >= 4
+
+
+@pytest.mark.asyncio
+async def test_lagging_replica_falls_back_to_primary(monkeypatch):
+    async def lagging(client):
+        return 120.0
+
+    monkeypatch.setattr(ReplicaRouter, "measure_lag", staticmethod(lagging))
+    replica_router.checked_at = 0.0
+    assert (await HistoryService.get_stats())["total_messages"] == 1
+    assert replica_router.stats()["healthy"] is False
+    assert replica_router.stats()["fallbacks"] == 1
+
+
+@pytest.mark.asyncio
+async def test_unreachable_replica_falls_back_to_primary(monkeypatch):
+    async def broken(client):
+        raise ConnectionError("replica is down")
+
+    monkeypatch.setattr(ReplicaRouter, "measure_lag", staticmethod(broken))
+    replica_router.checked_at = 0.0
+    assert (await HistoryService.get_stats())["total_messages"] == 1
+    assert replica_router.stats()["last_error"] == "replica is down"
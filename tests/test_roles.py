@@ -0,0 +1,81 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from httpx import AsyncClient, ASGITransport
+from tortoise import Tortoise
+
+from src.services import retention_scheduler
+from src.web.app import ROLES, create_app
+
+
+@pytest.fixture(scope="function", autouse=True)
+async def init_db(tmp_path, monkeypatch):
+    # Приложение само инициализирует БД в lifespan по настройкам из окружения
+    monkeypatch.setenv("DATABASE_PATH", str(tmp_path / "bot.db"))
+    monkeypatch.setenv("SQLITE_WRITE_QUEUE", "false")
+    config = {
+        "connections": {"default": f"sqlite://{tmp_path / 'bot.db'}"},
+        "apps": {
+            "models": {
+                "models": ["src.database.models"],
+                "default_connection": "default",
+            }
+        },
+    }
+    await Tortoise.init(config=config)
+    await Tortoise.generate_schemas()
+    await Tortoise.close_connections()
+    yield
+    await Tortoise.close_connections()
+
+
+def _telegram():
+    stopped = asyncio.Event()
+
+    async def start_polling(bot, **kwargs):
+        await stopped.wait()
+
+    async def stop_polling():
+        stopped.set()
+
+    dp = MagicMock(start_polling=start_polling, stop_polling=AsyncMock(side_effect=stop_polling))
+    return AsyncMock(), dp
+
+
+@pytest.mark.asyncio
+async def test_admin_web_serves_only_admin():
+    app = create_app(None, None, components=ROLES["admin-web"], role="admin-web")
+    async with app.router.lifespan_context(app):
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            assert (await client.get("/admin/login")).status_code == 200
+            assert (await client.post("/webhook", json={})).status_code == 404
+            health = (await client.get("/health")).json()
+    assert health == {"status": "ok", "role": "admin-web", "components": {"database": "ok"}}
+    assert not retention_scheduler.is_running
+
+
+@pytest.mark.asyncio
+async def test_telegram_worker_health_and_graceful_stop():
+    bot, dp = _telegram()
+    app = create_app(bot, dp, components=ROLES["telegram-worker"], role="telegram-worker")
+    async with app.router.lifespan_context(app):
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            assert (await client.get("/admin/login")).status_code == 404
+            resp = await client.get("/health")
+            assert resp.status_code == 200
+            assert resp.json()["components"] == {"telegram": "ok", "database": "ok"}
+    dp.stop_polling.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_maintenance_health_reports_stopped_scheduler():
+    app = create_app(None, None, components=ROLES["maintenance"], role="maintenance")
+    async with app.router.lifespan_context(app):
+        assert retention_scheduler.is_running
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            assert (await client.get("/health")).json()["components"]["maintenance"] == "ok"
+            await retention_scheduler.stop()
+            resp = await client.get("/health")
+    assert resp.status_code == 503
+    assert resp.json()["status"] == "degraded"
@@ -0,0 +1,124 @@
+import shutil
+
+import pytest
+from tortoise import Tortoise
+
+from src.database import schema, sql
+
+
+def _config(path) -> dict:
+    return {
+        "connections": {"default": f"sqlite://{path}"},
+        "apps": {
+            "models": {
+                "models": ["src.database.models", "aerich.models"],
+                "default_connection": "default",
+            }
+        },
+    }
+
+
+@pytest.fixture(scope="function", autouse=True)
+async def init_db():
+    yield
+    await Tortoise.close_connections()
+
+
+def _shipped(tmp_path):
+    """Копия поставленных миграций, в которую тест может добавлять новые."""
+    location = tmp_path / "migrations"
+    shutil.copytree(schema.MIGRATIONS_LOCATION, location)
+    return location
+
+
+@pytest.mark.asyncio
+async def test_shipped_migrations_applied_only_when_pending(tmp_path, monkeypatch):
+    location = _shipped(tmp_path)
+
+    # Пустая база получает поставленную миграцию
+    config = _config(tmp_path / "prod.db")
+    await Tortoise.init(config=config)
+    status = await schema.get_status(location)
+    assert not status.initialized and status.shipped and status.pending == status.shipped
+
+    status = await schema.ensure_schema(config, location)
+    assert status.up_to_date
+    assert await schema.applied_migrations() == set(status.shipped)
+    assert await schema.missing_tables() == []
+
+    # Повторный старт: только проверка, aerich не нужен
+    async def fail(*args, **kwargs):
+        raise AssertionError("upgrade must not run")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(schema, "upgrade", fail)
+        assert (await schema.ensure_schema(config, location)).up_to_date
+
+    # Новая поставленная миграция применяется при следующем старте
+    first = (location / "models" / status.shipped[0]).read_text()
+    models_state = first[first.index("MODELS_STATE = "):]
+    (location / "models" / "1_20260101000000_add_note.py").write_text(
+        "from tortoise import BaseDBAsyncClient\n\n\n"
+        "async def upgrade(db: BaseDBAsyncClient) -> str:\n"
+        "    return 'CREATE TABLE release_note (id INTEGER PRIMARY KEY);'\n\n\n"
+        "async def downgrade(db: BaseDBAsyncClient) -> str:\n"
+        "    return 'DROP TABLE release_note;'\n\n\n" + models_state
+    )
+    status = await schema.ensure_schema(config, location)
+    assert status.up_to_date and len(status.shipped) == len(schema.shipped_migrations()) + 1
+    assert await sql.fetch_all("SELECT name FROM sqlite_master WHERE name = 'release_note'")
+
+
+@pytest.mark.asyncio
+async def test_database_created_before_shipped_migrations_is_upgraded(tmp_path, monkeypatch):
+    # База развёртывания, созданная по моделям прежней версии миграцией, сгенерированной на месте
+    from aerich import Command
+
+    legacy = (
+        "from tortoise import fields, models\n\n\n"
+        "class Setting(models.Model):\n"
+        "    key = fields.CharField(max_length=255, pk=True)\n"
+        "    value = fields.TextField()\n\n"
+        "    class Meta:\n"
+        "        table = 'settings'\n"
+    )
+    (tmp_path / "legacy_models.py").write_text(legacy)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    legacy_config = _config(tmp_path / "prod.db")
+    legacy_config["apps"]["models"]["models"] = ["legacy_models", "aerich.models"]
+    await Command(tortoise_config=legacy_config, app=schema.APP, location=str(tmp_path / "generated")).init_db(safe=True)
+    await Tortoise.close_connections()
+
+    # Новый образ: поставленная первая миграция создаёт недостающие таблицы
+    config = _config(tmp_path / "prod.db")
+    await Tortoise.init(config=config)
+    await sql.execute("INSERT INTO settings (key, value) VALUES ('system_prompt', 'kept')")
+    assert "stat_counters" in await schema.missing_tables()
+    status = await schema.ensure_schema(config, _shipped(tmp_path))
+    assert status.up_to_date
+    assert await schema.missing_tables() == []
+    assert await sql.fetch_all("SELECT value FROM settings WHERE key = 'system_prompt'") == [{"value": "kept"}]
+
+
+@pytest.mark.asyncio
+async def test_missing_tables_fail_boot(tmp_path):
+    location = _shipped(tmp_path)
+    config = _config(tmp_path / "bot.db")
+    await Tortoise.init(config=config)
+    await schema.ensure_schema(config, location)
+    await sql.execute("DROP TABLE state_events")
+
+    with pytest.raises(RuntimeError, match="state_events"):
+        await schema.ensure_schema(config, location)
+
+
+@pytest.mark.asyncio
+async def test_boot_does_not_generate_migrations(tmp_path):
+    # Без поставленных миграций модели с базой не сравниваются: запуск прерывается
+    location = tmp_path / "empty"
+    config = _config(tmp_path / "bot.db")
+    await Tortoise.init(config=config)
+
+    with pytest.raises(RuntimeError, match="missing tables"):
+        await schema.ensure_schema(config, location)
+    assert not location.exists()
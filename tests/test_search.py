@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from tortoise import Tortoise
+
+from src.database import ChatMessage
+from src.database.fulltext import ensure_fulltext_index
+from src.services import HistoryService, SearchService
+
+
+@pytest.fixture(scope="function", autouse=True)
+async def init_db():
+    config = {
+        "connections": {"default": "sqlite://:memory:"},
+        "apps": {
+            "models": {
+                "models": ["src.database.models"],
+                "default_connection": "default",
+            }
+        },
+    }
+    await Tortoise.init(config=config)
+    await Tortoise.generate_schemas()
+    yield
+    await Tortoise.close_connections()
+
+
+@pytest.mark.asyncio
+async def test_existing_history_is_indexed_and_new_writes_synced():
+    await HistoryService.add_message(1, "user", "Как настроить вебхук для бота?")
+    await ensure_fulltext_index()
+    await HistoryService.add_message(2, "user", "вебхук <b>снова</b> падает", platform="discord")
+    await HistoryService.add_message(3, "user", "Совсем другая тема")
+
+    result = await SearchService.search("вебхук")
+    assert {item["chat_id"] for item in result["items"]} == {1, 2}
+    snippet = next(i["snippet"] for i in result["items"] if i["chat_id"] == 2)
+    assert snippet == "<mark>вебхук</mark> &lt;b&gt;снова&lt;/b&gt; падает"
+
+    assert [i["chat_id"] for i in (await SearchService.search("вебхук", platform="discord"))["items"]] == [2]
+    assert (await SearchService.search("вебхук бота"))["items"][0]["chat_id"] == 1
+
+    # Удаление истории убирает сообщения из индекса
+    await HistoryService.clear_history(1)
+    assert [i["chat_id"] for i in (await SearchService.search("вебхук"))["items"]] == [2]
+
+
+@pytest.mark.asyncio
+async def test_search_paging_and_date_filter():
+    await ensure_fulltext_index()
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    for i in range(5):
+        message = await HistoryService.add_message(1, "user", f"ошибка номер {i}")
+        await ChatMessage.filter(id=message.id).update(created_at=start + timedelta(days=i))
+
+    first = await SearchService.search("ошибка", limit=3)
+    second = await SearchService.search("ошибка", limit=3, offset=3)
+    assert first["has_more"] and not second["has_more"]
+    assert len({i["id"] for i in first["items"] + second["items"]}) == 5
+
+    result = await SearchService.search("ошибка", date_from=start + timedelta(days=1), date_to=start + timedelta(days=3))
+    assert len(result["items"]) == 2
+
+    assert await SearchService.search("  !!! ") == {"items": [], "has_more": False}
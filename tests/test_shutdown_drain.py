@@ -0,0 +1,88 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from tortoise import Tortoise
+
+from src.database.models import ChatMessage
+from src.database.writer import WriteQueue
+from src.services import HistoryService, message_debouncer, outbound_dispatcher
+from src.shutdown import ShutdownDrain
+from src.web.app import ROLES, create_app
+
+
+def _config(tmp_path):
+    return {
+        "connections": {"default": f"sqlite://{tmp_path / 'bot.db'}"},
+        "apps": {
+            "models": {
+                "models": ["src.database.models"],
+                "default_connection": "default",
+            }
+        },
+    }
+
+
+@pytest.fixture(scope="function", autouse=True)
+async def init_db(tmp_path, monkeypatch):
+    # Приложение само инициализирует БД в lifespan по настройкам из окружения
+    monkeypatch.setenv("DATABASE_PATH", str(tmp_path / "bot.db"))
+    await Tortoise.init(config=_config(tmp_path))
+    await Tortoise.generate_schemas()
+    await Tortoise.close_connections()
+    yield
+    await Tortoise.close_connections()
+
+
+def _telegram():
+    stopped = asyncio.Event()
+
+    async def start_polling(bot, **kwargs):
+        await stopped.wait()
+
+    async def stop_polling():
+        stopped.set()
+
+    dp = MagicMock(start_polling=start_polling, stop_polling=AsyncMock(side_effect=stop_polling))
+    return AsyncMock(), dp
+
+
+@pytest.mark.asyncio
+async def test_shutdown_drains_debounced_generation_and_writes(tmp_path, monkeypatch):
+    monkeypatch.setattr(message_debouncer, "window", 30.0)
+    # Отдельная очередь записи, чтобы не менять счётчики общей
+    queue = WriteQueue()
+    monkeypatch.setattr("src.web.app.write_queue", queue)
+    monkeypatch.setattr("src.services.history_service.write_queue", queue)
+    send = AsyncMock()
+
+    async def generate():
+        await asyncio.sleep(0.2)
+        await HistoryService.add_message(1, "assistant", "ответ", platform="telegram")
+        await outbound_dispatcher.send_text("telegram", 1, "ответ", send)
+
+    bot, dp = _telegram()
+    app = create_app(bot, dp, components=ROLES["telegram-worker"], role="telegram-worker")
+    async with app.router.lifespan_context(app):
+        # Окно склейки ещё не истекло: без дренажа ответ был бы потерян
+        await message_debouncer.submit("telegram", 1, generate)
+
+    send.assert_awaited_once_with("ответ")
+    assert queue.stats()["writes"] == 1 and not queue.is_running
+    assert message_debouncer.pending == 0
+    await Tortoise.init(config=_config(tmp_path))
+    assert await ChatMessage.filter(chat_id=1, role="assistant").count() == 1
+
+
+@pytest.mark.asyncio
+async def test_drain_times_out_on_stuck_work():
+    drain = ShutdownDrain()
+    pending = {"генераций": 2}
+
+    assert await drain.wait({"генераций": lambda: pending["генераций"]}, timeout=0.05) is False
+    assert drain.timed_out
+    assert drain.remaining == {"генераций": 2}
+
+    drain.reset()
+    pending["генераций"] = 0
+    assert await drain.wait({"генераций": lambda: pending["генераций"]}, timeout=1) is True
@@ -0,0 +1,126 @@
+import asyncio
+
+import pytest
+from tortoise import Tortoise
+
+from src.services.state import DatabaseStateBackend, MemoryStateBackend
+
+
+@pytest.fixture(scope="function", autouse=True)
+async def init_db():
+    config = {
+        "connections": {"default": "sqlite://:memory:"},
+        "apps": {
+            "models": {
+                "models": ["src.database.models"],
+                "default_connection": "default",
+            }
+        },
+    }
+    await Tortoise.init(config=config)
+    await Tortoise.generate_schemas()
+    yield
+    await Tortoise.close_connections()
+
+
+@pytest.fixture(params=["memory", "database"])
+def backend(request):
+    if request.param == "memory":
+        return MemoryStateBackend()
+    return DatabaseStateBackend(poll_interval=0.01)
+
+
+@pytest.mark.asyncio
+async def test_set_get_pop(backend):
+    assert await backend.get("k") is None
+    assert await backend.set("k", {"a": [1, 2]}) is True
+    assert await backend.get("k") == {"a": [1, 2]}
+    assert await backend.set("k", "new") is True
+    assert await backend.pop("k") == "new"
+    assert await backend.pop("k") is None
+    assert await backend.get("k") is None
+
+
+@pytest.mark.asyncio
+async def test_ttl_and_only_if_absent(backend):
+    assert await backend.set("lease", "a", ttl=60, only_if_absent=True) is True
+    assert await backend.set("lease", "b", ttl=60, only_if_absent=True) is False
+    assert await backend.get("lease") == "a"
+
+    # Истёкший ключ не читается и может быть захвачен снова
+    assert await backend.set("short", "a", ttl=-1) is True
+    assert await backend.get("short") is None
+    assert await backend.pop("short") is None
+    assert await backend.set("short", "b", ttl=60, only_if_absent=True) is True
+    assert await backend.get("short") == "b"
+
+
+@pytest.mark.asyncio
+async def test_compare_and_delete(backend):
+    await backend.set("owner", "replica-1")
+    assert await backend.compare_and_delete("owner", "replica-2") is False
+    assert await backend.get("owner") == "replica-1"
+    assert await backend.compare_and_delete("owner", "replica-1") is True
+    assert await backend.get("owner") is None
+
+
+@pytest.mark.asyncio
+async def test_pubsub(backend):
+    await backend.publish("channel", {"before": True})
+    subscription = await backend.subscribe("channel")
+    other = await backend.subscribe("other")
+
+    await backend.publish("channel", {"n": 1})
+    backend.publish_nowait("channel", {"n": 2})
+    await backend.close()
+
+    assert await asyncio.wait_for(subscription.get(), 1) == {"n": 1}
+    assert await asyncio.wait_for(subscription.get(), 1) == {"n": 2}
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(other.get(), 0.05)
+    await subscription.close()
+    await other.close()
+
+
+@pytest.mark.asyncio
+async def test_database_backend_shared_between_instances():
+    first = DatabaseStateBackend(poll_interval=0.01)
+    second = DatabaseStateBackend(poll_interval=0.01)
+
+    assert await first.set("telegram:waiting_prompt:1", True, ttl=60)
+    assert await second.pop("telegram:waiting_prompt:1") is True
+    assert await first.pop("telegram:waiting_prompt:1") is None
+
+    subscription = await second.subscribe("admin:cache-invalidate")
+    await first.publish("admin:cache-invalidate", {"origin": "first"})
+    assert await asyncio.wait_for(subscription.get(), 1) == {"origin": "first"}
+
+    await first.set("expired", 1, ttl=-1)
+    await first.publish("old", {})
+    first.event_retention = -1
+    await first.purge()
+    assert await second.get("telegram:waiting_prompt:1") is None
+    assert await second.get("expired") is None
+
+
+@pytest.mark.asyncio
+async def test_set_prompt_flow_across_replicas(monkeypatch):
+    from unittest.mock import AsyncMock, MagicMock
+
+    from src.bot.telegram import handlers
+    from src.services import SettingsService
+
+    monkeypatch.setattr(handlers, "_get_admin_ids", lambda: {42})
+    message = MagicMock()
+    message.from_user.id = 42
+    message.text = "Новый промпт"
+    message.answer = AsyncMock()
+
+    # /set_prompt принимает одна реплика, следующее сообщение — другая
+    monkeypatch.setattr(handlers, "state_backend", DatabaseStateBackend())
+    await handlers.cmd_set_prompt(message)
+    monkeypatch.setattr(handlers, "state_backend", DatabaseStateBackend())
+    await handlers.on_text(message)
+
+    assert await SettingsService.get_system_prompt() == "Новый промпт"
+    message.answer.assert_called_with("Промпт обновлён.")
@@ -0,0 +1,142 @@
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+from httpx import AsyncClient, ASGITransport
+from tortoise import Tortoise
+
+from src.services import HistoryService, UserService, admin_cache, job_manager
+from src.services.cache import StaleWhileRevalidateCache
+from src.web.app import create_app
+
+
+@pytest.fixture(scope="function", autouse=True)
+async def init_db():
+    config = {
+        "connections": {"default": "sqlite://:memory:"},
+        "apps": {
+            "models": {
+                "models": ["src.database.models"],
+                "default_connection": "default",
+            }
+        },
+    }
+    await Tortoise.init(config=config)
+    await Tortoise.generate_schemas()
+    admin_cache.invalidate()
+    yield
+    admin_cache.invalidate()
+    await Tortoise.close_connections()
+
+
+@pytest.fixture
+async def client():
+    app = create_app(MagicMock(), MagicMock())
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as c:
+        await UserService.create_user("admin", "admin", is_superuser=True)
+        response = await c.post("/admin/login", data={"username": "admin", "password": "admin"})
+        assert response.status_code == 303
+        yield c
+
+
+@pytest.mark.asyncio
+async def test_swr_serves_stale_and_refreshes_in_background():
+    cache = StaleWhileRevalidateCache(ttl=0.05, stale_ttl=10)
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        return {"n": len(calls)}
+
+    first = await cache.get("k", loader)
+    assert first.value == {"n": 1}
+    assert (await cache.get("k", loader)).value == {"n": 1}
+    assert len(calls) == 1
+
+    await asyncio.sleep(0.06)
+    # Устаревший снимок отдаётся сразу, обновление идёт в фоне
+    stale = await cache.get("k", loader)
+    assert stale.value == {"n": 1}
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    assert (await cache.get("k", loader)).value == {"n": 2}
+    assert cache.stats()["stale_hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_swr_invalidate_forces_reload():
+    cache = StaleWhileRevalidateCache(ttl=60, stale_ttl=60)
+    values = iter([1, 2])
+
+    async def loader():
+        return next(values)
+
+    assert (await cache.get("k", loader)).value == 1
+    cache.invalidate()
+    assert (await cache.get("k", loader)).value == 2
+
+
+@pytest.mark.asyncio
+async def test_api_stats_not_modified(client):
+    await HistoryService.add_message(1, "user", "hi", platform="telegram")
+
+    resp = await client.get("/admin/api/stats")
+    assert resp.status_code == 200
+    assert resp.json()["total_messages"] == 1
+    etag = resp.headers["etag"]
+
+    resp = await client.get("/admin/api/stats", headers={"If-None-Match": etag})
+    assert resp.status_code == 304
+
+    resp = await client.get("/admin/api/stats", headers={"If-Modified-Since": resp.headers["last-modified"]})
+    assert resp.status_code == 304
+
+    # Очистка из админки сбрасывает снимок
+    resp = await client.post("/admin/api/clear/1/telegram")
+    assert resp.status_code == 200
+    await job_manager.get(resp.json()["id"]).task
+    resp = await client.get("/admin/api/stats", headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert resp.json()["total_messages"] == 0
+
+
+@pytest.mark.asyncio
+async def test_api_chats_not_modified_until_whitelist_changes(client):
+    await HistoryService.add_message(1, "user", "hi", platform="telegram")
+    await HistoryService.add_message(2, "user", "hi", platform="telegram")
+
+    resp = await client.get("/admin/api/chats", params={"limit": 1})
+    assert resp.status_code == 200
+    page = resp.json()
+    etag = resp.headers["etag"]
+
+    resp = await client.get("/admin/api/chats", params={"limit": 1}, headers={"If-None-Match": etag})
+    assert resp.status_code == 304
+    # Следующая страница — отдельный снимок
+    resp = await client.get("/admin/api/chats", params={"limit": 1, "cursor": page["next_cursor"]})
+    assert resp.status_code == 200 and resp.headers["etag"] != etag
+
+    resp = await client.post("/admin/api/whitelist", json={"chat_id": 2, "title": "Support", "platform": "telegram"})
+    assert resp.status_code == 200
+    resp = await client.get("/admin/api/chats", params={"limit": 1}, headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert resp.json()["items"][0]["title"] == "Support"
+
+
+@pytest.mark.asyncio
+async def test_api_chats_bad_cursor(client):
+    resp = await client.get("/admin/api/chats", params={"cursor": "not-a-cursor"})
+    assert resp.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_swr_drops_expired_snapshots():
+    cache = StaleWhileRevalidateCache(ttl=0.01, stale_ttl=0.01)
+
+    async def loader():
+        return 1
+
+    await cache.get("old", loader)
+    await asyncio.sleep(0.03)
+    await cache.get("new", loader)
+    assert cache.stats()["entries"] == 1
@@ -0,0 +1,114 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from tortoise import Tortoise
+
+from src.database import ChatMessage
+from src.database.models import ChatStat, HourlyStat, StatCounter
+from src.services import HistoryService, StatsService
+
+
+@pytest.fixture(scope="function", autouse=True)
+async def init_db():
+    config = {
+        "connections": {"default": "sqlite://:memory:"},
+        "apps": {
+            "models": {
+                "models": ["src.database.models"],
+                "default_connection": "default",
+            }
+        },
+    }
+    await Tortoise.init(config=config)
+    await Tortoise.generate_schemas()
+    yield
+    await Tortoise.close_connections()
+
+
+async def _fill():
+    await HistoryService.add_message(1, "user", "a", platform="telegram")
+    await HistoryService.add_message(1, "assistant", "b", platform="telegram")
+    await HistoryService.add_message(2, "user", "c", platform="discord", chat_type="guild_text")
+
+
+@pytest.mark.asyncio
+async def test_counters_follow_writes():
+    await _fill()
+
+    stats = await HistoryService.get_stats()
+    assert stats == {
+        "chats_count": 2,
+        "total_messages": 3,
+        "telegram_messages": 2,
+        "discord_messages": 1,
+        "messages_24h": 3,
+        "active_chats_24h": 2,
+        "assistant_messages": 1,
+        "user_messages": 2,
+    }
+
+    hourly = await StatsService.get_hourly_activity(hours=24)
+    assert len(hourly) == 24
+    assert hourly[-1]["total"] == 3
+    assert hourly[-1]["discord"] == 1
+    daily = await StatsService.get_daily_activity(days=7)
+    assert daily[-1]["total"] == 3
+
+
+@pytest.mark.asyncio
+async def test_clear_chat_subtracts_counters():
+    await _fill()
+    await HistoryService.clear_history(1, platform="telegram")
+
+    stats = await HistoryService.get_stats()
+    assert stats["total_messages"] == 1
+    assert stats["telegram_messages"] == 0
+    assert stats["assistant_messages"] == 0
+    assert stats["chats_count"] == 1
+
+    await HistoryService.clear_all_history()
+    stats = await HistoryService.get_stats()
+    assert stats["total_messages"] == 0
+    assert stats["messages_24h"] == 0
+
+
+@pytest.mark.asyncio
+async def test_rebuild_matches_incremental():
+    await _fill()
+    expected = await HistoryService.get_stats()
+    counters = dict(await StatCounter.all().values_list("name", "value"))
+
+    await StatsService.reset()
+    await StatsService.ensure_initialized()
+
+    assert await HistoryService.get_stats() == expected
+    assert dict(await StatCounter.all().values_list("name", "value")) == counters
+    assert (await ChatStat.get(chat_id=1, platform="telegram")).message_count == 2
+
+
+@pytest.mark.asyncio
+async def test_rebuild_groups_hours_in_utc():
+    now = datetime.now(timezone.utc).replace(minute=30, second=0, microsecond=0)
+    msk = timezone(timedelta(hours=3))
+    for created_at in (now - timedelta(hours=2), now - timedelta(hours=2, minutes=40), (now - timedelta(hours=5)).astimezone(msk)):
+        message = await HistoryService.add_message(1, "user", "a")
+        await ChatMessage.filter(id=message.id).update(created_at=created_at)
+
+    await StatsService.rebuild()
+
+    hourly = {h["bucket"]: h["total"] for h in await StatsService.get_hourly_activity(hours=24) if h["total"]}
+    current = now.replace(minute=0)
+    assert hourly == {current - timedelta(hours=5): 1, current - timedelta(hours=3): 1, current - timedelta(hours=2): 1}
+    assert await HourlyStat.all().count() == 3
+
+
+@pytest.mark.asyncio
+async def test_message_and_counters_commit_together(monkeypatch):
+    async def broken(*args):
+        raise RuntimeError("stats unavailable")
+
+    monkeypatch.setattr(StatsService, "record_message", broken)
+    with pytest.raises(RuntimeError):
+        await HistoryService.add_message(1, "user", "a")
+
+    assert not await ChatMessage.exists()
@@ -0,0 +1,60 @@
+from aiogram.types import Message, User
+
+from src.bot.telegram.handlers import extract_bot_mention
+
+BOT = User(id=999, is_bot=True, first_name="Bot", username="LLM_Bot")
+
+
+def make_message(text: str, entities: list[dict] | None = None) -> Message:
+    return Message.model_validate({
+        "message_id": 1,
+        "date": 0,
+        "chat": {"id": -100, "type": "supergroup", "title": "Group"},
+        "text": text,
+        "entities": entities or [],
+    })
+
+
+def test_mention_entity_is_stripped_and_case_preserved():
+    message = make_message(
+        "@llm_bot Расскажи про Python",
+        [{"type": "mention", "offset": 0, "length": 8}],
+    )
+    assert extract_bot_mention(message, BOT) == (True, "Расскажи про Python")
+
+
+def test_mention_offsets_are_utf16():
+    # Эмодзи занимает две UTF-16 единицы, смещение упоминания учитывает это
+    message = make_message(
+        "🙂 @LLM_Bot Привет",
+        [{"type": "mention", "offset": 3, "length": 8}],
+    )
+    assert extract_bot_mention(message, BOT) == (True, "🙂 Привет")
+
+
+def test_whitespace_around_stripped_mention_is_collapsed():
+    cases = [
+        ("Скажи @LLM_Bot   как дела", 6, "Скажи как дела"),
+        ("Вопрос:\n@LLM_Bot что это?", 8, "Вопрос:\nчто это?"),
+        ("Спасибо @LLM_Bot, всё понятно", 8, "Спасибо, всё понятно"),
+        ("Привет@LLM_Bot", 6, "Привет"),
+    ]
+    for text, offset, expected in cases:
+        message = make_message(text, [{"type": "mention", "offset": offset, "length": 8}])
+        assert extract_bot_mention(message, BOT) == (True, expected)
+
+
+def test_text_mention_by_user_id():
+    message = make_message(
+        "Bot, помоги",
+        [{"type": "text_mention", "offset": 0, "length": 3, "user": BOT.model_dump()}],
+    )
+    assert extract_bot_mention(message, BOT) == (True, ", помоги")
+
+
+def test_other_mentions_and_plain_text_are_ignored():
+    message = make_message(
+        "@someone спроси у @LLM_Bot позже",
+        [{"type": "mention", "offset": 0, "length": 8}],
+    )
+    assert extract_bot_mention(message, BOT) == (False, "@someone спроси у @LLM_Bot позже")
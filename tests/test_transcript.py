@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta, timezone
+
+from unittest.mock import MagicMock
+
+import pytest
+from httpx import AsyncClient, ASGITransport
+from tortoise import Tortoise
+
+from src.database import ChatMessage
+from src.services import HistoryService, UserService
+from src.web.app import create_app
+
+
+@pytest.fixture(scope="function", autouse=True)
+async def init_db():
+    config = {
+        "connections": {"default": "sqlite://:memory:"},
+        "apps": {
+            "models": {
+                "models": ["src.database.models"],
+                "default_connection": "default",
+            }
+        },
+    }
+    await Tortoise.init(config=config)
+    await Tortoise.generate_schemas()
+    yield
+    await Tortoise.close_connections()
+
+
+@pytest.fixture
+async def client():
+    app = create_app(MagicMock(), MagicMock())
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as c:
+        await UserService.create_user("admin", "admin", is_superuser=True)
+        response = await c.post("/admin/login", data={"username": "admin", "password": "admin"})
+        assert response.status_code == 303
+        yield c
+
+
+async def _fill(count: int = 25) -> list[int]:
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    ids = []
+    for i in range(count):
+        message = await HistoryService.add_message(1, "user", f"m{i}", platform="telegram")
+        await ChatMessage.filter(id=message.id).update(created_at=start + timedelta(hours=i))
+        ids.append(message.id)
+    # Сообщения другого чата не должны попадать в выдачу
+    await HistoryService.add_message(2, "user", "other", platform="telegram")
+    return ids
+
+
+async def _page(**kwargs) -> list[str]:
+    return [row["content"] async for row in HistoryService.iter_transcript(1, "telegram", **kwargs)]
+
+
+@pytest.mark.asyncio
+async def test_transcript_pages_both_directions():
+    ids = await _fill()
+
+    assert await _page(limit=10, chunk_size=3) == [f"m{i}" for i in range(15, 25)]
+    assert await _page(limit=10, before=ids[15], chunk_size=3) == [f"m{i}" for i in range(5, 15)]
+    assert await _page(limit=10, before=ids[5]) == [f"m{i}" for i in range(0, 5)]
+    assert await _page(limit=10, after=ids[20]) == [f"m{i}" for i in range(21, 25)]
+
+    at = datetime(2026, 1, 1, 7, 30, tzinfo=timezone.utc)
+    assert await _page(limit=3, at=at) == ["m8", "m9", "m10"]
+    assert await _page(limit=3, at=at + timedelta(days=30)) == []
+
+    with pytest.raises(ValueError):
+        await _page(before=ids[1], after=ids[0])
+
+
+@pytest.mark.asyncio
+async def test_transcript_api_cursors(client):
+    ids = await _fill()
+
+    resp = await client.get("/admin/api/chats/telegram/1/messages", params={"limit": 10})
+    assert resp.status_code == 200
+    page = resp.json()
+    assert [m["content"] for m in page["messages"]] == [f"m{i}" for i in range(15, 25)]
+    assert page["prev_cursor"] == ids[15]
+    assert page["next_cursor"] is None
+
+    resp = await client.get("/admin/api/chats/telegram/1/messages", params={"limit": 10, "after": ids[2]})
+    page = resp.json()
+    assert page["prev_cursor"] == ids[3]
+    assert page["next_cursor"] == ids[12]
+
+    resp = await client.get("/admin/api/chats/telegram/1/messages", params={"before": 1, "after": 2})
+    assert resp.status_code == 400
+
+    resp = await client.get("/admin/chats/telegram/1")
+    assert resp.status_code == 200
@@ -0,0 +1,141 @@
+import csv
+import gzip
+import io
+import json
+from unittest.mock import MagicMock
+
+import pytest
+from httpx import AsyncClient, ASGITransport
+from tortoise import Tortoise
+
+from src.database import ChatMessage
+from src.database.models import ChatStat
+from src.services import HistoryService, StatsService, TransferService, UserService
+from src.web.app import create_app
+
+
+@pytest.fixture(scope="function", autouse=True)
+async def init_db():
+    config = {
+        "connections": {"default": "sqlite://:memory:"},
+        "apps": {
+            "models": {
+                "models": ["src.database.models"],
+                "default_connection": "default",
+            }
+        },
+    }
+    await Tortoise.init(config=config)
+    await Tortoise.generate_schemas()
+    yield
+    await Tortoise.close_connections()
+
+
+@pytest.fixture
+async def client():
+    app = create_app(MagicMock(), MagicMock())
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as c:
+        await UserService.create_user("admin", "admin", is_superuser=True)
+        response = await c.post("/admin/login", data={"username": "admin", "password": "admin"})
+        assert response.status_code == 303
+        yield c
+
+
+async def _fill():
+    await HistoryService.add_message(1, "user", "привет", platform="telegram")
+    await HistoryService.add_message(1, "assistant", "строка 1\nстрока, \"2\"", platform="telegram")
+    await HistoryService.add_message(2, "user", "discord", platform="discord", chat_type="guild_text")
+
+
+async def _collect(**kwargs) -> bytes:
+    return b"".join([chunk async for chunk in TransferService.export(**kwargs)])
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("fmt", ["ndjson", "csv"])
+@pytest.mark.parametrize("compress", [False, True])
+async def test_export_import_roundtrip(fmt, compress):
+    await _fill()
+    data = await _collect(fmt=fmt, compress=compress)
+    if compress:
+        assert gzip.decompress(data)
+
+    await HistoryService.clear_all_history()
+    imported = await TransferService.import_file(io.BytesIO(data), fmt=fmt, batch_size=2)
+    assert imported == 3
+
+    rows = await ChatMessage.all().order_by("id").values_list("chat_id", "platform", "chat_type", "role", "content")
+    assert rows == [
+        (1, "telegram", "private", "user", "привет"),
+        (1, "telegram", "private", "assistant", "строка 1\nстрока, \"2\""),
+        (2, "discord", "guild_text", "user", "discord"),
+    ]
+    stats = await HistoryService.get_stats()
+    assert stats["total_messages"] == 3
+    assert stats["chats_count"] == 2
+
+
+@pytest.mark.asyncio
+async def test_export_filters_and_bad_import():
+    await _fill()
+    lines = (await _collect(platform="discord")).decode().splitlines()
+    assert [json.loads(line)["chat_id"] for line in lines] == [2]
+
+    bad = b'{"chat_id": 5, "role": "user", "content": "ok"}\n{"chat_id": 6}\n'
+    with pytest.raises(ValueError):
+        await TransferService.import_file(io.BytesIO(bad))
+    # Пачка вставляется в транзакции
+    assert not await ChatMessage.filter(chat_id=5).exists()
+
+    # Пачки до ошибки остаются сохранены вместе со счётчиками
+    with pytest.raises(ValueError, match="imported before the error: 1"):
+        await TransferService.import_file(io.BytesIO(bad), batch_size=1)
+    assert await ChatMessage.filter(chat_id=5).count() == 1
+    assert (await HistoryService.get_stats())["total_messages"] == 4
+
+
+@pytest.mark.asyncio
+async def test_import_updates_stats_incrementally(monkeypatch):
+    await _fill()
+    data = await _collect(platform="telegram")
+
+    async def rebuild():
+        raise AssertionError("импорт не должен пересчитывать статистику")
+
+    monkeypatch.setattr(StatsService, "rebuild", rebuild)
+    # Старое сообщение не сдвигает последнюю активность чата назад
+    old = json.dumps({"chat_id": 1, "role": "user", "content": "старое", "created_at": "2020-01-01T00:00:00+00:00"})
+    new = json.dumps({"chat_id": 3, "role": "user", "content": "новый чат"})
+    before = await ChatStat.get(chat_id=1, platform="telegram")
+    imported = await TransferService.import_file(io.BytesIO(data + f"{old}\n{new}\n".encode()), batch_size=2)
+    assert imported == 4
+
+    stats = await HistoryService.get_stats()
+    assert stats["total_messages"] == 7
+    assert stats["chats_count"] == 3
+    chat = await ChatStat.get(chat_id=1, platform="telegram")
+    assert chat.message_count == 5
+    assert chat.last_message_at == before.last_message_at
+    assert (await ChatStat.get(chat_id=3, platform="telegram")).message_count == 1
+
+
+@pytest.mark.asyncio
+async def test_export_import_api(client):
+    await _fill()
+    resp = await client.get("/admin/api/export", params={"format": "csv", "gzip": "true"})
+    assert resp.status_code == 200
+    assert resp.headers["content-disposition"] == 'attachment; filename="chat_history.csv.gz"'
+
+    resp = await client.post("/admin/api/import", files={"file": ("history.csv.gz", resp.content)})
+    assert resp.status_code == 200, resp.text
+    assert resp.json() == {"imported": 3}, resp.text
+    assert await ChatMessage.all().count() == 6
+
+    resp = await client.post("/admin/api/import", files={"file": ("history.ndjson.gz", b"\x1f\x8bgarbage")})
+    assert resp.status_code == 400
+    data = gzip.compress(b'{"chat_id": 1, "role": "user", "content": "x"}\n')
+    resp = await client.post("/admin/api/import", files={"file": ("history.ndjson.gz", data[:-10])})
+    assert resp.status_code == 400
+    big = b"chat_id,role,content\n1,user," + b"x" * (csv.field_size_limit() + 1) + b"\n"
+    resp = await client.post("/admin/api/import", files={"file": ("history.csv", big)})
+    assert resp.status_code == 400
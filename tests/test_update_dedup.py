@@ -0,0 +1,74 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from tortoise import Tortoise
+
+from src.bot.telegram.deduplication import UpdateDeduplicationMiddleware, UpdateDeduplicator
+from src.database.models import ProcessedUpdate
+
+
+@pytest.fixture(scope="function", autouse=True)
+async def init_db():
+    config = {
+        "connections": {"default": "sqlite://:memory:"},
+        "apps": {
+            "models": {
+                "models": ["src.database.models"],
+                "default_connection": "default",
+            }
+        },
+    }
+    await Tortoise.init(config=config)
+    await Tortoise.generate_schemas()
+    yield
+    await Tortoise.close_connections()
+
+
+@pytest.mark.asyncio
+async def test_memory_window():
+    dedup = UpdateDeduplicator(window=2)
+    assert await dedup.is_duplicate(1) is False
+    assert await dedup.is_duplicate(1) is True
+    assert await dedup.is_duplicate(2) is False
+    assert await dedup.is_duplicate(3) is False
+    # 1 вытеснен из окна
+    assert await dedup.is_duplicate(1) is False
+    assert dedup.duplicates == 1
+
+
+@pytest.mark.asyncio
+async def test_database_backend_shared_between_instances():
+    first = UpdateDeduplicator(use_database=True)
+    second = UpdateDeduplicator(use_database=True)
+
+    assert await first.is_duplicate(100) is False
+    assert await second.is_duplicate(100) is True
+    assert await ProcessedUpdate.filter(update_id=100).exists()
+
+
+@pytest.mark.asyncio
+async def test_middleware_skips_redelivery():
+    middleware = UpdateDeduplicationMiddleware(UpdateDeduplicator())
+    handler = AsyncMock(return_value="OK")
+    event = MagicMock()
+    event.update_id = 5
+
+    assert await middleware(handler, event, {}) == "OK"
+    assert await middleware(handler, event, {}) is None
+    handler.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_failed_update_is_processed_on_redelivery():
+    dedup = UpdateDeduplicator(use_database=True)
+    middleware = UpdateDeduplicationMiddleware(dedup)
+    handler = AsyncMock(side_effect=[RuntimeError("boom"), "OK"])
+    event = MagicMock()
+    event.update_id = 7
+
+    with pytest.raises(RuntimeError):
+        await middleware(handler, event, {})
+    assert not await ProcessedUpdate.filter(update_id=7).exists()
+
+    assert await middleware(handler, event, {}) == "OK"
+    assert await middleware(handler, event, {}) is None
+    assert handler.await_count == 2
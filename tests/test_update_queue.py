@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+from unittest.mock import MagicMock
+from aiogram.types import Update
+
+from src.bot.telegram.update_queue import UpdateQueue, get_update_chat_key
+
+
+def make_update(update_id: int, chat_id: int) -> Update:
+    return Update.model_validate({
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 0,
+            "chat": {"id": chat_id, "type": "private"},
+            "text": f"msg {update_id}",
+        },
+    })
+
+
+def test_update_chat_key():
+    assert get_update_chat_key(make_update(1, 42)) == 42
+    assert get_update_chat_key(Update(update_id=7)) == 7
+
+
+@pytest.mark.asyncio
+async def test_update_queue_preserves_chat_order():
+    processed: list[tuple[int, int]] = []
+
+    async def feed_update(bot, update):
+        await asyncio.sleep(0.001 * (update.update_id % 3))
+        processed.append((update.message.chat.id, update.update_id))
+
+    dp = MagicMock()
+    dp.feed_update = feed_update
+    queue = UpdateQueue(MagicMock(), dp, workers=4, maxsize=100)
+    queue.start()
+
+    for i in range(1, 31):
+        assert await queue.enqueue(make_update(i, chat_id=i % 3))
+
+    while queue.stats()["processed"] < 30:
+        await asyncio.sleep(0.01)
+    await queue.stop()
+
+    for chat_id in range(3):
+        ids = [u for c, u in processed if c == chat_id]
+        assert ids == sorted(ids)
+
+
+@pytest.mark.asyncio
+async def test_slow_chat_does_not_block_others():
+    release = asyncio.Event()
+    processed: list[int] = []
+
+    async def feed_update(bot, update):
+        if update.update_id == 1:
+            await release.wait()
+        processed.append(update.update_id)
+
+    dp = MagicMock()
+    dp.feed_update = feed_update
+    queue = UpdateQueue(MagicMock(), dp, workers=2, maxsize=100)
+    queue.start()
+
+    # Чаты 0 и 2 при шардировании по chat_id % workers попали бы к одному воркеру
+    await queue.enqueue(make_update(1, chat_id=0))
+    await queue.enqueue(make_update(2, chat_id=0))
+    await queue.enqueue(make_update(3, chat_id=2))
+    await queue.enqueue(make_update(4, chat_id=2))
+
+    while queue.stats()["processed"] < 2:
+        await asyncio.sleep(0.01)
+    assert processed == [3, 4]
+    assert queue.pending == 2
+
+    release.set()
+    while queue.pending:
+        await asyncio.sleep(0.01)
+    await queue.stop()
+    assert processed == [3, 4, 1, 2]
+
+
+@pytest.mark.asyncio
+async def test_update_queue_sheds_when_full():
+    dp = MagicMock()
+    queue = UpdateQueue(MagicMock(), dp, workers=1, maxsize=1, enqueue_timeout=0.01)
+
+    assert await queue.enqueue(make_update(1, 1)) is True
+    assert await queue.enqueue(make_update(2, 1)) is False
+    assert queue.stats()["shed"] == 1
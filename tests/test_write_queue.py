@@ -0,0 +1,116 @@
+import asyncio
+
+import pytest
+from tortoise import Tortoise
+
+from config import Settings
+from src.database import ChatMessage, sql
+from src.database.config import sqlite_pragmas
+from src.database.models import Setting
+from src.database.writer import WriteQueue, write_queue
+from src.services import HistoryService
+
+
+@pytest.fixture(scope="function", autouse=True)
+async def init_db(tmp_path):
+    config = {
+        "connections": {
+            "default": {
+                "engine": "tortoise.backends.sqlite",
+                "credentials": {"file_path": str(tmp_path / "bot.db"), **sqlite_pragmas(Settings())},
+            }
+        },
+        "apps": {
+            "models": {
+                "models": ["src.database.models"],
+                "default_connection": "default",
+            }
+        },
+    }
+    await Tortoise.init(config=config)
+    await Tortoise.generate_schemas()
+    yield
+    await write_queue.stop()
+    await Tortoise.close_connections()
+
+
+@pytest.mark.asyncio
+async def test_pragmas_applied_on_connect():
+    rows = await sql.fetch_all("PRAGMA journal_mode")
+    assert rows[0]["journal_mode"] == "wal"
+    rows = await sql.fetch_all("PRAGMA synchronous")
+    assert rows[0]["synchronous"] == 1  # NORMAL
+
+
+@pytest.mark.asyncio
+async def test_concurrent_messages_are_batched():
+    write_queue.start()
+    messages = await asyncio.gather(
+        *(HistoryService.add_message(i % 3, "user", f"m{i}", title=f"Chat {i % 3}") for i in range(60))
+    )
+
+    assert len({m.id for m in messages}) == 60
+    assert await ChatMessage.all().count() == 60
+    stats = write_queue.stats()
+    assert stats["writes"] == 60
+    assert stats["batches"] < 60
+    assert (await HistoryService.get_stats())["total_messages"] == 60
+
+
+@pytest.mark.asyncio
+async def test_failed_write_does_not_affect_batch():
+    queue = WriteQueue(max_batch=10, linger_ms=5)
+    queue.start()
+
+    async def good(key: str) -> str:
+        await Setting.create(key=key, value="1")
+        return key
+
+    async def bad() -> None:
+        await Setting.create(key="a", value="1")
+        raise RuntimeError("boom")
+
+    results = await asyncio.gather(
+        queue.submit(good, "a"), queue.submit(bad), queue.submit(good, "b"), return_exceptions=True
+    )
+    await queue.stop()
+
+    assert results[0] == "a" and results[2] == "b"
+    assert isinstance(results[1], Exception)
+    assert sorted(await Setting.all().values_list("key", flat=True)) == ["a", "b"]
+    # Повтор по одной считается той же пачкой
+    assert queue.stats()["retried_batches"] == 1
+    assert (queue.stats()["writes"], queue.stats()["batches"]) == (3, 1)
+
+
+@pytest.mark.asyncio
+async def test_stop_flushes_queued_writes():
+    write_queue.start()
+    tasks = [asyncio.create_task(HistoryService.add_message(1, "user", f"m{i}")) for i in range(5)]
+    await asyncio.sleep(0)
+    await write_queue.stop()
+
+    assert all(task.done() for task in tasks)
+    assert await ChatMessage.all().count() == 5
+
+
+@pytest.mark.asyncio
+async def test_submit_during_stop_runs_directly():
+    queue = WriteQueue(linger_ms=20)
+    queue.start()
+
+    async def write(key: str) -> str:
+        await Setting.create(key=key, value="1")
+        return key
+
+    first = asyncio.create_task(queue.submit(write, "queued"))
+    await asyncio.sleep(0)
+    stopping = asyncio.create_task(queue.stop())
+    await asyncio.sleep(0)
+    # Операция после начала остановки не встаёт за маркером остановки
+    assert await asyncio.wait_for(queue.submit(write, "late"), 1) == "late"
+    await stopping
+
+    assert await first == "queued"
+    assert not queue.is_running
+    assert queue.stats()["batches"] == 1